@@ -0,0 +1,279 @@
+"""
+PIPELINE BENCHMARKS
+Times every pipeline stage on synthetic inventories and flags regressions
+
+For each inventory size a synthetic power_system.csv is generated into a
+scratch directory, then every stage runs in a fresh process (so peak RSS is
+per stage) a number of times:
+
+    calculate_and_save   input CSV -> loss CSV
+    print_summary        summary of a loaded loss table (re-reads the input)
+    analyze_system       the full simple_analytics report
+    cached_rerun         calculate_and_save + analyze_system again on unchanged inputs
+    live_tick            one live-simulator tick (update, publish, write, history)
+    dashboard_load       the dashboard's two compact table reads + join
+
+Results (latency p50/p95/max, throughput, peak RSS) are written as JSON and
+compared with a stored baseline; stages slower or larger than the baseline
+by more than the tolerance are flagged and the exit status is 1.
+
+    python benchmarks/run_benchmarks.py --sizes 1000 10000 100000 --repeat 5
+    python benchmarks/run_benchmarks.py --save-baseline
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+STAGES = ['calculate_and_save', 'print_summary', 'analyze_system', 'cached_rerun', 'live_tick',
+          'dashboard_load']
+
+RESULTS_FILE = os.path.join(REPO_ROOT, 'benchmarks', 'results', 'latest.json')
+BASELINE_FILE = os.path.join(REPO_ROOT, 'benchmarks', 'baseline.json')
+
+# Profile and tariff tables analyze_system picks up from data/
+SHARED_DATA_FILES = ['load_profiles.csv', 'tariff.csv', 'conductor_catalog.csv']
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def prepare_workdir(lines, seed=0):
+    """Scratch directory with a synthetic data/ folder of the given size"""
+    from scripts.calculate_losses import calculate_losses_vectorized
+    from scripts.columnar_store import read_table
+    from scripts.generate_feeders import generate_feeders
+
+    workdir = tempfile.mkdtemp(prefix=f"bench_{lines}_")
+    data_dir = os.path.join(workdir, 'data')
+    os.makedirs(data_dir)
+    for name in SHARED_DATA_FILES:
+        source = os.path.join(REPO_ROOT, 'data', name)
+        if os.path.exists(source):
+            shutil.copy(source, data_dir)
+
+    system_file = os.path.join(data_dir, 'power_system.csv')
+    generate_feeders(lines, system_file, seed, os.path.join(REPO_ROOT, 'data', 'conductor_catalog.csv'))
+    system_df = read_table(system_file, dtype={'line_id': str, 'area_name': str})
+    calculate_losses_vectorized(system_df).to_csv(os.path.join(data_dir, 'loss_calculations.csv'),
+                                                  index=False)
+    return workdir
+
+def setup_stage(stage):
+    """Prepare a stage in the current directory and return the callable to time"""
+    if stage == 'calculate_and_save':
+        from scripts.calculate_losses import calculate_and_save
+        return lambda: calculate_and_save('data/power_system.csv', 'data/loss_calculations_bench.csv',
+                                          cache_dir=None)
+
+    if stage == 'print_summary':
+        from scripts.calculate_losses import print_summary
+        from scripts.columnar_store import read_table
+        results_df = read_table('data/loss_calculations.csv')
+        return lambda: print_summary(results_df)
+
+    if stage == 'analyze_system':
+        from scripts.simple_analytics import analyze_system
+        return lambda: analyze_system(cache_dir=None)
+
+    if stage == 'cached_rerun':
+        from scripts.calculate_losses import calculate_and_save
+        from scripts.simple_analytics import analyze_system
+
+        def rerun():
+            calculate_and_save('data/power_system.csv', 'data/loss_calculations.csv')
+            analyze_system()
+        rerun()  # fills the result cache
+        return rerun
+
+    if stage == 'live_tick':
+        import pickle
+        from scripts.columnar_store import read_table
+        from scripts.history_store import HistoryWriter
+        from scripts.incremental_losses import IncrementalLossModel
+        from scripts.live_channel import LivePublisher
+        from scripts.live_simulator import LoadGenerator, simulation_tick
+        from scripts.live_snapshots import SnapshotWriter
+
+        df = read_table('data/power_system.csv')
+        model = IncrementalLossModel(df)
+        generator = LoadGenerator(df, seed=0)
+        snapshots = SnapshotWriter('data/live')
+        history = HistoryWriter('data/history')
+        snapshot_bytes = len(pickle.dumps((df, model.loss_table()), protocol=pickle.HIGHEST_PROTOCOL))
+        channel = LivePublisher(name=f"bench_{os.getpid()}", capacity=2 * snapshot_bytes + 1024 * 1024)
+
+        def tick():
+            simulation_tick(df, model, generator, snapshots, history, channel)
+
+        def cleanup():
+            channel.close()
+            history.close()
+            snapshots.close()
+        tick.cleanup = cleanup
+        return tick
+
+    if stage == 'dashboard_load':
+        from scripts.compact_tables import (join_compact, load_catalog, read_compact_losses,
+                                            read_compact_system)
+        catalog = load_catalog()
+
+        def load_and_join():
+            system_df = read_compact_system('data/power_system.csv', catalog)
+            loss_df = read_compact_losses('data/loss_calculations.csv', system_df)
+            return join_compact(system_df, loss_df)
+        return load_and_join
+
+    raise ValueError(f"Unknown stage: {stage}")
+
+def run_stage(stage, workdir, repeat):
+    """Worker: time one stage repeat times (runs in its own process)"""
+    os.chdir(workdir)
+    with open(os.devnull, 'w') as devnull:
+        stdout = sys.stdout
+        sys.stdout = devnull
+        try:
+            func = setup_stage(stage)
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                func()
+                timings.append(time.perf_counter() - start)
+            if hasattr(func, 'cleanup'):
+                func.cleanup()
+        finally:
+            sys.stdout = stdout
+    return {'timings': timings, 'peak_rss_mb': peak_rss_mb()}
+
+def summarize(stage, lines, measurement):
+    """Result record of one stage at one size"""
+    timings = np.array(measurement['timings'])
+    p50, p95 = np.percentile(timings, [50, 95])
+    return {
+        'stage': stage,
+        'lines': lines,
+        'repeat': len(timings),
+        'p50_s': round(float(p50), 6),
+        'p95_s': round(float(p95), 6),
+        'max_s': round(float(timings.max()), 6),
+        'mean_s': round(float(timings.mean()), 6),
+        'throughput_lines_per_s': round(lines / float(p50), 1) if p50 > 0 else None,
+        'peak_rss_mb': round(measurement['peak_rss_mb'], 1)
+    }
+
+def environment():
+    """Machine and library details stored next to the results"""
+    import pandas as pd
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count()
+    }
+
+def find_regressions(results, baseline, tolerance):
+    """Stages whose p50 latency or peak RSS exceed the baseline by more than tolerance"""
+    reference = {(entry['stage'], entry['lines']): entry for entry in baseline.get('results', [])}
+    regressions = []
+    for entry in results:
+        base = reference.get((entry['stage'], entry['lines']))
+        if base is None:
+            continue
+        for metric in ('p50_s', 'peak_rss_mb'):
+            if base[metric] and entry[metric] > base[metric] * (1 + tolerance):
+                regressions.append({'stage': entry['stage'], 'lines': entry['lines'], 'metric': metric,
+                                    'baseline': base[metric], 'current': entry[metric],
+                                    'ratio': round(entry[metric] / base[metric], 3)})
+    return regressions
+
+def run_benchmarks(sizes, stages=STAGES, repeat=5, seed=0):
+    """Run every stage at every size and return the result records"""
+    results = []
+    context = get_context('spawn')
+    for lines in sizes:
+        print(f"\n📦 {lines:,} lines")
+        workdir = prepare_workdir(lines, seed)
+        try:
+            for stage in stages:
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                    measurement = pool.submit(run_stage, stage, workdir, repeat).result()
+                entry = summarize(stage, lines, measurement)
+                results.append(entry)
+                print(f"   {stage:<20} p50 {entry['p50_s'] * 1000:>10.1f} ms | "
+                      f"p95 {entry['p95_s'] * 1000:>10.1f} ms | "
+                      f"{entry['throughput_lines_per_s'] or 0:>14,.0f} lines/s | "
+                      f"RSS {entry['peak_rss_mb']:>8.1f} MB")
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pipeline benchmark harness")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10_000, 100_000])
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=RESULTS_FILE)
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed slowdown / growth over the baseline (0.25 = 25%%)")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="store these results as the new baseline")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("⏱️  PIPELINE BENCHMARKS")
+    print("=" * 60)
+
+    results = run_benchmarks(args.sizes, args.stages, args.repeat, args.seed)
+    report = {'environment': environment(), 'results': results}
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results saved to: {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Baseline saved to: {args.baseline}")
+        sys.exit(0)
+
+    if not os.path.exists(args.baseline):
+        print("ℹ️  No baseline stored yet (run with --save-baseline)")
+        sys.exit(0)
+
+    with open(args.baseline) as f:
+        regressions = find_regressions(results, json.load(f), args.tolerance)
+    if not regressions:
+        print(f"✅ No regressions against baseline (tolerance {args.tolerance:.0%})")
+        sys.exit(0)
+
+    print(f"\n⚠️  {len(regressions)} regression(s) against baseline:")
+    for item in regressions:
+        print(f"   {item['stage']} @ {item['lines']:,} lines: {item['metric']} "
+              f"{item['baseline']} → {item['current']} (×{item['ratio']})")
+    sys.exit(1)
@@ -1,11 +1,25 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+import numpy as np
 import math
+import os
+import sys
 import time
 from datetime import datetime
 
+sys.path.append('.')
+from scripts import metrics
+from scripts.anomaly_detector import ALERT_KINDS, ALERT_LOG, read_alerts
+from scripts.columnar_store import resolve_table
+from scripts.compact_tables import (CATALOG_FILE, compact_losses, compact_system, conductor_parameters,
+                                    join_compact, load_catalog, read_compact_losses, read_compact_system)
+from scripts.history_store import choose_resolution, query as query_history
+from scripts.live_channel import LiveSubscriber
+from scripts.live_snapshots import current_generation, read_snapshot, snapshot_paths
+from scripts.report_export import EXPORT_FORMATS, export_report, summary_report
+from scripts.result_cache import ResultCache
+from scripts.simple_analytics import group_summary, top_k_positions
+
 # Page setup
 st.set_page_config(
     page_title="Power System Dashboard",
@@ -43,36 +57,413 @@ st.markdown("""
 st.markdown('<h1 class="main-title">⚡ LIVE POWER SYSTEM MONITOR</h1>', unsafe_allow_html=True)
 st.markdown("### Generation (410V) → Step-up (11kV) → 5 Lines → Distribution Areas")
 
+# Static data files; modification times identify the data version (live data
+# comes from the live channel or the snapshots under data/live, which carry
+# their own generation number)
+STATIC_FILES = ('data/power_system.csv', 'data/loss_calculations.csv')
+
+# Above this many lines charts show area/conductor aggregates, the worst
+# lines and a WebGL scatter, and the details table is paginated
+LARGE_INVENTORY_LINES = 200
+TOP_K_LINES = 20
+TABLE_PAGE_ROWS = 100
+MAX_SCATTER_POINTS = 20_000
+MAX_LINE_OPTIONS = 200
+ALERT_ROWS = 200
+
+# Fragments let the live panels refresh without rerunning the page (Streamlit >= 1.33)
+fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None)
+
 # Load data
-@st.cache_data(ttl=5)  # Cache for 5 seconds for live updates
-def load_data(use_live_data=False):
+@st.cache_resource
+def live_feed():
+    """Holder for the shared-memory subscriber, shared by all sessions"""
+    return {'subscriber': None}
+
+def live_subscriber():
+    """Subscriber of the simulator's live channel, or None if it isn't running"""
+    feed = live_feed()
+    if feed['subscriber'] is not None and feed['subscriber'].closed():
+        feed['subscriber'].close()
+        feed['subscriber'] = None
+    if feed['subscriber'] is None:
+        try:
+            feed['subscriber'] = LiveSubscriber()
+        except FileNotFoundError:
+            return None
+    return feed['subscriber']
+
+@st.cache_resource
+def result_cache():
+    """On-disk result cache shared with the other scripts (see scripts/result_cache.py)"""
+    return ResultCache()
+
+def cached_result(kind, compute):
+    """Result of compute() for the static data files, from the result cache when they are unchanged"""
+    cache = result_cache()
+    key = cache.key(kind, files=STATIC_FILES + (CATALOG_FILE,))
+    value = cache.get(key)
+    if value is None:
+        value = cache.put(key, compute())
+    return value
+
+@st.cache_resource
+def conductor_catalog():
+    """Conductor R/X by type (see scripts/compact_tables.py)"""
+    return load_catalog()
+
+def load_pair(system_file, loss_file):
+    """System and loss tables in compact form (categorical, downcast, integer line_key)"""
+    system_df = read_compact_system(system_file, conductor_catalog())
+    return system_df, read_compact_losses(loss_file, system_df)
+
+def load_files(use_live_data=False, generation=None):
     try:
-        if use_live_data:
-            system_df = pd.read_csv('data/power_system_live.csv')
-            loss_df = pd.read_csv('data/loss_calculations_live.csv')
-            data_source = "🔄 LIVE DATA"
+        if use_live_data and generation:
+            generation, system_df, loss_df = read_snapshot(generation=generation, reader=load_pair)
+            data_source = f"🔄 LIVE DATA (generation {generation})"
         else:
-            system_df = pd.read_csv('data/power_system.csv')
-            loss_df = pd.read_csv('data/loss_calculations.csv')
-            data_source = "📁 STATIC DATA"
+            system_df, loss_df = load_pair(*STATIC_FILES)
+            data_source = "📁 STATIC DATA (no live data)" if use_live_data else "📁 STATIC DATA"
     except FileNotFoundError:
-        # Fallback to static data if live data doesn't exist
-        system_df = pd.read_csv('data/power_system.csv')
-        loss_df = pd.read_csv('data/loss_calculations.csv')
+        # Fallback to static data if the snapshot was pruned meanwhile
+        system_df, loss_df = load_pair(*STATIC_FILES)
         data_source = "📁 STATIC DATA (Fallback)"
     
     return system_df, loss_df, data_source
 
+def file_version(path):
+    """Modification time of the storage read_table would use for path"""
+    try:
+        return os.stat(resolve_table(path)[1]).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+def data_key(use_live_data=False):
+    """Cheap identifier of the current data version
+    
+    ('live', generation) when the simulator publishes on the live channel,
+    ('snapshot', generation) when it commits live snapshots to disk,
+    otherwise (also in live mode before any live data exists) the
+    modification times of the static data files.
+    """
+    if use_live_data:
+        subscriber = live_subscriber()
+        generation = subscriber.generation() if subscriber else 0
+        if generation > 0:
+            return ('live', generation)
+        generation = current_generation()
+        if generation > 0:
+            return ('snapshot', generation)
+    return ('files',) + tuple(file_version(path) for path in STATIC_FILES)
+
+@st.cache_resource(max_entries=8)
+def load_combined(use_live_data, key):
+    """Joined system and loss table of one data version (shared by all sessions)
+    
+    Every caller gets the same frame object rather than an unpickled copy, so
+    a refresh of an unchanged data version doesn't copy the table; callers
+    must treat it as read-only. Static files are also kept in the on-disk
+    result cache, so a restarted dashboard doesn't parse and join unchanged
+    tables again.
+    """
+    if key[0] == 'files' and not use_live_data:
+        return cached_result('dashboard_combined', lambda: join_tables(use_live_data, key))
+    return join_tables(use_live_data, key)
+
+def join_tables(use_live_data, key):
+    """Load and join the system and loss table of one data version"""
+    with metrics.timed('dashboard', 'load_data'):
+        if key[0] == 'live':
+            generation, snapshot = live_subscriber().read()
+            system_df = compact_system(snapshot['system'], conductor_catalog())
+            loss_df = compact_losses(snapshot['losses'], system_df)
+            data_source = f"⚡ LIVE FEED (generation {generation})"
+        elif key[0] == 'snapshot':
+            system_df, loss_df, data_source = load_files(use_live_data, key[1])
+            try:
+                for path in snapshot_paths(key[1]):
+                    metrics.count_bytes('dashboard', 'read', path)
+            except FileNotFoundError:
+                pass
+        else:
+            system_df, loss_df, data_source = load_files(use_live_data)
+            for path in STATIC_FILES:
+                metrics.count_bytes('dashboard', 'read', path)
+    
+    with metrics.timed('dashboard', 'merge', rows=len(system_df)):
+        combined_df = join_compact(system_df, loss_df)
+    return combined_df, data_source
+
+def plain_labels(df):
+    """Categorical label columns as strings (plotly groups categoricals by every category)"""
+    return df.astype({name: str for name in df.columns if isinstance(df[name].dtype, pd.CategoricalDtype)})
+
+@st.cache_data(max_entries=8)
+def build_aggregates(use_live_data, key):
+    """Area and conductor summaries of one data version"""
+    combined_df, _ = load_combined(use_live_data, key)
+    
+    def aggregate():
+        with metrics.timed('dashboard', 'aggregate', rows=len(combined_df)):
+            return group_summary(combined_df, 'area_name'), group_summary(combined_df, 'conductor_type')
+    
+    if key[0] == 'files' and not use_live_data:
+        return cached_result('dashboard_aggregates', aggregate)
+    return aggregate()
+
+@st.cache_data(max_entries=8)
+def system_totals(use_live_data, key):
+    """System totals of one data version, from the area aggregates (metrics and summary report)"""
+    combined_df, _ = load_combined(use_live_data, key)
+    area_df, _ = build_aggregates(use_live_data, key)
+    lines = int(area_df['lines'].sum())
+    if len(combined_df) == 0:
+        return {'lines': 0, 'total_load_kw': 0.0, 'total_losses_kw': 0.0, 'avg_efficiency': 0.0,
+                'avg_loss_percentage': 0.0, 'total_current_amps': 0.0,
+                'highest_loss_line': 'N/A', 'most_efficient_line': 'N/A'}
+    return {
+        'lines': lines,
+        'total_load_kw': float(area_df['load_kw'].sum()),
+        'total_losses_kw': float(area_df['total_losses_kw'].sum()),
+        'avg_efficiency': float((area_df['efficiency'] * area_df['lines']).sum() / max(lines, 1)),
+        'avg_loss_percentage': float(combined_df['loss_percentage'].mean()),
+        'total_current_amps': float(combined_df['current_amps'].sum()),
+        'highest_loss_line': str(combined_df['line_id'].iat[int(combined_df['total_losses_kw'].to_numpy().argmax())]),
+        'most_efficient_line': str(combined_df['line_id'].iat[int(combined_df['efficiency'].to_numpy().argmax())])
+    }
+
+@st.cache_data(max_entries=4, show_spinner="Preparing export...")
+def build_export(use_live_data, key, export_format):
+    """Report export file of one data version, written in chunks on first request"""
+    combined_df, _ = load_combined(use_live_data, key)
+    area_df, conductor_df = build_aggregates(use_live_data, key)
+    with metrics.timed('dashboard', f"export_{export_format}", rows=len(combined_df)):
+        return export_report(combined_df, (use_live_data,) + key, export_format, conductor_catalog(),
+                             {'Areas': area_df, 'Conductors': conductor_df})
+
+@st.cache_data(max_entries=8)
+def inventory(use_live_data, key):
+    """Line IDs (for the line selector) and number of areas of one data version"""
+    combined_df, _ = load_combined(use_live_data, key)
+    return combined_df['line_id'].astype(str).tolist(), combined_df['area_name'].nunique()
+
+@st.cache_resource(max_entries=8)
+def build_charts(use_live_data, key):
+    """Loss and efficiency figures of one data version
+    
+    Large inventories are charted per area instead of per line.
+    """
+    # Plotly loads on first use, so the page header and metrics show without waiting for it
+    import plotly.express as px
+    
+    combined_df, _ = load_combined(use_live_data, key)
+    started = time.perf_counter()
+    
+    if len(combined_df) > LARGE_INVENTORY_LINES:
+        area_df, _ = build_aggregates(use_live_data, key)
+        fig1 = px.bar(
+            area_df,
+            x='area_name',
+            y=['line_losses_kw', 'transformer_losses_kw'],
+            title="Line vs Transformer Losses by Area",
+            labels={'value': 'Losses (kW)', 'variable': 'Loss Type', 'area_name': 'Area'},
+            color_discrete_map={'line_losses_kw': '#3B82F6', 'transformer_losses_kw': '#10B981'}
+        )
+        fig2 = px.bar(
+            area_df,
+            x='area_name',
+            y='efficiency',
+            title="Average Distribution Efficiency by Area",
+            labels={'efficiency': 'Efficiency (%)', 'area_name': 'Area'},
+            color='efficiency',
+            color_continuous_scale='RdYlGn'
+        )
+        fig2.update_yaxes(range=[max(0, area_df['efficiency'].min() - 2), 100])
+        metrics.observe('dashboard', 'charts', time.perf_counter() - started, rows=len(combined_df))
+        return fig1, fig2
+    
+    plain_df = plain_labels(combined_df)
+    fig1 = px.bar(
+        plain_df,
+        x='line_id',
+        y=['line_losses_kw', 'transformer_losses_kw'],
+        title="Line vs Transformer Losses",
+        labels={'value': 'Losses (kW)', 'variable': 'Loss Type'},
+        color_discrete_map={'line_losses_kw': '#3B82F6', 'transformer_losses_kw': '#10B981'}
+    )
+    
+    fig2 = px.pie(
+        plain_df,
+        names='area_name',
+        values='efficiency',
+        title="Distribution Efficiency",
+        hole=0.4,
+        color='area_name'
+    )
+    fig2.update_traces(textposition='inside', textinfo='percent+label')
+    metrics.observe('dashboard', 'charts', time.perf_counter() - started, rows=len(combined_df))
+    
+    return fig1, fig2
+
+@st.cache_resource(max_entries=8)
+def build_large_charts(use_live_data, key):
+    """Worst-lines, per-conductor and load vs loss figures for large inventories
+    
+    The scatter is drawn with WebGL and thinned to MAX_SCATTER_POINTS
+    evenly spaced lines (the worst lines are always kept).
+    """
+    import plotly.express as px
+    import plotly.graph_objects as go
+    
+    combined_df, _ = load_combined(use_live_data, key)
+    _, conductor_df = build_aggregates(use_live_data, key)
+    started = time.perf_counter()
+    
+    losses = combined_df['total_losses_kw'].to_numpy()
+    worst = top_k_positions(losses, TOP_K_LINES)
+    worst_df = plain_labels(combined_df.iloc[worst[::-1]])
+    fig_worst = px.bar(
+        worst_df,
+        x='total_losses_kw',
+        y='line_id',
+        orientation='h',
+        color='area_name',
+        title=f"Top {len(worst)} Lines by Total Losses",
+        labels={'total_losses_kw': 'Total Losses (kW)', 'line_id': 'Line', 'area_name': 'Area'}
+    )
+    fig_worst.update_yaxes(categoryorder='array', categoryarray=worst_df['line_id'].tolist())
+    
+    fig_conductor = px.bar(
+        conductor_df,
+        x='conductor_type',
+        y=['line_losses_kw', 'transformer_losses_kw'],
+        title="Losses by Conductor Type",
+        labels={'value': 'Losses (kW)', 'variable': 'Loss Type', 'conductor_type': 'Conductor'},
+        color_discrete_map={'line_losses_kw': '#3B82F6', 'transformer_losses_kw': '#10B981'}
+    )
+    
+    shown = np.arange(len(combined_df))
+    if len(shown) > MAX_SCATTER_POINTS:
+        shown = np.union1d(np.linspace(0, len(shown) - 1, MAX_SCATTER_POINTS).astype(int), worst)
+    fig_scatter = go.Figure(go.Scattergl(
+        x=combined_df['load_kw'].to_numpy()[shown],
+        y=combined_df['loss_percentage'].to_numpy()[shown],
+        text=combined_df['line_id'].to_numpy()[shown],
+        mode='markers',
+        marker=dict(size=4, color=losses[shown], colorscale='RdYlGn_r', showscale=True,
+                    colorbar=dict(title='Losses (kW)')),
+        hovertemplate='%{text}<br>Load %{x:,.0f} kW<br>Loss %{y:.2f}%<extra></extra>'
+    ))
+    fig_scatter.update_layout(
+        title=f"Load vs Loss % ({len(shown):,} of {len(combined_df):,} lines)",
+        xaxis_title='Load (kW)',
+        yaxis_title='Loss %'
+    )
+    metrics.observe('dashboard', 'large_charts', time.perf_counter() - started, rows=len(combined_df))
+    
+    return fig_worst, fig_conductor, fig_scatter
+
+@st.cache_data(max_entries=8)
+def table_order(use_live_data, key):
+    """Row positions by total losses, worst first (one sort per data version)"""
+    combined_df, _ = load_combined(use_live_data, key)
+    return np.argsort(-combined_df['total_losses_kw'].to_numpy(), kind='stable')
+
+@st.cache_resource(max_entries=32)
+def build_table(use_live_data, key, page=None):
+    """Styled line details table of one data version
+    
+    With a page number only that page of lines is styled, worst losses
+    first; colours are scaled to the whole fleet so pages compare.
+    """
+    combined_df, _ = load_combined(use_live_data, key)
+    started = time.perf_counter()
+    loss_range = combined_df['loss_percentage'].min(), combined_df['loss_percentage'].max()
+    if page is not None:
+        order = table_order(use_live_data, key)
+        combined_df = combined_df.iloc[order[page * TABLE_PAGE_ROWS:(page + 1) * TABLE_PAGE_ROWS]]
+    
+    # Create detailed table
+    display_df = combined_df[['line_id', 'area_name', 'line_length_km', 'conductor_type', 
+                            'load_kw', 'current_amps', 'line_losses_kw', 
+                            'transformer_losses_kw', 'total_losses_kw', 
+                            'loss_percentage', 'efficiency', 'voltage_drop_v']]
+    
+    # Format the table
+    display_df.columns = ['Line ID', 'Area', 'Length (km)', 'Conductor', 'Load (kW)', 
+                         'Current (A)', 'Line Loss (kW)', 'XFMR Loss (kW)', 
+                         'Total Loss (kW)', 'Loss %', 'Efficiency %', 'Voltage Drop (V)']
+    
+    styler = display_df.style.format({
+        'Load (kW)': '{:.0f}',
+        'Current (A)': '{:.1f}',
+        'Line Loss (kW)': '{:.2f}',
+        'XFMR Loss (kW)': '{:.2f}',
+        'Total Loss (kW)': '{:.2f}',
+        'Loss %': '{:.2f}',
+        'Efficiency %': '{:.2f}',
+        'Voltage Drop (V)': '{:.1f}'
+    }).background_gradient(subset=['Loss %'], cmap='RdYlGn_r', vmin=loss_range[0], vmax=loss_range[1])
+    metrics.observe('dashboard', 'table', time.perf_counter() - started, rows=len(display_df))
+    return styler
+
+@st.cache_data(ttl=60, max_entries=32)
+def load_history(line_id, start, end, resolution):
+    """Trend samples of one line (see scripts/history_store.py)"""
+    return query_history(line_id, start, end, resolution)
+
+@st.cache_data(max_entries=4)
+def load_alerts(version):
+    """Newest entries of the live anomaly alert log (see scripts/anomaly_detector.py)"""
+    return read_alerts(ALERT_LOG, ALERT_ROWS)
+
+def wait_for_live_update(generation, timeout, status):
+    """Block until the live channel or snapshots have a newer generation (else: timeout)
+    
+    Waits in short steps and touches a placeholder after each one so
+    Streamlit can still interrupt the script when a widget changes.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        subscriber = live_subscriber()
+        if subscriber is not None:
+            if subscriber.wait_for_new(generation, timeout=0.5):
+                return
+        elif current_generation() > generation or time.monotonic() >= deadline:
+            return
+        else:
+            time.sleep(0.5)
+        status.caption(f"⏳ Waiting for new live data... ({datetime.now().strftime('%H:%M:%S')})")
+
 # SIDEBAR
 st.sidebar.image("https://img.icons8.com/color/96/000000/electricity.png", width=80)
 st.sidebar.header("⚙️ System Controls")
 
 # Data settings in sidebar
 use_live_data = st.sidebar.toggle("Use Live Data", value=False)
-refresh_rate = st.sidebar.slider("Auto-refresh (seconds)", 5, 60, 10)
-selected_line = st.sidebar.selectbox(
-    "Select Line for Details",
-    ["LINE_001", "LINE_002", "LINE_003", "LINE_004", "LINE_005"]
+refresh_rate = st.sidebar.slider("Auto-refresh (seconds)", 1, 60, 5)
+# Line choices come from the data; large inventories are searched first
+try:
+    line_ids, area_count = inventory(use_live_data, data_key(use_live_data))
+except FileNotFoundError:
+    line_ids, area_count = [], 0
+if len(line_ids) > LARGE_INVENTORY_LINES:
+    line_query = st.sidebar.text_input("Search Line ID", placeholder="e.g. LINE_00042").strip().upper()
+    line_options = [line_id for line_id in line_ids if line_query in line_id.upper()] if line_query else line_ids
+    if not line_options:
+        st.sidebar.warning(f"No line matches '{line_query}'")
+    elif len(line_options) > MAX_LINE_OPTIONS:
+        st.sidebar.caption(f"Showing {MAX_LINE_OPTIONS} of {len(line_options):,} matches")
+    line_options = line_options[:MAX_LINE_OPTIONS]
+else:
+    line_options = line_ids
+selected_line = st.sidebar.selectbox("Select Line for Details", line_options)
+
+history_window = st.sidebar.selectbox(
+    "Trend Window",
+    ["1 hour", "24 hours", "7 days", "30 days"],
+    index=1
 )
 
 refresh = st.sidebar.button("🔄 Refresh Data", type="primary")
@@ -82,131 +473,129 @@ st.sidebar.info("""
 **System Configuration:**
 - Generation: 410V
 - Transmission: 11kV
-- 5 Independent Lines
-- 5 Distribution Areas
+- """ + f"{len(line_ids):,}" + """ Independent Lines
+- """ + f"{area_count:,}" + """ Distribution Areas
 """)
 
-# Load appropriate data
-try:
-    system_df, loss_df, data_source = load_data(use_live_data)
-    
-    # Display data source
-    st.sidebar.info(f"Data Source: {data_source}")
+def render_live_panels(use_live_data, selected_line, history_window):
+    """Metrics, charts and tables that depend on the current data
     
-    # Auto-refresh if live data is enabled
+    In live mode this runs as a fragment that re-executes on its own every
+    refresh interval without rerunning the rest of the page. Data, figures
+    and the styled table are cached per data version, so a refresh with no
+    new data only costs a file stat or a shared-memory header read.
+    """
     if use_live_data:
-        time.sleep(refresh_rate)
-        st.rerun()
-    
-    # Merge data
-    combined_df = pd.merge(system_df, loss_df, on=['line_id', 'area_name'])
+        metrics.tick('dashboard', refresh_rate)
+    started = time.perf_counter()
     
-    # Live indicator
-    if use_live_data:
-        st.markdown("""
-        <div style="background: linear-gradient(90deg, #00b09b, #96c93d); 
-                    padding: 10px; border-radius: 10px; margin-bottom: 20px;">
-            <h3 style="color: white; text-align: center; margin: 0;">
-            🔄 LIVE DATA STREAMING • Auto-refresh every """ + str(refresh_rate) + """ seconds
-            </h3>
-        </div>
-        """, unsafe_allow_html=True)
-    else:
-        st.markdown("""
-        <div style="background: #3B82F6; padding: 10px; border-radius: 10px; margin-bottom: 20px;">
-            <h3 style="color: white; text-align: center; margin: 0;">
-            📊 STATIC DATA MODE • Toggle 'Use Live Data' for real-time simulation
-            </h3>
-        </div>
-        """, unsafe_allow_html=True)
+    try:
+        key = data_key(use_live_data)
+        combined_df, data_source = load_combined(use_live_data, key)
+    except FileNotFoundError:
+        st.error("⚠️ Data files not found. Please run the calculation script first.")
+        st.info("Run this command in terminal: `python scripts/calculate_losses.py`")
+        return
     
     # Last update time
     current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    st.caption(f"Last updated: {current_time}")
+    st.caption(f"Data Source: {data_source} • Last updated: {current_time}")
+    if use_live_data and key[0] == 'files':
+        st.warning("⚠️ No live data yet: showing the static tables. Start the simulator to publish live data.")
+        st.info("Run this command in terminal: `python scripts/live_simulator.py`")
     
     # MAIN DASHBOARD
     # Row 1: System Overview Metrics
     st.markdown('<h2 class="section-title">System Overview</h2>', unsafe_allow_html=True)
     
     col1, col2, col3, col4 = st.columns(4)
+    totals = system_totals(use_live_data, key)
     
     with col1:
-        total_load = combined_df['load_kw'].sum()
-        st.metric("Total Load", f"{total_load:,.0f} kW")
+        st.metric("Total Load", f"{totals['total_load_kw']:,.0f} kW")
     
     with col2:
-        total_loss = combined_df['total_losses_kw'].sum()
-        st.metric("Total Losses", f"{total_loss:,.1f} kW")
+        st.metric("Total Losses", f"{totals['total_losses_kw']:,.1f} kW")
     
     with col3:
-        avg_efficiency = combined_df['efficiency'].mean()
-        st.metric("Avg Efficiency", f"{avg_efficiency:.1f}%")
+        st.metric("Avg Efficiency", f"{totals['avg_efficiency']:.1f}%")
     
     with col4:
-        total_current = combined_df['current_amps'].sum()
-        st.metric("Total Current", f"{total_current:,.0f} A")
+        st.metric("Total Current", f"{totals['total_current_amps']:,.0f} A")
+    
+    # Row 1b: Anomaly alerts raised by the live pipeline (cached per log version)
+    alerts_df = load_alerts(file_version(ALERT_LOG))
+    if len(alerts_df):
+        st.markdown('<h2 class="section-title">Alerts</h2>', unsafe_allow_html=True)
+        kind_counts = alerts_df['kind'].value_counts()
+        labels = {'threshold': "🚨 Threshold Breaches", 'spike': "⚡ Spikes", 'drift': "📉 Drifts"}
+        for column, kind in zip(st.columns(len(ALERT_KINDS)), ALERT_KINDS):
+            with column:
+                st.metric(labels[kind], f"{int(kind_counts.get(kind, 0)):,}")
+        st.caption(f"Newest {len(alerts_df):,} alerts, latest first "
+                   f"(last at {alerts_df['timestamp'].iat[0]:%Y-%m-%d %H:%M:%S} UTC)")
+        st.dataframe(alerts_df, use_container_width=True, height=250, hide_index=True)
     
     # Row 2: Loss Distribution Chart
+    large_inventory = len(combined_df) > LARGE_INVENTORY_LINES
     col1, col2 = st.columns(2)
     
+    # Figures are built once per data version
+    fig1, fig2 = build_charts(use_live_data, key)
+    
     with col1:
-        st.subheader("📈 Losses by Line")
-        fig1 = px.bar(
-            combined_df,
-            x='line_id',
-            y=['line_losses_kw', 'transformer_losses_kw'],
-            title="Line vs Transformer Losses",
-            labels={'value': 'Losses (kW)', 'variable': 'Loss Type'},
-            color_discrete_map={'line_losses_kw': '#3B82F6', 'transformer_losses_kw': '#10B981'}
-        )
+        st.subheader("📈 Losses by Area" if large_inventory else "📈 Losses by Line")
         st.plotly_chart(fig1, use_container_width=True)
     
     with col2:
         st.subheader("🎯 Efficiency by Area")
-        fig2 = px.pie(
-            combined_df,
-            names='area_name',
-            values='efficiency',
-            title="Distribution Efficiency",
-            hole=0.4,
-            color='area_name'
-        )
-        fig2.update_traces(textposition='inside', textinfo='percent+label')
         st.plotly_chart(fig2, use_container_width=True)
     
+    # Row 2b: Worst lines, conductors and every line's load vs losses
+    if large_inventory:
+        fig_worst, fig_conductor, fig_scatter = build_large_charts(use_live_data, key)
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.subheader("🔥 Worst Lines")
+            st.plotly_chart(fig_worst, use_container_width=True)
+        
+        with col2:
+            st.subheader("🧵 Losses by Conductor")
+            st.plotly_chart(fig_conductor, use_container_width=True)
+        
+        st.plotly_chart(fig_scatter, use_container_width=True)
+    
     # Row 3: Line Details Table
     st.markdown('<h2 class="section-title">Line Details</h2>', unsafe_allow_html=True)
     
-    # Create detailed table
-    display_df = combined_df[['line_id', 'area_name', 'line_length_km', 'conductor_type', 
-                            'load_kw', 'current_amps', 'line_losses_kw', 
-                            'transformer_losses_kw', 'total_losses_kw', 
-                            'loss_percentage', 'efficiency', 'voltage_drop_v']]
-    
-    # Format the table
-    display_df.columns = ['Line ID', 'Area', 'Length (km)', 'Conductor', 'Load (kW)', 
-                         'Current (A)', 'Line Loss (kW)', 'XFMR Loss (kW)', 
-                         'Total Loss (kW)', 'Loss %', 'Efficiency %', 'Voltage Drop (V)']
+    if large_inventory:
+        pages = math.ceil(len(combined_df) / TABLE_PAGE_ROWS)
+        page = st.number_input(f"Page (of {pages:,}, worst losses first)", min_value=1, max_value=pages,
+                               value=1, step=1, key='table_page')
+        table = build_table(use_live_data, key, int(page) - 1)
+    else:
+        table = build_table(use_live_data, key)
     
     st.dataframe(
-        display_df.style.format({
-            'Load (kW)': '{:.0f}',
-            'Current (A)': '{:.1f}',
-            'Line Loss (kW)': '{:.2f}',
-            'XFMR Loss (kW)': '{:.2f}',
-            'Total Loss (kW)': '{:.2f}',
-            'Loss %': '{:.2f}',
-            'Efficiency %': '{:.2f}',
-            'Voltage Drop (V)': '{:.1f}'
-        }).background_gradient(subset=['Loss %'], cmap='RdYlGn_r'),
+        table,
         use_container_width=True,
         height=300
     )
     
     # Row 4: Selected Line Details
+    selected_rows = combined_df.index[combined_df['line_id'] == selected_line]
+    if len(selected_rows) == 0:
+        st.info("Select a line in the sidebar to see its details.")
+        metrics.observe('dashboard', 'render_panels', time.perf_counter() - started)
+        metrics.publish('dashboard')
+        return
+    
     st.markdown('<h2 class="section-title">Line Details: ' + selected_line + '</h2>', unsafe_allow_html=True)
     
-    line_data = combined_df[combined_df['line_id'] == selected_line].iloc[0]
+    # Values as text in their own dtype's shortest form (float32 0.85, not 0.8500000238)
+    position = combined_df.index.get_loc(selected_rows[0])
+    line_data = {name: str(combined_df[name].iat[position]) for name in combined_df.columns}
     
     col1, col2, col3 = st.columns(3)
     
@@ -215,7 +604,8 @@ try:
         st.write(f"**Area:** {line_data['area_name']}")
         st.write(f"**Length:** {line_data['line_length_km']} km")
         st.write(f"**Conductor:** {line_data['conductor_type']}")
-        st.write(f"**Resistance:** {line_data['resistance_ohm_km']} Ω/km")
+        resistance = conductor_parameters(combined_df.loc[selected_rows[:1]], conductor_catalog())[0][0]
+        st.write(f"**Resistance:** {resistance:g} Ω/km")
     
     with col2:
         st.markdown("### 🔌 Electrical Parameters")
@@ -231,6 +621,58 @@ try:
         st.write(f"**Total Losses:** {line_data['total_losses_kw']} kW")
         st.write(f"**Efficiency:** {line_data['efficiency']}%")
     
+    # Row 4b: Trend history for the selected line (from the live history store)
+    st.markdown('<h2 class="section-title">Trends: ' + selected_line + '</h2>', unsafe_allow_html=True)
+    
+    window_seconds = {"1 hour": 3600, "24 hours": 86400, "7 days": 7 * 86400, "30 days": 30 * 86400}
+    trend_end = time.time() // 60 * 60  # whole minutes so the query cache can hit
+    trend_start = trend_end - window_seconds[history_window]
+    resolution = choose_resolution(trend_start, trend_end)
+    history_df = load_history(selected_line, trend_start, trend_end, resolution)
+    
+    if history_df.empty:
+        st.info("No history recorded yet. Run the live simulator to start collecting trends.")
+    else:
+        import plotly.express as px
+        fig3 = px.line(
+            history_df,
+            x='timestamp',
+            y=['total_losses_kw_mean', 'total_losses_kw_max'],
+            title=f"Losses over the last {history_window} ({resolution} averages)",
+            labels={'value': 'Losses (kW)', 'variable': 'Series', 'timestamp': 'Time'}
+        )
+        st.plotly_chart(fig3, use_container_width=True)
+    
+    metrics.observe('dashboard', 'render_panels', time.perf_counter() - started)
+    metrics.publish('dashboard')
+    
+# Load appropriate data
+try:
+    # Live indicator
+    if use_live_data:
+        st.markdown("""
+        <div style="background: linear-gradient(90deg, #00b09b, #96c93d); 
+                    padding: 10px; border-radius: 10px; margin-bottom: 20px;">
+            <h3 style="color: white; text-align: center; margin: 0;">
+            🔄 LIVE DATA STREAMING • Auto-refresh every """ + str(refresh_rate) + """ seconds
+            </h3>
+        </div>
+        """, unsafe_allow_html=True)
+    else:
+        st.markdown("""
+        <div style="background: #3B82F6; padding: 10px; border-radius: 10px; margin-bottom: 20px;">
+            <h3 style="color: white; text-align: center; margin: 0;">
+            📊 STATIC DATA MODE • Toggle 'Use Live Data' for real-time simulation
+            </h3>
+        </div>
+        """, unsafe_allow_html=True)
+    
+    # Live-dependent rows refresh on their own as a fragment in live mode
+    if use_live_data and fragment is not None:
+        fragment(run_every=refresh_rate)(render_live_panels)(use_live_data, selected_line, history_window)
+    else:
+        render_live_panels(use_live_data, selected_line, history_window)
+    
     # Row 5: System Diagram
     st.markdown('<h2 class="section-title">System Diagram</h2>', unsafe_allow_html=True)
     
@@ -262,47 +704,44 @@ try:
     # Row 6: Download Report
     st.markdown('<h2 class="section-title">Reports</h2>', unsafe_allow_html=True)
     
-    # Convert DataFrame to CSV for download
-    csv = combined_df.to_csv(index=False).encode('utf-8')
+    # Reports use the data version current when the page was drawn; exports are
+    # only written when asked for, once per data version and format
+    report_key = data_key(use_live_data)
     
     col1, col2 = st.columns(2)
     
     with col1:
-        st.download_button(
-            label="📥 Download Loss Report (CSV)",
-            data=csv,
-            file_name="power_system_loss_report.csv",
-            mime="text/csv"
-        )
+        export_format = st.radio("Export format", list(EXPORT_FORMATS), horizontal=True,
+                                 format_func=lambda name: {'csv': 'CSV', 'xlsx': 'Excel'}[name])
+        if st.button("📦 Prepare Loss Report"):
+            st.session_state['export_request'] = (use_live_data, report_key, export_format)
+        if st.session_state.get('export_request') == (use_live_data, report_key, export_format):
+            export_file = build_export(use_live_data, report_key, export_format)
+            if not os.path.exists(export_file):
+                build_export.clear()
+                export_file = build_export(use_live_data, report_key, export_format)
+            with open(export_file, 'rb') as f:
+                st.download_button(
+                    label=f"📥 Download Loss Report ({export_format.upper()})",
+                    data=f,
+                    file_name=f"power_system_loss_report.{export_format}",
+                    mime=EXPORT_FORMATS[export_format]
+                )
     
     with col2:
         if st.button("📄 Generate Summary Report"):
-            report = f"""
-            POWER SYSTEM LOSS REPORT
-            ========================
-            
-            System Configuration:
-            - Generation Voltage: 410V
-            - Transmission Voltage: 11kV
-            - Number of Lines: 5
-            
-            Summary Statistics:
-            - Total Load: {total_load:,.0f} kW
-            - Total Losses: {total_loss:,.1f} kW
-            - Overall Efficiency: {100 - (total_loss/total_load*100):.2f}%
-            - Average Loss Percentage: {combined_df['loss_percentage'].mean():.2f}%
-            
-            Highest Loss Line: {combined_df.loc[combined_df['total_losses_kw'].idxmax(), 'line_id']}
-            Most Efficient Line: {combined_df.loc[combined_df['efficiency'].idxmax(), 'line_id']}
-            
-            Generated on: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}
-            """
-            
-            st.text_area("System Report", report, height=200)
+            st.text_area("System Report", summary_report(system_totals(use_live_data, report_key)), height=200)
 
 except FileNotFoundError:
     st.error("⚠️ Data files not found. Please run the calculation script first.")
     st.info("Run this command in terminal: `python scripts/calculate_losses.py`")
 except Exception as e:
     st.error(f"Error loading data: {str(e)}")
-    st.info("Make sure all data files exist in the 'data' folder")
\ No newline at end of file
+    st.info("Make sure all data files exist in the 'data' folder")
+
+# Without fragment support (Streamlit < 1.33) fall back to rerunning the whole
+# page when the simulator publishes a new generation
+if use_live_data and fragment is None:
+    key = data_key(use_live_data)
+    wait_for_live_update(key[1] if key[0] != 'files' else 0, refresh_rate, st.empty())
+    st.rerun()
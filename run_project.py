@@ -1,81 +1,252 @@
 """
 MASTER RUN SCRIPT - Run everything with one click!
-Automatically opens browser after dashboard starts
+Starts every stage in dependency order and waits until it is really ready
+
+    Calculations     one-shot; ready when it exits cleanly and
+                     data/loss_calculations.csv (or .cols) is at least as new
+                     as its input (a cached result may leave it untouched)
+    Live Simulator   ready when it commits a snapshot (data/live/CURRENT changes)
+    Dashboard        waits for the calculations; ready when its HTTP port answers
+
+A stage starts as soon as the stages it depends on are ready, so the
+dashboard never reads a half-written loss table and the browser opens only
+once the page can be served. Long-running stages that crash are restarted
+(up to MAX_RESTARTS times), and the startup time of every stage is reported.
+Their output goes to logs/<stage>.log.
+
+    python run_project.py [--port 8501] [--no-browser] [--no-simulator]
 """
+import argparse
+import os
 import subprocess
 import sys
-import os
 import time
-import webbrowser
+import urllib.error
+import urllib.request
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+LOG_DIR = os.path.join(PROJECT_DIR, 'logs')
+
+LOSS_INPUTS = ('data/power_system.csv', 'data/power_system.cols')
+LOSS_OUTPUTS = ('data/loss_calculations.csv', 'data/loss_calculations.cols')
+LIVE_CURRENT = 'data/live/CURRENT'
+
+MAX_RESTARTS = 3
+POLL_SECONDS = 0.2
+
+def output_updated(paths, since):
+    """True if any of the paths was written after since (epoch seconds)"""
+    for path in paths:
+        try:
+            if os.path.getmtime(os.path.join(PROJECT_DIR, path)) >= since:
+                return True
+        except OSError:
+            pass
+    return False
+
+def newest_mtime(paths):
+    """Latest modification time of the paths that exist (None if none do)"""
+    mtimes = []
+    for path in paths:
+        try:
+            mtimes.append(os.path.getmtime(os.path.join(PROJECT_DIR, path)))
+        except OSError:
+            pass
+    return max(mtimes, default=None)
 
-def run_command(command, description, wait_for_browser=False):
-    """Run a command and show status"""
-    print(f"🚀 {description}...")
+def output_current(outputs, inputs):
+    """True if an output exists and is at least as new as every existing input"""
+    output_mtime = newest_mtime(outputs)
+    input_mtime = newest_mtime(inputs)
+    return output_mtime is not None and input_mtime is not None and output_mtime >= input_mtime
+
+def http_answers(url):
+    """True if an HTTP server answers at url (any status code)"""
     try:
-        if sys.platform == "win32":  # Windows
-            subprocess.Popen(
-                f'start cmd /k "{command}"',
-                shell=True
-            )
-        else:  # Mac/Linux
-            subprocess.Popen(command, shell=True)
-        
-        print(f"✅ {description} started")
-        
-        # If this is the dashboard command, open browser after delay
-        if wait_for_browser:
-            print("⏳ Waiting for dashboard to start...")
-            time.sleep(3)  # Wait 3 seconds for Streamlit to start
-            print("🌐 Opening browser...")
-            webbrowser.open("http://localhost:8501")
-            
+        with urllib.request.urlopen(url, timeout=1):
+            return True
+    except urllib.error.HTTPError:
         return True
-    except Exception as e:
-        print(f"❌ Failed to start {description}: {e}")
+    except (urllib.error.URLError, OSError):
         return False
 
+class Stage:
+    """One supervised process with a readiness probe"""
+
+    def __init__(self, name, command, ready, depends=(), one_shot=False, timeout=120):
+        self.name = name
+        self.command = command
+        self.ready = ready          # probe(stage) -> bool, checked while the process runs
+        self.depends = list(depends)
+        self.one_shot = one_shot
+        self.timeout = timeout
+        self.process = None
+        self.log = None
+        self.launched_at = None     # wall clock, for output freshness checks
+        self.started = None         # monotonic
+        self.startup_seconds = None
+        self.restarts = 0
+        self.failed = False
+
+    @property
+    def is_ready(self):
+        return self.startup_seconds is not None
+
+    def start(self):
+        if self.one_shot:
+            stdout = None
+        else:
+            os.makedirs(LOG_DIR, exist_ok=True)
+            self.log = open(os.path.join(LOG_DIR, f"{self.name.lower().replace(' ', '_')}.log"), 'a')
+            stdout = self.log
+        print(f"🚀 Starting {self.name}...")
+        self.launched_at = time.time()
+        self.started = time.monotonic()
+        self.process = subprocess.Popen(self.command, cwd=PROJECT_DIR, stdout=stdout,
+                                        stderr=subprocess.STDOUT if stdout else None)
+
+    def poll(self):
+        """Advance the stage: detect readiness, crashes and timeouts"""
+        code = self.process.poll()
+        elapsed = time.monotonic() - self.started
+
+        if not self.is_ready:
+            if self.one_shot and code is not None:
+                if code == 0 and self.ready(self):
+                    self.mark_ready(elapsed)
+                elif code == 0:
+                    self.fail("finished without an up-to-date output")
+                else:
+                    self.fail(f"exited with status {code}")
+                return
+            if not self.one_shot and code is None and self.ready(self):
+                self.mark_ready(elapsed)
+                return
+            if elapsed > self.timeout:
+                self.process.terminate()
+                self.fail(f"not ready after {self.timeout}s")
+                return
+
+        # Long-running stages are restarted when they die
+        if not self.one_shot and code is not None:
+            if self.restarts >= MAX_RESTARTS:
+                self.fail(f"exited with status {code} after {self.restarts} restarts")
+                return
+            self.restarts += 1
+            print(f"⚠️  {self.name} exited with status {code}, restarting ({self.restarts}/{MAX_RESTARTS})")
+            self.close_log()
+            self.startup_seconds = None
+            time.sleep(min(2 ** self.restarts * 0.5, 5))
+            self.start()
+
+    def mark_ready(self, elapsed):
+        self.startup_seconds = elapsed
+        print(f"✅ {self.name} ready in {elapsed:.2f}s")
+
+    def fail(self, reason):
+        self.failed = True
+        print(f"❌ {self.name} {reason}")
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.close_log()
+
+    def close_log(self):
+        if self.log:
+            self.log.close()
+            self.log = None
+
+def build_stages(port, simulator=True):
+    """The project's stages and how each one proves it is ready"""
+    stages = [Stage('Calculations', [sys.executable, 'scripts/calculate_losses.py'],
+                    ready=lambda stage: output_current(LOSS_OUTPUTS, LOSS_INPUTS),
+                    one_shot=True)]
+    if simulator:
+        stages.append(Stage('Live Simulator', [sys.executable, 'scripts/live_simulator.py'],
+                            ready=lambda stage: output_updated([LIVE_CURRENT], stage.launched_at)))
+    stages.append(Stage('Dashboard', [sys.executable, '-m', 'streamlit', 'run', 'dashboard/power_dashboard.py',
+                                      '--server.headless', 'true', '--server.port', str(port),
+                                      '--browser.gatherUsageStats', 'false'],
+                        ready=lambda stage: http_answers(f"http://127.0.0.1:{port}/_stcore/health"),
+                        depends=['Calculations']))
+    return stages
+
+def supervise(stages, on_ready=None):
+    """Start stages as their dependencies become ready and keep them running"""
+    by_name = {stage.name: stage for stage in stages}
+    launch_started = time.monotonic()
+    all_ready_reported = False
+    announced = set()
+
+    while True:
+        for stage in stages:
+            if stage.failed:
+                continue
+            if stage.process is None:
+                if any(by_name[name].failed for name in stage.depends):
+                    stage.fail(f"not started: {', '.join(stage.depends)} failed")
+                elif all(by_name[name].is_ready for name in stage.depends):
+                    stage.start()
+                continue
+            stage.poll()
+            if stage.is_ready and stage.name not in announced:
+                announced.add(stage.name)
+                if on_ready:
+                    on_ready(stage)
+
+        if not all_ready_reported and all(stage.is_ready or stage.failed for stage in stages):
+            all_ready_reported = True
+            report(stages, time.monotonic() - launch_started)
+
+        if all(stage.failed or (stage.one_shot and stage.is_ready) for stage in stages):
+            return
+        time.sleep(POLL_SECONDS)
+
+def report(stages, total):
+    print("\n" + "=" * 60)
+    print("✅ ALL SYSTEMS STARTED!" if not any(stage.failed for stage in stages) else "⚠️  STARTUP INCOMPLETE")
+    print("=" * 60)
+    for stage in stages:
+        status = f"{stage.startup_seconds:6.2f}s" if stage.is_ready else "failed"
+        print(f"   {stage.name:<16} {status}")
+    print(f"   {'Total':<16} {total:6.2f}s")
+    print(f"\n📝 Logs: {LOG_DIR}")
+    print("⚠️  Press Ctrl+C to stop everything")
+
 def main():
+    parser = argparse.ArgumentParser(description="Start the power system project")
+    parser.add_argument('--port', type=int, default=8501, help="dashboard port")
+    parser.add_argument('--no-browser', action='store_true', help="don't open the dashboard in a browser")
+    parser.add_argument('--no-simulator', action='store_true', help="don't start the live simulator")
+    args = parser.parse_args()
+
     print("=" * 60)
     print("⚡ POWER SYSTEM PROJECT - ONE CLICK LAUNCH")
     print("=" * 60)
-    
-    # Get current directory
-    project_dir = os.getcwd()
-    
-    # Commands to run
-    commands = [
-        {
-            "cmd": f'cd "{project_dir}" && python scripts/calculate_losses.py',
-            "desc": "Calculations",
-            "wait": False
-        },
-        {
-            "cmd": f'cd "{project_dir}" && python scripts/live_simulator.py',
-            "desc": "Live Simulator", 
-            "wait": False
-        },
-        {
-            "cmd": f'cd "{project_dir}" && streamlit run dashboard/power_dashboard.py --server.headless true',
-            "desc": "Dashboard",
-            "wait": True  # This will trigger browser opening
-        }
-    ]
-    
-    # Run each command in separate terminal
-    for cmd_info in commands:
-        run_command(cmd_info["cmd"], cmd_info["desc"], cmd_info["wait"])
-        time.sleep(1)  # Small delay between commands
-    
-    print("\n" + "=" * 60)
-    print("✅ ALL SYSTEMS STARTED!")
-    print("=" * 60)
-    print("\n📊 Dashboard: http://localhost:8501")
-    print("🔄 Simulator: Updating every 5 seconds")
-    print("📈 Calculations: Completed")
-    print("\n⚠️  Press Enter to stop (close other windows manually)...")
-    
-    # Keep script running so VS Code shows "running"
-    input()
+
+    url = f"http://localhost:{args.port}"
+
+    def on_ready(stage):
+        if stage.name == 'Dashboard':
+            print(f"📊 Dashboard: {url}")
+            if not args.no_browser:
+                import webbrowser
+                print("🌐 Opening browser...")
+                webbrowser.open(url)
+
+    stages = build_stages(args.port, simulator=not args.no_simulator)
+    try:
+        supervise(stages, on_ready)
+    except KeyboardInterrupt:
+        print("\n\n⏹️ Stopping all stages...")
+    finally:
+        for stage in reversed(stages):
+            stage.stop()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,198 @@
+"""
+ANNUAL ENERGY LOSSES
+8760-hour loss energy and cost from hourly load profiles and time-of-use tariffs
+
+Load profiles are hourly multipliers of each line's load_kw (1.0 = the load in
+power_system.csv). The profile table has an optional 'hour' column and one
+column per profile; a line uses the column named after its line_id, else the
+one named after its area_name, else 'default'. The tariff table has a
+rate_per_kwh column with either 24 rows (hour of day) or one row per hour.
+
+With power factor fixed, line losses scale with the square of the multiplier
+and transformer losses linearly, so every line's annual energy and cost follow
+from four hourly sums of its profile. Those sums are one (hours x profiles)
+matrix product, done a block of profile columns at a time in float32 storage
+so 8760 x 10^5 per-line profiles (best kept as a column directory) fit in memory.
+
+    python scripts/annual_energy.py data/power_system.csv data/load_profiles.csv data/tariff.csv
+"""
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+from scripts.calculate_losses import ID_DTYPES, loss_arrays
+from scripts.columnar_store import read_schema, read_table, resolve_table, write_table
+
+# Flat rate used by simple_analytics when no tariff is given ($ per kWh)
+DEFAULT_RATE = 0.10
+
+# Upper bound on profile values (hours x columns) converted per block
+MAX_BLOCK_VALUES = 20_000_000
+
+ANNUAL_COLUMNS = ['line_id', 'area_name', 'profile', 'annual_load_kwh', 'line_loss_kwh',
+                  'transformer_loss_kwh', 'annual_loss_kwh', 'peak_loss_kw',
+                  'loss_factor', 'annual_loss_cost']
+
+def table_columns(path):
+    """Column names of a CSV file or column directory without loading it"""
+    kind, resolved = resolve_table(path)
+    if kind == 'columnar':
+        return [column['name'] for column in read_schema(resolved)['columns']]
+    return list(pd.read_csv(resolved, nrows=0).columns)
+
+def hourly_rates(tariff_df, hours):
+    """Rate for every hour of the year from a 24-row or full-year tariff table"""
+    if tariff_df is None:
+        return np.full(hours, DEFAULT_RATE)
+
+    rates = tariff_df['rate_per_kwh'].to_numpy(dtype=float)
+    if len(rates) == 24:
+        return np.resize(rates, hours)
+    if len(rates) != hours:
+        raise ValueError(f"Tariff has {len(rates)} rows; expected 24 or {hours}")
+    return rates
+
+def profile_statistics(profile_file, rates, columns=None, max_block_values=MAX_BLOCK_VALUES):
+    """Hourly sums of every profile column, weighted for energy and cost
+
+    Returns a DataFrame indexed by profile name with sum_m, sum_m2 (kWh
+    multipliers for linear and quadratic losses), cost_m, cost_m2 (the same
+    weighted by the hourly rate) and peak_m.
+    """
+    columns = columns or [name for name in table_columns(profile_file) if name != 'hour']
+    hours = len(rates)
+    block = max(1, max_block_values // hours)
+    weights = np.vstack([np.ones(hours), rates])
+
+    parts = []
+    for start in range(0, len(columns), block):
+        names = columns[start:start + block]
+        multipliers = read_table(profile_file, columns=names, dtype=np.float32)[names].to_numpy(dtype=np.float32)
+        multipliers = np.require(multipliers, requirements='W')  # squared in place below
+        if len(multipliers) != hours:
+            raise ValueError(f"Profile table has {len(multipliers)} hours; tariff expects {hours}")
+
+        linear = weights @ multipliers
+        np.square(multipliers, out=multipliers)
+        quadratic = weights @ multipliers
+        parts.append(pd.DataFrame({
+            'sum_m': linear[0], 'sum_m2': quadratic[0],
+            'cost_m': linear[1], 'cost_m2': quadratic[1],
+            'peak_m': np.sqrt(multipliers.max(axis=0))
+        }, index=names))
+
+    return pd.concat(parts) if parts else pd.DataFrame(columns=['sum_m', 'sum_m2', 'cost_m', 'cost_m2', 'peak_m'])
+
+def assign_profiles(system_df, profile_names):
+    """Profile column of every line: its line_id, else its area_name, else 'default'"""
+    available = pd.Index(profile_names)
+    line_ids = system_df['line_id'].astype(str)
+    areas = system_df['area_name'].astype(str)
+    assigned = pd.Series('default' if 'default' in available else None,
+                         index=system_df.index, dtype=object)
+    assigned[areas.isin(available)] = areas[areas.isin(available)]
+    assigned[line_ids.isin(available)] = line_ids[line_ids.isin(available)]
+
+    missing = assigned.isna()
+    if missing.any():
+        sample = ', '.join(line_ids[missing].head(5))
+        raise ValueError(f"No load profile for lines {sample} (and no 'default' column)")
+    return assigned
+
+def annual_losses(system_df, profile_file, tariff_df=None):
+    """Annual loss energy, loss factor and cost of every line
+
+    loss_factor is the annual loss energy over peak losses x hours.
+    """
+    system_df = system_df.reset_index(drop=True)
+    profile_names = [name for name in table_columns(profile_file) if name != 'hour']
+    if not profile_names:
+        raise ValueError(f"No profile columns in {profile_file}")
+    assigned = assign_profiles(system_df, profile_names)
+
+    hours = len(read_table(profile_file, columns=[profile_names[0]]))
+    rates = hourly_rates(tariff_df, hours)
+    stats = profile_statistics(profile_file, rates, columns=list(pd.unique(assigned)))
+    line_stats = stats.loc[assigned.to_numpy()]
+
+    # Losses at the base load; hourly losses scale with m^2 (line) and m (transformer)
+    base = loss_arrays(system_df['load_kw'], system_df['power_factor'], system_df['resistance_ohm_km'],
+                       system_df['reactance_ohm_km'], system_df['line_length_km'],
+                       system_df['transformer_efficiency'])
+    line_base = base['line_losses_kw']
+    transformer_base = base['transformer_losses_kw']
+    sum_m, sum_m2 = line_stats['sum_m'].to_numpy(), line_stats['sum_m2'].to_numpy()
+    cost_m, cost_m2 = line_stats['cost_m'].to_numpy(), line_stats['cost_m2'].to_numpy()
+    peak_m = line_stats['peak_m'].to_numpy()
+
+    line_loss_kwh = line_base * sum_m2
+    transformer_loss_kwh = transformer_base * sum_m
+    annual_loss_kwh = line_loss_kwh + transformer_loss_kwh
+    peak_loss_kw = line_base * peak_m ** 2 + transformer_base * peak_m
+    with np.errstate(divide='ignore', invalid='ignore'):
+        loss_factor = annual_loss_kwh / (peak_loss_kw * hours)
+
+    results = pd.DataFrame({
+        'line_id': system_df['line_id'].to_numpy(),
+        'area_name': system_df['area_name'].to_numpy(),
+        'profile': assigned.to_numpy(),
+        'annual_load_kwh': np.round(system_df['load_kw'].to_numpy(dtype=float) * sum_m, 1),
+        'line_loss_kwh': np.round(line_loss_kwh, 1),
+        'transformer_loss_kwh': np.round(transformer_loss_kwh, 1),
+        'annual_loss_kwh': np.round(annual_loss_kwh, 1),
+        'peak_loss_kw': np.round(peak_loss_kw, 2),
+        'loss_factor': np.round(loss_factor, 4),
+        'annual_loss_cost': np.round(line_base * cost_m2 + transformer_base * cost_m, 2)
+    }, columns=ANNUAL_COLUMNS)
+    results.attrs['hours'] = hours
+    return results
+
+def annual_totals(results):
+    """System totals of annual_losses()"""
+    return {
+        'hours': int(results.attrs['hours']),
+        'annual_load_kwh': float(results['annual_load_kwh'].sum()),
+        'annual_loss_kwh': float(results['annual_loss_kwh'].sum()),
+        'annual_loss_cost': float(results['annual_loss_cost'].sum()),
+        'average_loss_factor': float(results['loss_factor'].mean())
+    }
+
+def print_annual_summary(results):
+    """Print system totals of annual_losses() (its table or annual_totals())"""
+    totals = annual_totals(results) if isinstance(results, pd.DataFrame) else results
+    total_loss = totals['annual_loss_kwh']
+    total_load = totals['annual_load_kwh']
+
+    print(f"Annual Energy Delivered: {total_load:,.0f} kWh")
+    print(f"Annual Energy Losses: {total_loss:,.0f} kWh ({total_loss / total_load * 100:.2f}%)")
+    print(f"Average Loss Factor: {totals['average_loss_factor']:.3f}")
+    print(f"💰 Annual Cost of Losses: ${totals['annual_loss_cost']:,.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Annual energy loss and cost engine")
+    parser.add_argument('input_file', nargs='?', default='data/power_system.csv')
+    parser.add_argument('profile_file', nargs='?', default='data/load_profiles.csv')
+    parser.add_argument('tariff_file', nargs='?', default='data/tariff.csv')
+    parser.add_argument('--output', default='data/annual_losses.csv')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("📅 ANNUAL ENERGY LOSSES")
+    print("=" * 60)
+
+    try:
+        system_df = read_table(args.input_file, dtype=ID_DTYPES)
+        tariff_df = read_table(args.tariff_file)
+        results = annual_losses(system_df, args.profile_file, tariff_df)
+        write_table(results, args.output)
+
+        print(f"📖 {len(results):,} lines × {results.attrs['hours']:,} hours")
+        print_annual_summary(results)
+        print(f"💾 Results saved to: {args.output}")
+    except FileNotFoundError as e:
+        print(f"❌ Error: Could not find {e.filename}")
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
@@ -0,0 +1,276 @@
+"""
+STREAMING ANOMALY DETECTOR
+Flags threshold breaches and statistical outliers in live loss data as they happen
+
+Every line keeps, per monitored metric, a rolling window of its last WINDOW
+readings (running sum and sum of squares, so mean and variance update in
+constant time) and an exponentially weighted mean and variance. All state
+lives in preallocated NumPy arrays indexed by line position, and an update
+touches only the lines that reported, so a tick costs O(changed lines).
+
+Alert kinds, checked for every new reading:
+
+    threshold   value above the fixed limit simple_analytics uses
+    spike       value more than SPIKE_SIGMAS EWMA standard deviations from the EWMA mean
+    drift       EWMA mean more than DRIFT_SIGMAS rolling standard deviations from the
+                window mean (a sustained shift rather than a single outlier)
+
+An alert is raised when its condition starts and not again while it holds
+(and at most once per COOLDOWN seconds per line and kind), so a line that
+stays above a limit is reported once. Raised alerts are appended to the
+alert log (data/live/alerts.csv), which the dashboard shows.
+
+    detector = AnomalyDetector(system_df['line_id'])
+    alerts = detector.observe(time.time(), changed, model.results)
+
+    python scripts/anomaly_detector.py --lines 100000 --ticks 50
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+from scripts.live_snapshots import LIVE_DIR
+
+ALERT_FILE = 'alerts.csv'
+ALERT_LOG = os.path.join(LIVE_DIR, ALERT_FILE)
+MAX_ALERT_LOG_BYTES = 16 * 1024 * 1024   # rotated to alerts.csv.1 beyond this
+
+ALERT_COLUMNS = ['timestamp', 'line_id', 'kind', 'metric', 'value', 'expected', 'limit']
+ALERT_KINDS = ['threshold', 'spike', 'drift']
+
+# Monitored metrics and their fixed limits (same thresholds simple_analytics uses)
+LIMITS = {'loss_percentage': 3.5, 'voltage_drop_v': 150.0}
+
+WINDOW = 30            # readings in the rolling window
+ALPHA = 0.1            # EWMA weight of the newest reading
+SPIKE_SIGMAS = 5.0
+DRIFT_SIGMAS = 3.0
+COOLDOWN = 60.0        # seconds before the same line and kind can alert again
+
+# Running window sums are recomputed from the window this often to stop float drift
+RESYNC_EVERY = 1_000
+
+class AnomalyDetector:
+    """Per-line rolling and EWMA statistics with de-duplicated alerts"""
+
+    def __init__(self, line_ids, limits=None, window=WINDOW, alpha=ALPHA,
+                 spike_sigmas=SPIKE_SIGMAS, drift_sigmas=DRIFT_SIGMAS, cooldown=COOLDOWN,
+                 alert_log=ALERT_LOG):
+        self.line_ids = np.asarray(line_ids, dtype=object)
+        self.limits = dict(LIMITS if limits is None else limits)
+        self.metrics = list(self.limits)
+        self.window = window
+        self.alpha = alpha
+        self.spike_sigmas = spike_sigmas
+        self.drift_sigmas = drift_sigmas
+        self.cooldown = cooldown
+        self.alert_log = alert_log
+        self.updates = 0
+        self.alerts_raised = 0
+
+        shape = (len(self.metrics), len(self.line_ids))
+        self.limit_values = np.array([self.limits[name] for name in self.metrics])[:, None]
+        # Rolling window: ring buffer plus sums of the values minus each line's first reading
+        self.ring = np.zeros(shape + (window,), dtype=np.float32)
+        self.position = np.zeros(len(self.line_ids), dtype=np.int32)
+        self.count = np.zeros(len(self.line_ids), dtype=np.int32)
+        self.shift = np.zeros(shape)
+        self.window_sum = np.zeros(shape)
+        self.window_sumsq = np.zeros(shape)
+        # EWMA state
+        self.ewma_mean = np.zeros(shape)
+        self.ewma_var = np.zeros(shape)
+        # De-duplication: conditions currently raised and the last alert time per kind
+        self.active = np.zeros((len(ALERT_KINDS),) + shape, dtype=bool)
+        self.last_alert = np.full((len(ALERT_KINDS),) + shape, -np.inf)
+
+    def __len__(self):
+        return len(self.line_ids)
+
+    def window_stats(self, rows=slice(None)):
+        """Rolling (mean, standard deviation) of the given lines, (metrics x rows) each"""
+        n = self.count[rows].clip(max=self.window)
+        total = self.window_sum[:, rows]
+        offset = total / np.maximum(n, 1)
+        variance = self.window_sumsq[:, rows] - total * offset
+        variance /= np.maximum(n - 1, 1)
+        variance[:, n < 2] = 0.0
+        return self.shift[:, rows] + offset, np.sqrt(np.maximum(variance, 0.0, out=variance), out=variance)
+
+    def observe(self, timestamp, rows, results):
+        """Add one reading for each of the given line positions and return the new alerts
+
+        results maps every monitored metric to a full-length array (e.g.
+        IncrementalLossModel.results); only positions in rows are read.
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        if not len(rows):
+            return pd.DataFrame(columns=ALERT_COLUMNS)
+        # A tick of every line in order works on views instead of gathered copies
+        index = slice(None) if len(rows) == len(self) and (rows == np.arange(len(self))).all() else rows
+        values = np.vstack([np.asarray(results[name], dtype=float)[index] for name in self.metrics])
+        count = self.count[index]
+        first = count == 0
+
+        # Statistics before this reading
+        window_mean, window_std = self.window_stats(index)
+        ewma_mean = np.where(first, values, self.ewma_mean[:, index])
+        ewma_std = np.sqrt(self.ewma_var[:, index])
+
+        # Rolling window: replace the oldest reading once the window is full
+        position = self.position[index]
+        shift = np.where(first, values, self.shift[:, index])
+        removed = self.ring[:, rows, position] - shift
+        removed[:, count < self.window] = 0.0
+        added = values - shift
+        self.shift[:, index] = shift
+        self.window_sum[:, index] += added - removed
+        removed *= removed
+        removed -= added * added
+        self.window_sumsq[:, index] -= removed
+        self.ring[:, rows, position] = values
+        self.position[index] = (position + 1) % self.window
+        self.count[index] = count + 1
+
+        # EWMA (West's incremental form)
+        deviation = values - ewma_mean
+        new_mean = ewma_mean + self.alpha * deviation
+        self.ewma_mean[:, index] = new_mean
+        variance = self.ewma_var[:, index] + self.alpha * deviation ** 2
+        variance *= 1 - self.alpha
+        self.ewma_var[:, index] = variance
+
+        # Outlier tests need a full window of history
+        warm = count >= self.window
+        conditions = [
+            values > self.limit_values,
+            warm & (ewma_std > 0) & (np.abs(deviation) > self.spike_sigmas * ewma_std),
+            warm & (window_std > 0) & (np.abs(new_mean - window_mean) > self.drift_sigmas * window_std)
+        ]
+        limit = np.broadcast_to(self.limit_values, values.shape)
+        expected = [limit, ewma_mean, window_mean]
+        limits = [limit, self.spike_sigmas * ewma_std,
+                  self.drift_sigmas * window_std]
+
+        self.updates += 1
+        if self.updates % RESYNC_EVERY == 0:
+            self.resync()
+        return self._raise(timestamp, rows, index, values, conditions, expected, limits)
+
+    def _raise(self, timestamp, rows, index, values, conditions, expected, limits):
+        """New (not already active, not cooling down) alerts, appended to the alert log"""
+        parts = []
+        for k, kind in enumerate(ALERT_KINDS):
+            condition = conditions[k]
+            active = self.active[k][:, index]
+            new = condition & ~active
+            if new.any():
+                new &= timestamp - self.last_alert[k][:, index] >= self.cooldown
+            # Suppressed conditions stay inactive so they alert once the cooldown ends
+            active |= new
+            active &= condition
+            self.active[k][:, index] = active
+            if not new.any():
+                continue
+            self.last_alert[k][:, index] = np.where(new, timestamp, self.last_alert[k][:, index])
+
+            metric_index, row_index = np.nonzero(new)
+            parts.append(pd.DataFrame({
+                'timestamp': timestamp,
+                'line_id': self.line_ids[rows[row_index]],
+                'kind': kind,
+                'metric': np.asarray(self.metrics, dtype=object)[metric_index],
+                'value': values[metric_index, row_index].round(3),
+                'expected': expected[k][metric_index, row_index].round(3),
+                'limit': limits[k][metric_index, row_index].round(3)
+            }, columns=ALERT_COLUMNS))
+
+        if not parts:
+            return pd.DataFrame(columns=ALERT_COLUMNS)
+        alerts = pd.concat(parts, ignore_index=True)
+        self.alerts_raised += len(alerts)
+        if self.alert_log:
+            append_alerts(alerts, self.alert_log)
+        return alerts
+
+    def resync(self):
+        """Recompute the running window sums from the ring buffers"""
+        filled = np.minimum(self.count, self.window)
+        used = np.arange(self.window) < filled[:, None]
+        deviations = np.where(used, self.ring - self.shift[:, :, None], 0.0)
+        self.window_sum = deviations.sum(axis=2)
+        self.window_sumsq = (deviations * deviations).sum(axis=2)
+
+    def active_counts(self):
+        """Number of lines with a currently raised alert, by kind"""
+        return {kind: int(self.active[k].any(axis=0).sum()) for k, kind in enumerate(ALERT_KINDS)}
+
+def append_alerts(alerts, alert_log=ALERT_LOG):
+    """Append alerts to the log, rotating it once it grows past MAX_ALERT_LOG_BYTES"""
+    os.makedirs(os.path.dirname(alert_log) or '.', exist_ok=True)
+    if os.path.exists(alert_log) and os.path.getsize(alert_log) > MAX_ALERT_LOG_BYTES:
+        os.replace(alert_log, alert_log + '.1')
+    alerts.to_csv(alert_log, mode='a', index=False, header=not os.path.exists(alert_log),
+                  float_format='%.3f')
+
+def read_alerts(alert_log=ALERT_LOG, limit=500):
+    """The newest alerts of the log (at most limit), newest first
+
+    Only the end of the file is read, so this stays cheap however long the log is.
+    """
+    try:
+        with open(alert_log, 'rb') as f:
+            header = f.readline()
+            size = os.path.getsize(alert_log)
+            f.seek(max(len(header), size - 200 * limit))
+            tail = f.read()
+    except FileNotFoundError:
+        return pd.DataFrame(columns=ALERT_COLUMNS)
+
+    if size - 200 * limit > len(header):
+        tail = tail[tail.find(b'\n') + 1:]   # drop the partial first line
+    alerts = pd.read_csv(io.BytesIO(header + tail), dtype={'line_id': str})
+    alerts = alerts.tail(limit).iloc[::-1].reset_index(drop=True)
+    alerts['timestamp'] = pd.to_datetime((alerts['timestamp'] * 1000).round().astype('int64'), unit='ms')
+    return alerts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Streaming anomaly detector benchmark")
+    parser.add_argument('--lines', type=int, default=100_000)
+    parser.add_argument('--ticks', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🚨 STREAMING ANOMALY DETECTOR")
+    print("=" * 60)
+
+    # Random walk around typical values, with an occasional injected spike
+    rng = np.random.default_rng(args.seed)
+    line_ids = [f"LINE_{i:06d}" for i in range(args.lines)]
+    detector = AnomalyDetector(line_ids, alert_log=None)
+    results = {'loss_percentage': rng.uniform(1.0, 3.0, args.lines),
+               'voltage_drop_v': rng.uniform(40.0, 120.0, args.lines)}
+    rows = np.arange(args.lines)
+
+    seconds = []
+    for tick in range(args.ticks):
+        for name in results:
+            results[name] *= 1 + rng.normal(0, 0.01, args.lines)
+        spikes = rng.integers(0, args.lines, max(1, args.lines // 10_000))
+        results['loss_percentage'][spikes] *= 1.5
+        started = time.perf_counter()
+        detector.observe(tick, rows, results)
+        seconds.append(time.perf_counter() - started)
+        results['loss_percentage'][spikes] /= 1.5
+
+    print(f"Lines: {args.lines:,} | Ticks: {args.ticks}")
+    print(f"Update time per tick: median {np.median(seconds) * 1000:.1f} ms | "
+          f"max {max(seconds) * 1000:.1f} ms")
+    print(f"Alerts raised: {detector.alerts_raised:,} | Active now: {detector.active_counts()}")
@@ -1,10 +1,38 @@
 import pandas as pd
+import numpy as np
 import math
+import argparse
+import io
+import os
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append('.')
+from scripts import metrics
+from scripts.columnar_store import (iter_table_chunks, read_columnar, read_schema, read_table,
+                                    resolve_table, write_table)
+from scripts.result_cache import RESULT_CACHE_DIR, ResultCache
+
+SYSTEM_VOLTAGE = 11  # kV
+
+RESULT_COLUMNS = ['line_id', 'area_name', 'current_amps', 'line_losses_kw',
+                  'transformer_losses_kw', 'total_losses_kw', 'loss_percentage',
+                  'voltage_drop_v', 'efficiency']
+
+# Identifiers are always read as text so every reading path (whole file,
+# chunks, byte ranges) infers the same dtypes and writes identical output
+ID_DTYPES = {'line_id': str, 'area_name': str}
+
+# Upper bound on the CSV bytes a parallel worker parses at once
+PARALLEL_RANGE_BYTES = 64 * 1024 * 1024
+
+# Compute precisions (--precision); results are rounded to 2 decimals on export either way
+PRECISIONS = {'float64': np.float64, 'float32': np.float32}
 
 def calculate_losses_for_line(line):
     """Calculate losses for a single transmission line"""
-    SYSTEM_VOLTAGE = 11  # kV
-    
     # 1. Calculate current (I = P / (√3 * V * pf))
     current_amps = (line['load_kw'] * 1000) / (math.sqrt(3) * SYSTEM_VOLTAGE * 1000 * line['power_factor'])
     
@@ -40,28 +68,394 @@ def calculate_losses_for_line(line):
         'efficiency': round(100 - loss_percentage, 2)
     }
 
+def loss_arrays(load_kw, power_factor, resistance_ohm_km, reactance_ohm_km,
+                line_length_km, transformer_efficiency, dtype=np.float64):
+    """Column-wise version of calculate_losses_for_line (unrounded NumPy arrays)
+
+    Inputs may be any broadcastable shapes (e.g. scenarios x lines against
+    per-line constants). Results are computed in place in dtype: one array
+    per result, with the efficiency array doubling as scratch space and the
+    total losses array holding the total resistance until it is needed, so
+    nothing else of the full shape is allocated (inputs not already in dtype
+    are converted first). In float64 the operations are kept in the same
+    order as the scalar formulas so both paths produce bit-identical floats
+    before rounding; float32 halves memory at a relative error of about 1e-6
+    (see accuracy_report).
+    """
+    dtype = np.dtype(dtype)
+    load_kw = np.asarray(load_kw, dtype=dtype)
+    power_factor = np.asarray(power_factor, dtype=dtype)
+    line_length_km = np.asarray(line_length_km, dtype=dtype)
+    transformer_efficiency = np.asarray(transformer_efficiency, dtype=dtype)
+    shape = np.broadcast_shapes(load_kw.shape, power_factor.shape, line_length_km.shape,
+                                np.shape(resistance_ohm_km), np.shape(reactance_ohm_km),
+                                transformer_efficiency.shape)
+    scratch = np.empty(shape, dtype=dtype)
+    total_losses_kw = np.empty(shape, dtype=dtype)
+    
+    current_amps = np.multiply(power_factor, math.sqrt(3) * SYSTEM_VOLTAGE * 1000,
+                               out=np.empty(shape, dtype=dtype))
+    np.divide(np.multiply(load_kw, 1000, out=scratch), current_amps, out=current_amps)
+    total_resistance = np.multiply(np.asarray(resistance_ohm_km, dtype=dtype), line_length_km,
+                                   out=total_losses_kw)
+    
+    line_losses_kw = np.square(current_amps, out=np.empty(shape, dtype=dtype))
+    line_losses_kw *= 3
+    line_losses_kw *= total_resistance
+    line_losses_kw /= 1000
+    
+    voltage_drop_v = np.square(power_factor, out=np.empty(shape, dtype=dtype))
+    np.subtract(1, voltage_drop_v, out=voltage_drop_v)
+    np.sqrt(voltage_drop_v, out=voltage_drop_v)
+    voltage_drop_v *= np.multiply(np.asarray(reactance_ohm_km, dtype=dtype), line_length_km, out=scratch)
+    voltage_drop_v += np.multiply(total_resistance, power_factor, out=scratch)
+    voltage_drop_v *= current_amps
+    
+    # The total resistance is no longer needed: its array takes the total losses
+    transformer_losses_kw = np.subtract(1, transformer_efficiency, out=np.empty(shape, dtype=dtype))
+    transformer_losses_kw *= load_kw
+    np.add(line_losses_kw, transformer_losses_kw, out=total_losses_kw)
+    loss_percentage = np.divide(total_losses_kw, load_kw, out=np.empty(shape, dtype=dtype))
+    loss_percentage *= 100
+    
+    return {
+        'current_amps': current_amps,
+        'line_losses_kw': line_losses_kw,
+        'transformer_losses_kw': transformer_losses_kw,
+        'total_losses_kw': total_losses_kw,
+        'loss_percentage': loss_percentage,
+        'voltage_drop_v': voltage_drop_v,
+        'efficiency': np.subtract(100, loss_percentage, out=scratch)
+    }
+
+def round_like_python(values, digits=2):
+    """Vectorized round() that matches Python's built-in round() exactly
+
+    np.round scales by 10**digits first, which can land on the wrong side of a
+    tie; the few values that sit next to a tie are re-rounded with round().
+    """
+    values = np.asarray(values, dtype=float)
+    rounded = np.round(values, digits)
+    scaled = values * 10 ** digits
+    distance_to_tie = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5)
+    near_tie = np.flatnonzero(distance_to_tie < 1e-6 * np.maximum(1.0, np.abs(scaled)))
+    for i in near_tie:
+        rounded.flat[i] = round(float(values.flat[i]), digits)
+    return rounded
+
+def calculate_losses_vectorized(df, dtype=np.float64, decimals=2):
+    """Calculate losses for every line of a DataFrame in one column-wise pass
+
+    Gives the same numbers as calling calculate_losses_for_line per row. The
+    values are computed in dtype and only rounded here, for export;
+    decimals=None keeps them unrounded (in dtype) for further calculation.
+    """
+    losses = loss_arrays(df['load_kw'], df['power_factor'], df['resistance_ohm_km'],
+                         df['reactance_ohm_km'], df['line_length_km'],
+                         df['transformer_efficiency'], dtype=dtype)
+    
+    results_df = pd.DataFrame({
+        'line_id': df['line_id'].to_numpy(),
+        'area_name': df['area_name'].to_numpy()
+    })
+    for column in RESULT_COLUMNS[2:]:
+        results_df[column] = (losses[column] if decimals is None
+                              else round_like_python(losses[column], decimals))
+    return results_df
+
+def accuracy_report(df, dtype=np.float32, decimals=2):
+    """Error of computing in dtype instead of the float64 reference, per result column
+
+    Returns a DataFrame with the largest absolute and relative error of the
+    unrounded values and how many values change after rounding to decimals
+    (by one unit in the last place at most, for values next to a rounding
+    tie).
+    """
+    inputs = [df[column] for column in ('load_kw', 'power_factor', 'resistance_ohm_km',
+                                        'reactance_ohm_km', 'line_length_km',
+                                        'transformer_efficiency')]
+    reference = loss_arrays(*inputs)
+    approximate = loss_arrays(*inputs, dtype=dtype)
+    
+    report = {}
+    for column in RESULT_COLUMNS[2:]:
+        error = np.abs(approximate[column] - reference[column])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            relative = np.where(reference[column] != 0, error / np.abs(reference[column]), 0.0)
+        changed = round_like_python(approximate[column], decimals) != round_like_python(reference[column], decimals)
+        report[column] = {
+            'max_abs_error': float(error.max(initial=0.0)),
+            'max_rel_error': float(relative.max(initial=0.0)),
+            'rounded_changed': int(changed.sum()),
+            'rounded_changed_pct': float(changed.mean() * 100) if len(changed) else 0.0
+        }
+    return pd.DataFrame.from_dict(report, orient='index')
+
+def print_accuracy_report(report, dtype=np.float32, decimals=2):
+    """Print accuracy_report() as a table"""
+    print(f"\n🎯 ACCURACY OF {np.dtype(dtype).name.upper()} VS FLOAT64:")
+    print("-" * 60)
+    print(f"{'Column':<24}{'Max abs err':>12}{'Max rel err':>12}{f'Changed @ {decimals} dp':>16}")
+    for column, row in report.iterrows():
+        print(f"{column:<24}{row['max_abs_error']:>12.2e}{row['max_rel_error']:>12.2e}"
+              f"{int(row['rounded_changed']):>9,} ({row['rounded_changed_pct']:.2f}%)")
+
+def loss_cache_key(cache, input_file, kind='losses', dtype=np.float64):
+    """Result cache key of the loss table ('losses') or its totals ('loss_summary') for an input"""
+    params = {'precision': np.dtype(dtype).name} if np.dtype(dtype) != np.float64 else {}
+    return cache.key(kind, files=[input_file], system_voltage_kv=SYSTEM_VOLTAGE, columns=RESULT_COLUMNS,
+                     **params)
+
 def calculate_and_save(input_file='data/power_system.csv', 
-                      output_file='data/loss_calculations.csv'):
-    """Calculate losses from input file and save to output file"""
+                      output_file='data/loss_calculations.csv',
+                      cache_dir=RESULT_CACHE_DIR, dtype=np.float64):
+    """Calculate losses from input file and save to output file
+    
+    With a cache_dir, results of an input whose contents (and SYSTEM_VOLTAGE)
+    were seen before come from the result cache, and an output file that
+    already holds them is not rewritten. cache_dir=None always recalculates.
+    dtype is the compute precision (see loss_arrays).
+    """
     try:
-        df = pd.read_csv(input_file)
-        print(f"📖 Reading data from: {input_file}")
-        print(f"   Found {len(df)} transmission lines")
+        cache = ResultCache(cache_dir) if cache_dir else None
+        results_df = None
+        if cache:
+            with metrics.timed('calculate_losses', 'cache_lookup'):
+                key = loss_cache_key(cache, input_file, dtype=dtype)
+                results_df = cache.get(key)
         
-        # Calculate for each line
-        results = []
-        for index, line in df.iterrows():
-            result = calculate_losses_for_line(line)
-            results.append(result)
+        if results_df is not None:
+            print(f"📖 Results for {input_file} found in cache")
+            print(f"   Found {len(results_df)} transmission lines")
+        else:
+            with metrics.timed('calculate_losses', 'read_input'):
+                df = read_table(input_file, dtype=ID_DTYPES)
+            metrics.count_rows('calculate_losses', 'read_input', len(df))
+            metrics.count_bytes('calculate_losses', 'read', input_file)
+            print(f"📖 Reading data from: {input_file}")
+            print(f"   Found {len(df)} transmission lines")
+            
+            # Calculate all lines in one vectorized pass
+            with metrics.timed('calculate_losses', 'calculate', rows=len(df)):
+                results_df = calculate_losses_vectorized(df, dtype)
+                results_df.attrs['summary'] = update_summary(new_summary(), df, results_df)
         
-        # Create results DataFrame
-        results_df = pd.DataFrame(results)
+        # Save to file (CSV or column directory, by output name)
+        written = results_df.attrs.setdefault('outputs', {})
+        if cache and written.get(output_file) == output_digest(cache, output_file):
+            print(f"💾 Results already in: {output_file}")
+        else:
+            with metrics.timed('calculate_losses', 'write_output', rows=len(results_df)):
+                write_table(results_df, output_file)
+            metrics.count_bytes('calculate_losses', 'written', output_file)
+            print(f"💾 Results saved to: {output_file}")
+            
+            # Remember what was written so an unchanged output is not rewritten next time
+            if cache:
+                written[output_file] = output_digest(cache, output_file)
+                cache.put(key, results_df)
+                cache.put(loss_cache_key(cache, input_file, 'loss_summary', dtype), results_df.attrs['summary'])
+        metrics.publish('calculate_losses')
         
-        # Save to file
-        results_df.to_csv(output_file, index=False)
+        return results_df
+        
+    except FileNotFoundError:
+        print(f"❌ Error: Could not find {input_file}")
+        return None
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+        return None
+
+def output_digest(cache, output_file):
+    """Content digest of an output file or column directory (None if missing)"""
+    try:
+        return cache.file_digest(output_file, resolve=False)
+    except FileNotFoundError:
+        return None
+
+def new_summary():
+    """Empty running totals for print_summary"""
+    return {
+        'lines': 0,
+        'total_load_kw': 0.0,
+        'total_losses_kw': 0.0,
+        'worst_line_id': None,
+        'worst_loss_percentage': -math.inf,
+        'best_line_id': None,
+        'best_efficiency': -math.inf
+    }
+
+def update_summary(summary, system_df, results_df):
+    """Add one block of input rows and their results to the running totals"""
+    if len(results_df) == 0:
+        return summary
+    
+    summary['lines'] += len(results_df)
+    summary['total_load_kw'] += float(system_df['load_kw'].sum())
+    summary['total_losses_kw'] += float(results_df['total_losses_kw'].sum())
+    
+    # Strict comparison keeps the first line on ties, like idxmax()
+    worst = results_df['loss_percentage'].idxmax()
+    if results_df.at[worst, 'loss_percentage'] > summary['worst_loss_percentage']:
+        summary['worst_line_id'] = results_df.at[worst, 'line_id']
+        summary['worst_loss_percentage'] = float(results_df.at[worst, 'loss_percentage'])
+    
+    best = results_df['efficiency'].idxmax()
+    if results_df.at[best, 'efficiency'] > summary['best_efficiency']:
+        summary['best_line_id'] = results_df.at[best, 'line_id']
+        summary['best_efficiency'] = float(results_df.at[best, 'efficiency'])
+    
+    return summary
+
+def merge_summaries(first, second):
+    """Combine the totals of two consecutive blocks (first comes earlier in the file)"""
+    merged = dict(first)
+    merged['lines'] += second['lines']
+    merged['total_load_kw'] += second['total_load_kw']
+    merged['total_losses_kw'] += second['total_losses_kw']
+    if second['worst_loss_percentage'] > first['worst_loss_percentage']:
+        merged['worst_line_id'] = second['worst_line_id']
+        merged['worst_loss_percentage'] = second['worst_loss_percentage']
+    if second['best_efficiency'] > first['best_efficiency']:
+        merged['best_line_id'] = second['best_line_id']
+        merged['best_efficiency'] = second['best_efficiency']
+    return merged
+
+def stream_calculate_and_save(input_file='data/power_system.csv',
+                              output_file='data/loss_calculations.csv',
+                              chunksize=100_000, dtype=np.float64):
+    """Calculate losses chunk by chunk, appending to the output file as it goes
+
+    Memory stays bounded by chunksize regardless of the input size. The input
+    may be CSV or a column directory; the output is always CSV. Returns the
+    summary totals accumulated during the pass (see print_summary).
+    """
+    try:
+        if not output_file.endswith('.csv'):
+            raise ValueError("streaming mode writes CSV output only")
+        
+        print(f"📖 Streaming data from: {input_file} ({chunksize:,} lines per chunk)")
+        summary = new_summary()
+        header = True
+        
+        for chunk in iter_table_chunks(input_file, chunksize, dtype=ID_DTYPES):
+            results_df = calculate_losses_vectorized(chunk, dtype)
+            results_df.to_csv(output_file, mode='w' if header else 'a',
+                              header=header, index=False)
+            update_summary(summary, chunk, results_df)
+            header = False
+        
+        if header:
+            # Empty input: still leave a valid (header-only) output file
+            pd.DataFrame(columns=RESULT_COLUMNS).to_csv(output_file, index=False)
+        
+        print(f"   Processed {summary['lines']:,} transmission lines")
         print(f"💾 Results saved to: {output_file}")
         
-        return results_df
+        return summary
+        
+    except FileNotFoundError:
+        print(f"❌ Error: Could not find {input_file}")
+        return None
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+        return None
+
+def csv_byte_ranges(input_file, parts):
+    """Split a CSV file body into newline-aligned byte ranges
+
+    Returns the header line and a list of (start, end) offsets in file order.
+    Assumes no quoted field contains a newline, which holds for the
+    power_system.csv schema.
+    """
+    size = os.path.getsize(input_file)
+    with open(input_file, 'rb') as f:
+        header = f.readline()
+        body_start = f.tell()
+        bounds = [body_start]
+        for i in range(1, parts):
+            f.seek(body_start + (size - body_start) * i // parts)
+            f.readline()
+            position = f.tell()
+            if bounds[-1] < position < size:
+                bounds.append(position)
+        bounds.append(size)
+    
+    ranges = [(start, end) for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+    return header, ranges
+
+def _calculate_byte_range(input_file, header, start, end, part_file, dtype=np.float64):
+    """Worker: calculate one byte range of the input into a headerless part file"""
+    with open(input_file, 'rb') as f:
+        f.seek(start)
+        body = f.read(end - start)
+    
+    chunk = pd.read_csv(io.BytesIO(header + body), dtype=ID_DTYPES)
+    results_df = calculate_losses_vectorized(chunk, dtype)
+    results_df.to_csv(part_file, header=False, index=False)
+    return update_summary(new_summary(), chunk, results_df)
+
+def _calculate_row_range(input_file, start, end, part_file, dtype=np.float64):
+    """Worker: calculate rows [start, end) of a column directory into a headerless part file"""
+    chunk = read_columnar(input_file, rows=slice(start, end))
+    results_df = calculate_losses_vectorized(chunk, dtype)
+    results_df.to_csv(part_file, header=False, index=False)
+    return update_summary(new_summary(), chunk, results_df)
+
+def parallel_calculate_and_save(input_file='data/power_system.csv',
+                                output_file='data/loss_calculations.csv',
+                                workers=None, dtype=np.float64):
+    """Calculate losses on a pool of worker processes
+    
+    A CSV input is split into newline-aligned byte ranges which workers parse
+    and calculate independently; a column directory is split into row ranges
+    that workers memory-map. Part files are concatenated in input order, so
+    the CSV output is byte-identical to calculate_and_save(). Returns the
+    summary totals (see print_summary).
+    """
+    workers = workers or os.cpu_count() or 1
+    try:
+        if not output_file.endswith('.csv'):
+            raise ValueError("parallel mode writes CSV output only")
+        
+        kind, resolved = resolve_table(input_file)
+        if kind == 'columnar':
+            rows = read_schema(resolved)['rows']
+            step = max(1, -(-rows // (workers * 4)))
+            ranges = [(start, min(start + step, rows)) for start in range(0, rows, step)]
+            worker, leading_args = _calculate_row_range, [resolved]
+        else:
+            size = os.path.getsize(input_file)
+            parts = max(workers, -(-size // PARALLEL_RANGE_BYTES))
+            header, ranges = csv_byte_ranges(input_file, parts)
+            worker, leading_args = _calculate_byte_range, [input_file, header]
+        print(f"📖 Reading data from: {resolved}")
+        print(f"   Splitting into {len(ranges)} ranges across {workers} workers")
+        
+        summary = new_summary()
+        output_dir = os.path.dirname(os.path.abspath(output_file))
+        with tempfile.TemporaryDirectory(dir=output_dir) as part_dir:
+            part_files = [os.path.join(part_dir, f"part_{i:05d}.csv") for i in range(len(ranges))]
+            
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                partials = pool.map(worker,
+                                    *[[arg] * len(ranges) for arg in leading_args],
+                                    [start for start, _ in ranges], [end for _, end in ranges],
+                                    part_files, [dtype] * len(ranges))
+                for partial in partials:
+                    summary = merge_summaries(summary, partial)
+            
+            # Merge in original order behind a single header
+            with open(output_file, 'wb') as out:
+                out.write(pd.DataFrame(columns=RESULT_COLUMNS).to_csv(index=False).encode('utf-8'))
+                for part_file in part_files:
+                    with open(part_file, 'rb') as part:
+                        shutil.copyfileobj(part, out)
+        
+        print(f"   Processed {summary['lines']:,} transmission lines")
+        print(f"💾 Results saved to: {output_file}")
+        
+        return summary
         
     except FileNotFoundError:
         print(f"❌ Error: Could not find {input_file}")
@@ -70,9 +464,34 @@ def calculate_and_save(input_file='data/power_system.csv',
         print(f"❌ Error: {str(e)}")
         return None
 
-def print_summary(results_df):
-    """Print summary statistics"""
-    if results_df is None or len(results_df) == 0:
+def print_summary(results_df=None, summary=None):
+    """Print summary statistics
+    
+    Uses the totals accumulated while calculating (summary argument or
+    results_df.attrs['summary']), else the totals calculate_and_save cached
+    for data/power_system.csv; only falls back to re-reading the input
+    when none is available.
+    """
+    if summary is None and results_df is not None:
+        summary = results_df.attrs.get('summary')
+    
+    if summary is None:
+        if results_df is None or len(results_df) == 0:
+            print("No data to summarize")
+            return
+        
+        try:
+            cache = ResultCache()
+            summary = cache.get(loss_cache_key(cache, 'data/power_system.csv', 'loss_summary'))
+        except FileNotFoundError:
+            summary = None
+        
+        # Calculate from original data
+        if summary is None:
+            df = read_table('data/power_system.csv', columns=['load_kw'])
+            summary = update_summary(new_summary(), df, results_df)
+    
+    if summary['lines'] == 0:
         print("No data to summarize")
         return
     
@@ -80,38 +499,68 @@ def print_summary(results_df):
     print("📊 SYSTEM SUMMARY:")
     print("=" * 60)
     
-    # Calculate from original data
-    df = pd.read_csv('data/power_system.csv')
-    total_load = df['load_kw'].sum()
-    total_loss = results_df['total_losses_kw'].sum()
+    total_load = summary['total_load_kw']
+    total_loss = summary['total_losses_kw']
     
     print(f"Total Load: {total_load:,.2f} kW")
     print(f"Total System Losses: {total_loss:,.2f} kW")
     print(f"Overall Loss Percentage: {(total_loss/total_load*100):.2f}%")
     print(f"Overall Efficiency: {100 - (total_loss/total_load*100):.2f}%")
     
-    # Find best and worst lines
-    worst_line = results_df.loc[results_df['loss_percentage'].idxmax()]
-    best_line = results_df.loc[results_df['efficiency'].idxmax()]
-    
-    print(f"\n🔴 Worst Performing Line: {worst_line['line_id']} ({worst_line['loss_percentage']:.2f}% loss)")
-    print(f"🟢 Best Performing Line: {best_line['line_id']} ({best_line['efficiency']:.2f}% efficiency)")
+    # Best and worst lines
+    print(f"\n🔴 Worst Performing Line: {summary['worst_line_id']} ({summary['worst_loss_percentage']:.2f}% loss)")
+    print(f"🟢 Best Performing Line: {summary['best_line_id']} ({summary['best_efficiency']:.2f}% efficiency)")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Power system line loss calculator")
+    parser.add_argument('input_file', nargs='?', default='data/power_system.csv')
+    parser.add_argument('output_file', nargs='?', default='data/loss_calculations.csv')
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help="stream the input in chunks of this many lines (constant memory)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="calculate on this many worker processes (0 = one per CPU)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="always recalculate instead of using the result cache")
+    parser.add_argument('--precision', choices=PRECISIONS, default='float64',
+                        help="compute precision (float32 halves memory for bulk runs)")
+    parser.add_argument('--accuracy-report', action='store_true',
+                        help="compare float32 results with the float64 reference and exit")
+    args = parser.parse_args()
+    dtype = PRECISIONS[args.precision]
+    
     print("=" * 60)
     print("⚡ POWER SYSTEM LINE LOSS CALCULATOR")
     print("=" * 60)
     
-    # Calculate with original data
-    results = calculate_and_save('data/power_system.csv', 'data/loss_calculations.csv')
-    
-    if results is not None:
-        # Print line-by-line results
-        print("\n📈 LINE-BY-LINE RESULTS:")
-        print("-" * 60)
-        for _, row in results.iterrows():
-            print(f"{row['line_id']} - {row['area_name']}:")
-            print(f"  Current: {row['current_amps']} A | Loss: {row['total_losses_kw']} kW | Efficiency: {row['efficiency']}%")
+    if args.accuracy_report:
+        try:
+            system_df = read_table(args.input_file, dtype=ID_DTYPES)
+            print(f"📖 {len(system_df):,} transmission lines from: {args.input_file}")
+            print_accuracy_report(accuracy_report(system_df))
+        except FileNotFoundError:
+            print(f"❌ Error: Could not find {args.input_file}")
+    elif args.workers is not None:
+        summary = parallel_calculate_and_save(args.input_file, args.output_file, args.workers, dtype)
+        print_summary(summary=summary)
+    elif args.chunksize:
+        # Streaming mode: no line-by-line listing, totals come from the same pass
+        summary = stream_calculate_and_save(args.input_file, args.output_file, args.chunksize, dtype)
+        print_summary(summary=summary)
+    else:
+        # Calculate with original data
+        results = calculate_and_save(args.input_file, args.output_file,
+                                     cache_dir=None if args.no_cache else RESULT_CACHE_DIR, dtype=dtype)
         
-        # Print summary
-        print_summary(results)
\ No newline at end of file
+        if results is not None:
+            # Print line-by-line results
+            print("\n📈 LINE-BY-LINE RESULTS:")
+            print("-" * 60)
+            for _, row in results.iterrows():
+                print(f"{row['line_id']} - {row['area_name']}:")
+                print(f"  Current: {row['current_amps']} A | Loss: {row['total_losses_kw']} kW | Efficiency: {row['efficiency']}%")
+            
+            # Print summary
+            print_summary(results)
+        else:
+            # Lets run_project tell a failed run from one that left its output untouched
+            sys.exit(1)
@@ -0,0 +1,160 @@
+"""
+COLUMNAR TABLE STORAGE
+Memory-mapped .npy column directories for the system and loss tables
+
+A table such as data/power_system.csv can be stored as data/power_system.cols/,
+a directory with one .npy file per column plus a schema.json. Numeric columns
+are opened with np.load(mmap_mode='r'), so reading them costs no parsing and
+no copy. CSV stays the import/export format:
+
+    python scripts/columnar_store.py import data/power_system.csv
+    python scripts/columnar_store.py export data/power_system.cols out.csv
+"""
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+import pandas as pd
+
+SCHEMA_FILE = 'schema.json'
+COLUMNAR_SUFFIX = '.cols'
+SCHEMA_VERSION = 1
+
+def columnar_path(path):
+    """data/power_system.csv -> data/power_system.cols"""
+    root, ext = os.path.splitext(path)
+    return path if ext == COLUMNAR_SUFFIX else root + COLUMNAR_SUFFIX
+
+def is_columnar(path):
+    """True if path is a column directory written by write_columnar"""
+    return os.path.isfile(os.path.join(path, SCHEMA_FILE))
+
+def write_columnar(df, path):
+    """Write a DataFrame as a directory of .npy columns plus schema.json
+
+    The new directory is built next to the target and swapped in with a
+    rename, so readers never see a half-written table.
+    """
+    tmp_path = path + '.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    schema = {'version': SCHEMA_VERSION, 'rows': len(df), 'columns': []}
+    for i, name in enumerate(df.columns):
+        series = df[name]
+        if pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_bool_dtype(series.dtype):
+            values = series.to_numpy()
+            kind = 'numeric'
+        else:
+            # Fixed-width unicode keeps text columns memory-mappable
+            values = np.asarray(series.astype(str).to_numpy(), dtype=str)
+            kind = 'text'
+        file_name = f"{i:03d}.npy"
+        np.save(os.path.join(tmp_path, file_name), values, allow_pickle=False)
+        schema['columns'].append({'name': str(name), 'file': file_name,
+                                  'dtype': values.dtype.str, 'kind': kind})
+
+    with open(os.path.join(tmp_path, SCHEMA_FILE), 'w') as f:
+        json.dump(schema, f, indent=2)
+
+    old_path = path + '.old'
+    shutil.rmtree(old_path, ignore_errors=True)
+    if os.path.exists(path):
+        os.rename(path, old_path)
+    os.rename(tmp_path, path)
+    shutil.rmtree(old_path, ignore_errors=True)
+
+def read_schema(path):
+    """Load schema.json of a column directory"""
+    with open(os.path.join(path, SCHEMA_FILE)) as f:
+        return json.load(f)
+
+def read_column(path, name, schema=None):
+    """Return one column as a read-only memory-mapped NumPy array (zero copy)"""
+    schema = schema or read_schema(path)
+    for column in schema['columns']:
+        if column['name'] == name:
+            return np.load(os.path.join(path, column['file']), mmap_mode='r')
+    raise KeyError(f"Column '{name}' not found in {path}")
+
+def read_columnar(path, columns=None, rows=None):
+    """Load a column directory (optionally a slice of rows) as a DataFrame
+
+    Numeric columns stay backed by the memory-mapped files; text columns are
+    converted to regular pandas strings.
+    """
+    schema = read_schema(path)
+    files = {column['name']: column['file'] for column in schema['columns']}
+    names = columns or list(files)
+    rows = rows if rows is not None else slice(None)
+    data = {}
+    for name in names:
+        if name not in files:
+            raise KeyError(f"Column '{name}' not found in {path}")
+        values = np.load(os.path.join(path, files[name]), mmap_mode='r')[rows]
+        data[name] = values if values.dtype.kind != 'U' else values.astype(object)
+    index = pd.RangeIndex(schema['rows'])[rows]
+    return pd.DataFrame(data, columns=names, index=index, copy=False)
+
+def resolve_table(path):
+    """Return the storage that read_table would use for path
+
+    For a .csv path the sibling .cols directory wins when it exists and is at
+    least as new as the CSV, so callers can keep passing the usual data/*.csv
+    names. Returns ('columnar', dir) or ('csv', file).
+    """
+    if is_columnar(path):
+        return 'columnar', path
+
+    sibling = columnar_path(path)
+    if is_columnar(sibling) and (not os.path.exists(path) or
+                                 os.path.getmtime(sibling) >= os.path.getmtime(path)):
+        return 'columnar', sibling
+
+    return 'csv', path
+
+def read_table(path, columns=None, **csv_kwargs):
+    """Read a table from CSV or a column directory (see resolve_table)"""
+    kind, resolved = resolve_table(path)
+    if kind == 'columnar':
+        return read_columnar(resolved, columns)
+    return pd.read_csv(resolved, usecols=columns, **csv_kwargs)
+
+def write_table(df, path):
+    """Write a table as CSV (.csv path) or as a column directory (anything else)"""
+    if path.endswith('.csv'):
+        df.to_csv(path, index=False)
+    else:
+        write_columnar(df, path)
+
+def iter_table_chunks(path, chunksize, **csv_kwargs):
+    """Yield a table in bounded blocks of rows, from CSV or a column directory"""
+    kind, resolved = resolve_table(path)
+    if kind == 'csv':
+        yield from pd.read_csv(resolved, chunksize=chunksize, **csv_kwargs)
+        return
+
+    # Slicing memory-mapped columns only touches the pages of each block
+    rows = read_schema(resolved)['rows']
+    for start in range(0, rows, chunksize):
+        yield read_columnar(resolved, rows=slice(start, start + chunksize))
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] not in ('import', 'export'):
+        print("Usage: python scripts/columnar_store.py import <file.csv> [dest.cols]")
+        print("       python scripts/columnar_store.py export <dir.cols> <file.csv>")
+        sys.exit(1)
+
+    command, source = sys.argv[1], sys.argv[2]
+    if command == 'import':
+        dest = sys.argv[3] if len(sys.argv) > 3 else columnar_path(source)
+        table = pd.read_csv(source, dtype={'line_id': str, 'area_name': str})
+        write_columnar(table, dest)
+        print(f"💾 Imported {len(table):,} rows: {source} → {dest}")
+    else:
+        dest = sys.argv[3] if len(sys.argv) > 3 else os.path.splitext(source)[0] + '.csv'
+        table = read_columnar(source)
+        table.to_csv(dest, index=False)
+        print(f"💾 Exported {len(table):,} rows: {source} → {dest}")
@@ -0,0 +1,187 @@
+"""
+COMPACT TABLES
+Categorical, downcast in-memory form of the system and loss tables
+
+Loaded as plain pandas, every row of power_system.csv repeats line_id,
+area_name, conductor_type and the conductor's R/X as strings and float64.
+The compact form keeps:
+
+    line_key                             int32 row key shared with the loss table
+    line_id, area_name, conductor_type   categorical (each string stored once)
+    resistance_ohm_km, reactance_ohm_km  dropped and resolved from the conductor
+                                         catalog (kept only if a line differs from it)
+    other numeric columns                float32 / smallest integer type
+
+A loss table loaded against a compact system table shares its categories and
+line_key, so the two are joined on the integer key instead of merging strings.
+
+    system = read_compact_system('data/power_system.csv')
+    losses = read_compact_losses('data/loss_calculations.csv', system)
+    combined = join_compact(system, losses)
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+from scripts.columnar_store import read_table, resolve_table
+
+CATALOG_FILE = 'data/conductor_catalog.csv'
+
+PARAMETER_COLUMNS = ['resistance_ohm_km', 'reactance_ohm_km']
+CATEGORY_COLUMNS = ['line_id', 'area_name', 'conductor_type']
+
+def load_catalog(catalog_file=CATALOG_FILE):
+    """Conductor parameters indexed by conductor_type (last entry of a duplicate wins)"""
+    catalog = pd.read_csv(catalog_file, dtype={'conductor_type': str})
+    return catalog.drop_duplicates('conductor_type', keep='last').set_index('conductor_type')
+
+def downcast(series):
+    """Floats as float32, integers in the smallest type that holds them"""
+    if pd.api.types.is_bool_dtype(series.dtype) or not pd.api.types.is_numeric_dtype(series.dtype):
+        return series
+    if pd.api.types.is_integer_dtype(series.dtype):
+        return pd.to_numeric(series, downcast='integer')
+    return series.astype(np.float32)
+
+def catalog_parameters(conductor, catalog):
+    """Catalog (resistance, reactance) of every line's conductor (NaN if not listed)"""
+    conductor = pd.Categorical(conductor)
+    table = catalog.reindex(conductor.categories)
+    codes = conductor.codes
+    return tuple(np.where(codes >= 0, table[name].to_numpy(dtype=float)[codes], np.nan)
+                 for name in PARAMETER_COLUMNS)
+
+def compact_system(system_df, catalog=None):
+    """Compact copy of a system table (see module docstring)"""
+    catalog = load_catalog() if catalog is None else catalog
+    compact = {'line_key': np.arange(len(system_df), dtype=np.int32)}
+
+    expected = catalog_parameters(system_df['conductor_type'], catalog)
+    for name in system_df.columns:
+        if name == 'line_id' and not isinstance(system_df[name].dtype, pd.CategoricalDtype) \
+                and system_df[name].is_unique:
+            # Unique IDs become their own categories in row order (no sort needed)
+            compact[name] = pd.Categorical.from_codes(np.arange(len(system_df), dtype=np.int32),
+                                                      categories=pd.Index(system_df[name]))
+        elif name in CATEGORY_COLUMNS:
+            compact[name] = system_df[name].astype('category')
+        elif name in PARAMETER_COLUMNS:
+            # Only lines that differ from the catalog need their own values
+            values = system_df[name].to_numpy(dtype=float)
+            if not np.allclose(values, expected[PARAMETER_COLUMNS.index(name)], rtol=0, atol=1e-9):
+                compact[name] = values.astype(np.float32)
+        else:
+            compact[name] = downcast(system_df[name])
+    return pd.DataFrame(compact)
+
+def conductor_parameters(compact_df, catalog=None):
+    """(resistance_ohm_km, reactance_ohm_km) float64 arrays of a compact table"""
+    missing = [name for name in PARAMETER_COLUMNS if name not in compact_df.columns]
+    expected = catalog_parameters(compact_df['conductor_type'],
+                                  load_catalog() if catalog is None else catalog) if missing else None
+    return tuple(restore_float(compact_df[name]) if name in compact_df.columns
+                 else expected[i] for i, name in enumerate(PARAMETER_COLUMNS))
+
+def restore_float(values):
+    """float64 copy of a float32 column with each value's decimal restored
+
+    Every value becomes the shortest decimal (at most 9 significant digits)
+    that rounds to the same float32, as repr(np.float32) prints it, so
+    inputs such as 0.85 come back exactly instead of 0.8500000238.
+    """
+    single = np.asarray(values, dtype=np.float32)
+    values = single.astype(np.float64)
+    restored = values.copy()
+    pending = np.isfinite(values) & (values != 0)
+    exponent = np.floor(np.log10(np.abs(values, where=pending, out=np.ones_like(values))))
+    for digits in range(1, 10):
+        if not pending.any():
+            break
+        decimals = digits - 1 - exponent[pending]
+        # Dividing the rounded integer by a power of ten gives the nearest double to the decimal
+        scale = 10.0 ** np.abs(decimals)
+        candidate = np.where(decimals >= 0, np.round(values[pending] * scale) / scale,
+                             np.round(values[pending] / scale) * scale)
+        match = candidate.astype(np.float32) == single[pending]
+        found = np.zeros_like(pending)
+        found[pending] = match
+        restored[found] = candidate[match]
+        pending &= ~found
+    return restored
+
+def with_conductor_parameters(compact_df, catalog=None):
+    """float64 copy of a compact system table with R/X filled back in (for the loss formulas)"""
+    resistance, reactance = conductor_parameters(compact_df, catalog)
+    restored = {name: restore_float(compact_df[name]) for name in compact_df.columns
+                if compact_df[name].dtype == np.float32 and name not in PARAMETER_COLUMNS}
+    return compact_df.assign(**restored, resistance_ohm_km=resistance, reactance_ohm_km=reactance)
+
+def export_layout(compact_df, catalog=None):
+    """Compact table in the original column layout for export (R/X restored, no line_key)"""
+    resistance, reactance = conductor_parameters(compact_df, catalog)
+    exported = compact_df.drop(columns=['line_key'] + PARAMETER_COLUMNS, errors='ignore')
+    position = exported.columns.get_loc('conductor_type') + 1
+    exported.insert(position, 'resistance_ohm_km', resistance)
+    exported.insert(position + 1, 'reactance_ohm_km', reactance)
+    return exported
+
+def compact_losses(loss_df, system):
+    """Compact copy of a loss table keyed to a compact system table
+
+    line_id and area_name reuse the system's categories; line_key is the
+    system row of each line (-1 for lines the system doesn't have).
+    """
+    compact = {}
+    for name in loss_df.columns:
+        if name in ('line_id', 'area_name'):
+            compact[name] = loss_df[name].astype(system[name].dtype)
+        else:
+            compact[name] = downcast(loss_df[name])
+
+    # System row of each category code, then of each loss row
+    row_of_code = np.full(len(system['line_id'].cat.categories), -1, dtype=np.int32)
+    row_of_code[system['line_id'].cat.codes.to_numpy()] = system['line_key'].to_numpy()
+    codes = compact['line_id'].cat.codes.to_numpy()
+    line_key = np.where(codes >= 0, row_of_code[codes], -1).astype(np.int32)
+
+    return pd.DataFrame({'line_key': line_key, **compact})
+
+def read_compact_system(path='data/power_system.csv', catalog=None):
+    """Load a system table straight into compact form"""
+    if resolve_table(path)[0] == 'csv':
+        system_df = read_table(path, dtype={'line_id': str, 'area_name': 'category',
+                                            'conductor_type': 'category'})
+    else:
+        system_df = read_table(path)
+    return compact_system(system_df, catalog)
+
+def read_compact_losses(path, system):
+    """Load a loss table straight into compact form keyed to system"""
+    return compact_losses(read_table(path, dtype={'line_id': str, 'area_name': str})
+                          if resolve_table(path)[0] == 'csv' else read_table(path), system)
+
+def join_compact(system, losses):
+    """Inner join of compact system and loss tables on line_key (and area_name)
+
+    Same rows and column order as pd.merge(system_df, loss_df,
+    on=['line_id', 'area_name']), plus line_key. Tables listing the same
+    lines in the same order are joined by position.
+    """
+    keys = losses['line_key'].to_numpy()
+    extra = [name for name in losses.columns if name not in system.columns]
+
+    matched = keys >= 0
+    matched[matched] = (system['area_name'].cat.codes.to_numpy()[keys[matched]]
+                        == losses['area_name'].cat.codes.to_numpy()[matched])
+    if matched.all() and len(keys) == len(system) and (keys == np.arange(len(keys))).all():
+        return pd.concat([system.reset_index(drop=True), losses[extra].reset_index(drop=True)], axis=1)
+
+    # Keep the system's row order, like a merge
+    positions = np.flatnonzero(matched)
+    positions = positions[np.argsort(keys[positions], kind='stable')]
+    joined = system.iloc[keys[positions]].reset_index(drop=True)
+    for name in extra:
+        joined[name] = losses[name].to_numpy()[positions]
+    return joined
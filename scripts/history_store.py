@@ -0,0 +1,312 @@
+"""
+LIVE HISTORY STORE
+Append-only, segmented binary history of live loss data with rollups
+
+Layout under the store root (data/history by default):
+
+    lines.json              line_id list; position = integer line code
+    raw/<start>.bin         one record per line per tick, one file per hour
+    1min/<start>.bin        per-minute rollups, one file per day
+    15min/<start>.bin       per-15-minute rollups, one file per week
+    1h/<start>.bin          hourly rollups, one file per 30 days
+    <resolution>/<start>.idx  block index of the segment: (ts, first record, records)
+                            of every append, 24 bytes each
+
+<start> is the segment start as epoch seconds, so a range query only opens
+the segments that overlap the requested window. Every append (a raw tick or
+a flushed rollup bucket) is one block of records sorted by line code, so a
+query for one line binary-searches each block of the window in a memory map
+and reads only that line's records, not every line's. Rollups are maintained
+while data is written; old segments are deleted according to RETENTION_SECONDS.
+
+Blocks are located by file size, so only one writer may append to a store:
+like the live snapshots, the root's OWNER file holds the writer's process id
+and a second writer refuses to start while that process is running.
+"""
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+from scripts.live_snapshots import claim_directory, release_directory
+
+HISTORY_DIR = 'data/history'
+
+RAW_DTYPE = np.dtype([('ts', '<i8'), ('line', '<i4'), ('total_losses_kw', '<f4'),
+                      ('current_amps', '<f4'), ('voltage_drop_v', '<f4')])
+
+VALUE_FIELDS = ['total_losses_kw', 'current_amps', 'voltage_drop_v']
+
+ROLLUP_DTYPE = np.dtype([('ts', '<i8'), ('line', '<i4'), ('count', '<i4')] +
+                        [(f"{field}_{stat}", '<f4') for field in VALUE_FIELDS
+                         for stat in ('mean', 'max')])
+
+# Bucket width of every resolution, in seconds (raw has no buckets)
+ROLLUP_SECONDS = {'1min': 60, '15min': 15 * 60, '1h': 3600}
+
+# Time span covered by one segment file, in seconds
+SEGMENT_SECONDS = {'raw': 3600, '1min': 86400, '15min': 7 * 86400, '1h': 30 * 86400}
+
+# How long segments are kept, in seconds
+RETENTION_SECONDS = {'raw': 2 * 86400, '1min': 14 * 86400,
+                     '15min': 90 * 86400, '1h': 2 * 365 * 86400}
+
+def _segment_path(root, resolution, ts_ms):
+    """Segment file holding the record at ts_ms (epoch milliseconds)"""
+    span = SEGMENT_SECONDS[resolution]
+    start = (ts_ms // 1000) // span * span
+    return os.path.join(root, resolution, f"{start}.bin")
+
+# ts, first record and number of records of one appended block
+BLOCK_DTYPE = np.dtype([('ts', '<i8'), ('offset', '<i8'), ('count', '<i8')])
+
+def _index_path(segment):
+    return os.path.splitext(segment)[0] + '.idx'
+
+def _append_block(segment, records, ts_ms):
+    """Append records (one tick or bucket) to a segment, sorted by line, and index the block"""
+    if len(records) > 1 and (np.diff(records['line']) < 0).any():
+        records = records[np.argsort(records['line'], kind='stable')]
+    with open(segment, 'ab') as f:
+        offset = f.tell() // records.dtype.itemsize
+        records.tofile(f)
+    block = np.array([(ts_ms, offset, len(records))], dtype=BLOCK_DTYPE)
+    with open(_index_path(segment), 'ab') as f:
+        block.tofile(f)
+
+def _read_segment(segment, dtype, code, start_ms, end_ms):
+    """Records of one line in [start_ms, end_ms) from one segment file
+
+    Indexed blocks are binary-searched for the line in a memory map (all
+    blocks at once, one probe per block per step); records past the last
+    indexed block, and segments written without an index, are scanned.
+    """
+    # A record still being appended is ignored (count rounds down)
+    total = os.path.getsize(segment) // dtype.itemsize
+    if total == 0:
+        return np.empty(0, dtype=dtype)
+    try:
+        blocks = np.fromfile(_index_path(segment), dtype=BLOCK_DTYPE)
+    except FileNotFoundError:
+        blocks = np.empty(0, dtype=BLOCK_DTYPE)
+    blocks = blocks[blocks['offset'] + blocks['count'] <= total]
+    indexed = int((blocks['offset'] + blocks['count']).max()) if len(blocks) else 0
+
+    data = np.memmap(segment, dtype=dtype, mode='r', shape=(total,))
+    lines = data['line']
+    blocks = blocks[(blocks['ts'] >= start_ms) & (blocks['ts'] < end_ms)]
+    bounds = []
+    for side in ('left', 'right'):
+        # Vectorized binary search of code in every block
+        low, high = blocks['offset'].copy(), blocks['offset'] + blocks['count']
+        while (low < high).any():
+            searching = low < high
+            middle = (low + high) // 2
+            probe = lines[np.where(searching, middle, 0)]
+            go_right = (probe < code) if side == 'left' else (probe <= code)
+            low = np.where(searching & go_right, middle + 1, low)
+            high = np.where(searching & ~go_right, middle, high)
+        bounds.append(low)
+    positions = np.concatenate([np.arange(first, last) for first, last in zip(*bounds)] or
+                               [np.empty(0, dtype=np.int64)])
+    parts = [np.asarray(data[positions])]
+
+    if indexed < total:
+        tail = np.asarray(data[indexed:])
+        parts.append(tail[(tail['line'] == code) & (tail['ts'] >= start_ms) & (tail['ts'] < end_ms)])
+    del data
+    return np.concatenate(parts)
+
+def load_line_ids(root=HISTORY_DIR):
+    """Line ids known to the store, in code order"""
+    try:
+        with open(os.path.join(root, 'lines.json')) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+class HistoryWriter:
+    """Appends live ticks to the store and keeps the rollups up to date
+
+    Raises RuntimeError when another running process writes into root.
+    """
+
+    def __init__(self, root=HISTORY_DIR, retention=None):
+        self.root = root
+        self.retention = dict(RETENTION_SECONDS, **(retention or {}))
+        for resolution in SEGMENT_SECONDS:
+            os.makedirs(os.path.join(root, resolution), exist_ok=True)
+        claim_directory(root, 'History')
+
+        self.line_ids = load_line_ids(root)
+        self.line_index = pd.Index(self.line_ids)
+        self.buckets = {resolution: None for resolution in ROLLUP_SECONDS}
+        self.accumulators = {}
+        self.last_raw_segment = None
+
+    def _codes(self, line_ids):
+        """Integer codes for line ids, registering unseen ones"""
+        codes = self.line_index.get_indexer(line_ids)
+        if (codes < 0).any():
+            new_ids = pd.unique(np.asarray(line_ids, dtype=object)[codes < 0])
+            self.line_ids.extend(str(line_id) for line_id in new_ids)
+            self.line_index = pd.Index(self.line_ids)
+            tmp_file = os.path.join(self.root, 'lines.json.tmp')
+            with open(tmp_file, 'w') as f:
+                json.dump(self.line_ids, f)
+            os.replace(tmp_file, os.path.join(self.root, 'lines.json'))
+            codes = self.line_index.get_indexer(line_ids)
+        return codes.astype(np.int32)
+
+    def _reset_accumulator(self, resolution):
+        size = len(self.line_ids)
+        self.accumulators[resolution] = {
+            'count': np.zeros(size, dtype=np.int32),
+            'sum': np.zeros((len(VALUE_FIELDS), size)),
+            'max': np.full((len(VALUE_FIELDS), size), -np.inf)
+        }
+
+    def _flush_bucket(self, resolution):
+        """Write the rollup records of the open bucket of one resolution"""
+        bucket = self.buckets[resolution]
+        state = self.accumulators.get(resolution)
+        if bucket is None or state is None:
+            return
+
+        lines = np.flatnonzero(state['count'])
+        records = np.zeros(len(lines), dtype=ROLLUP_DTYPE)
+        records['ts'] = bucket
+        records['line'] = lines
+        records['count'] = state['count'][lines]
+        for i, field in enumerate(VALUE_FIELDS):
+            records[f"{field}_mean"] = state['sum'][i, lines] / state['count'][lines]
+            records[f"{field}_max"] = state['max'][i, lines]
+        _append_block(_segment_path(self.root, resolution, bucket), records, bucket)
+
+        self.buckets[resolution] = None
+
+    def append(self, timestamp, line_ids, total_losses_kw, current_amps, voltage_drop_v):
+        """Record one tick (timestamp in epoch seconds) for the given lines"""
+        ts_ms = int(timestamp * 1000)
+        codes = self._codes(line_ids)
+        values = np.vstack([np.asarray(total_losses_kw, dtype=float),
+                            np.asarray(current_amps, dtype=float),
+                            np.asarray(voltage_drop_v, dtype=float)])
+
+        records = np.empty(len(codes), dtype=RAW_DTYPE)
+        records['ts'] = ts_ms
+        records['line'] = codes
+        for i, field in enumerate(VALUE_FIELDS):
+            records[field] = values[i]
+        raw_segment = _segment_path(self.root, 'raw', ts_ms)
+        _append_block(raw_segment, records, ts_ms)
+
+        # Per-line count, sum and max of this tick, added to every resolution below
+        size = len(self.line_ids)
+        tick_count = np.bincount(codes, minlength=size)
+        tick_sum = np.vstack([np.bincount(codes, weights=values[i], minlength=size)
+                              for i in range(len(VALUE_FIELDS))])
+        order = np.argsort(codes, kind='stable')
+        sorted_codes = codes[order]
+        starts = np.flatnonzero(np.diff(sorted_codes, prepend=-1))
+        tick_lines = sorted_codes[starts]
+        tick_max = (np.maximum.reduceat(values[:, order], starts, axis=1) if len(codes)
+                    else np.empty((len(VALUE_FIELDS), 0)))
+
+        for resolution, width in ROLLUP_SECONDS.items():
+            bucket = ts_ms // (width * 1000) * (width * 1000)
+            if bucket != self.buckets[resolution]:
+                self._flush_bucket(resolution)
+                self.buckets[resolution] = bucket
+                self._reset_accumulator(resolution)
+
+            state = self.accumulators[resolution]
+            if len(state['count']) < len(self.line_ids):
+                grow = len(self.line_ids) - len(state['count'])
+                state['count'] = np.concatenate([state['count'], np.zeros(grow, dtype=np.int32)])
+                state['sum'] = np.hstack([state['sum'], np.zeros((len(VALUE_FIELDS), grow))])
+                state['max'] = np.hstack([state['max'], np.full((len(VALUE_FIELDS), grow), -np.inf)])
+            state['count'] += tick_count.astype(np.int32)
+            state['sum'] += tick_sum
+            state['max'][:, tick_lines] = np.maximum(state['max'][:, tick_lines], tick_max)
+
+        # Retention is only checked when a new raw segment starts
+        if raw_segment != self.last_raw_segment:
+            self.last_raw_segment = raw_segment
+            self.enforce_retention(timestamp)
+
+    def enforce_retention(self, now=None):
+        """Delete segments that ended before their resolution's retention window"""
+        now = time.time() if now is None else now
+        for resolution, span in SEGMENT_SECONDS.items():
+            directory = os.path.join(self.root, resolution)
+            for name in os.listdir(directory):
+                start = int(os.path.splitext(name)[0])
+                if start + span < now - self.retention[resolution]:
+                    os.remove(os.path.join(directory, name))
+
+    def close(self):
+        """Flush the partially filled rollup buckets and give up ownership of the store"""
+        for resolution in ROLLUP_SECONDS:
+            self._flush_bucket(resolution)
+        release_directory(self.root)
+
+def _segments_in_range(root, resolution, start_ms, end_ms):
+    """Segment files whose time span overlaps [start_ms, end_ms)"""
+    directory = os.path.join(root, resolution)
+    if not os.path.isdir(directory):
+        return []
+
+    span_ms = SEGMENT_SECONDS[resolution] * 1000
+    selected = []
+    names = [name for name in os.listdir(directory) if name.endswith('.bin')]
+    for name in sorted(names, key=lambda name: int(os.path.splitext(name)[0])):
+        segment_start = int(os.path.splitext(name)[0]) * 1000
+        if segment_start < end_ms and segment_start + span_ms > start_ms:
+            selected.append(os.path.join(directory, name))
+    return selected
+
+def choose_resolution(start, end, max_points=2000):
+    """Coarsest-needed resolution that keeps a line's series under max_points"""
+    for resolution in ('1min', '15min', '1h'):
+        if (end - start) / ROLLUP_SECONDS[resolution] <= max_points:
+            return resolution
+    return '1h'
+
+def query(line_id, start, end, resolution='raw', root=HISTORY_DIR):
+    """Samples of one line in [start, end) (epoch seconds) at the given resolution
+
+    Only the segments overlapping the window are opened, and only this line's
+    records are read from them (see _read_segment). Returns a DataFrame
+    with a 'timestamp' column followed by the stored value fields.
+    """
+    line_ids = load_line_ids(root)
+    dtype = RAW_DTYPE if resolution == 'raw' else ROLLUP_DTYPE
+    columns = [name for name in dtype.names if name not in ('ts', 'line')]
+    if line_id not in line_ids:
+        return pd.DataFrame(columns=['timestamp'] + columns)
+
+    code = line_ids.index(line_id)
+    start_ms, end_ms = int(start * 1000), int(end * 1000)
+    parts = []
+    for segment in _segments_in_range(root, resolution, start_ms, end_ms):
+        parts.append(_read_segment(segment, dtype, code, start_ms, end_ms))
+
+    records = np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+    result = pd.DataFrame({name: records[name] for name in columns}, columns=columns)
+    result.insert(0, 'timestamp', pd.to_datetime(records['ts'], unit='ms'))
+    
+    if resolution != 'raw' and result['timestamp'].duplicated().any():
+        # A writer restart inside a bucket leaves two partial rollups; combine them
+        weights = result['count']
+        for field in VALUE_FIELDS:
+            result[f"{field}_mean"] = result[f"{field}_mean"] * weights
+        result = result.groupby('timestamp', as_index=False).agg(
+            {name: 'max' if name.endswith('_max') else 'sum' for name in columns})
+        for field in VALUE_FIELDS:
+            result[f"{field}_mean"] = result[f"{field}_mean"] / result['count']
+    return result.sort_values('timestamp', ignore_index=True)
@@ -0,0 +1,131 @@
+"""
+INCREMENTAL LOSS MODEL
+Keeps the live loss table in memory and recalculates only changed lines
+"""
+import math
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+from scripts.calculate_losses import RESULT_COLUMNS, loss_arrays, new_summary, round_like_python
+
+INPUT_COLUMNS = ['line_length_km', 'resistance_ohm_km', 'reactance_ohm_km',
+                 'load_kw', 'power_factor', 'transformer_efficiency']
+
+# Incremental totals are re-summed from scratch this often to stop float drift
+RESYNC_EVERY = 10_000
+
+def latest_per_line(rows):
+    """Positions of the last occurrence of every row in a batch, in batch order"""
+    _, last_from_end = np.unique(rows[::-1], return_index=True)
+    return np.sort(len(rows) - 1 - last_from_end)
+
+class IncrementalLossModel:
+    """In-memory loss table updated line by line
+
+    Per-update cost scales with the number of changed lines, not with the
+    number of lines in the system; system totals are adjusted by the
+    difference between new and old values instead of being re-summed.
+    """
+
+    def __init__(self, system_df):
+        self.system_df = system_df.reset_index(drop=True).copy()
+        self.inputs = {column: self.system_df[column].to_numpy(dtype=float).copy()
+                       for column in INPUT_COLUMNS}
+        self.results = {column: np.empty(len(self.system_df)) for column in RESULT_COLUMNS[2:]}
+        self.updates = 0
+        self.last_changed = len(self.system_df)
+        self._recalculate(np.arange(len(self.system_df)))
+        self.resync()
+
+    def __len__(self):
+        return len(self.system_df)
+
+    def _recalculate(self, rows):
+        """Recalculate the results of the given row positions"""
+        losses = loss_arrays(self.inputs['load_kw'][rows], self.inputs['power_factor'][rows],
+                             self.inputs['resistance_ohm_km'][rows],
+                             self.inputs['reactance_ohm_km'][rows],
+                             self.inputs['line_length_km'][rows],
+                             self.inputs['transformer_efficiency'][rows])
+        for column, values in losses.items():
+            self.results[column][rows] = round_like_python(values)
+
+    def resync(self):
+        """Re-sum the system totals from scratch"""
+        self.total_load_kw = math.fsum(self.inputs['load_kw'])
+        self.total_losses_kw = math.fsum(self.results['total_losses_kw'])
+
+    def apply(self, rows, load_kw, power_factor):
+        """Set new load/power factor for the given row positions and recalculate them
+
+        A row listed more than once takes its last values. Returns the
+        recalculated row positions (each once).
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        load_kw = np.broadcast_to(np.asarray(load_kw, dtype=float), rows.shape)
+        power_factor = np.broadcast_to(np.asarray(power_factor, dtype=float), rows.shape)
+        # The totals adjust by new - old per row, so a repeated row would count twice
+        keep = latest_per_line(rows)
+        if len(keep) < len(rows):
+            rows, load_kw, power_factor = rows[keep], load_kw[keep], power_factor[keep]
+
+        old_load = self.inputs['load_kw'][rows]
+        old_losses = self.results['total_losses_kw'][rows]
+
+        self.inputs['load_kw'][rows] = load_kw
+        self.inputs['power_factor'][rows] = power_factor
+        self._recalculate(rows)
+
+        self.total_load_kw += float(np.sum(self.inputs['load_kw'][rows] - old_load))
+        self.total_losses_kw += float(np.sum(self.results['total_losses_kw'][rows] - old_losses))
+        self.last_changed = len(rows)
+
+        self.updates += 1
+        if self.updates % RESYNC_EVERY == 0:
+            self.resync()
+        return rows
+
+    def update(self, load_kw, power_factor):
+        """Take full load/power factor columns and recalculate only the lines that changed
+
+        Returns the positions of the changed lines.
+        """
+        load_kw = np.asarray(load_kw, dtype=float)
+        power_factor = np.asarray(power_factor, dtype=float)
+        changed = np.flatnonzero((load_kw != self.inputs['load_kw']) |
+                                 (power_factor != self.inputs['power_factor']))
+        return self.apply(changed, load_kw[changed], power_factor[changed])
+
+    def system_table(self):
+        """Current system table (power_system.csv schema)"""
+        self.system_df['load_kw'] = self.inputs['load_kw']
+        self.system_df['power_factor'] = self.inputs['power_factor']
+        return self.system_df
+
+    def loss_table(self):
+        """Current loss table (loss_calculations.csv schema)"""
+        # Passing the typed id columns skips re-inferring their dtype every tick
+        table = {'line_id': self.system_df['line_id'],
+                 'area_name': self.system_df['area_name']}
+        table.update(self.results)
+        return pd.DataFrame(table, columns=RESULT_COLUMNS)
+
+    def summary(self):
+        """Totals in the format used by calculate_losses.print_summary"""
+        if len(self) == 0:
+            return new_summary()
+        
+        worst = int(np.argmax(self.results['loss_percentage']))
+        best = int(np.argmax(self.results['efficiency']))
+        return {
+            'lines': len(self),
+            'total_load_kw': self.total_load_kw,
+            'total_losses_kw': self.total_losses_kw,
+            'worst_line_id': self.system_df['line_id'].iat[worst],
+            'worst_loss_percentage': float(self.results['loss_percentage'][worst]),
+            'best_line_id': self.system_df['line_id'].iat[best],
+            'best_efficiency': float(self.results['efficiency'][best])
+        }
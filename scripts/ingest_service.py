@@ -0,0 +1,451 @@
+"""
+TELEMETRY INGESTION SERVICE
+Receives meter readings over TCP/UDP and feeds the live loss model in micro-batches
+
+Each reading is one text line (several per TCP write or UDP datagram):
+
+    line_id,load_kw,power_factor[,timestamp]
+
+Socket handlers only split the stream on line boundaries and queue raw
+chunks. A batcher collects chunks until BATCH_READINGS readings arrived or
+the oldest one waited BATCH_DELAY seconds, parses the whole batch with one
+read_csv call, keeps the newest reading per line and recalculates only those
+lines in the IncrementalLossModel, whose new values the anomaly detector
+checks right away. Results go to the same sinks as the live simulator
+(snapshots, history store, shared-memory channel), at most once per
+PUBLISH_INTERVAL, and less often when writing a large table takes longer
+than PUBLISH_SHARE of the time.
+
+The queue between sockets and batcher is bounded. When it is full a TCP
+connection stops being read, so the sender is slowed down by TCP flow
+control; UDP has no flow control, so datagrams are dropped and counted.
+
+The live channel, the snapshot directory and the history store each accept
+one writing process, so next to a running simulator the service needs its
+own channel name, live directory (or --no-files) and, with history, its own
+history directory; the service refuses to start on one that is in use. Its
+alert log is alerts.csv in the live directory.
+
+    python scripts/ingest_service.py --tcp-port 9009 --udp-port 9010
+    python scripts/ingest_service.py --channel gridwatch_ingest --live-dir data/live_ingest \
+        --history-dir data/history_ingest
+    python scripts/ingest_service.py --send data/telemetry.csv --port 9009
+    python scripts/ingest_service.py --send synthetic --readings 1000000 --port 9009
+"""
+import argparse
+import asyncio
+import io
+import os
+import socket
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+from scripts import metrics
+from scripts.anomaly_detector import ALERT_FILE, ALERT_LOG, AnomalyDetector
+from scripts.columnar_store import read_table
+from scripts.history_store import HISTORY_DIR, HistoryWriter
+from scripts.incremental_losses import IncrementalLossModel
+from scripts.live_channel import CHANNEL_NAME, LivePublisher
+from scripts.live_simulator import epoch_seconds, publish_tick
+from scripts.live_snapshots import COLUMNAR_MIN_ROWS, LIVE_DIR, SnapshotWriter
+
+HOST = '127.0.0.1'
+TCP_PORT = 9009
+UDP_PORT = 9010
+
+# Micro-batch limits: whichever is reached first closes the batch
+BATCH_READINGS = 20_000
+BATCH_DELAY = 0.05             # seconds
+
+MAX_QUEUED_CHUNKS = 256        # socket chunks waiting for the batcher (backpressure)
+READ_SIZE = 64 * 1024          # bytes per TCP read
+PUBLISH_INTERVAL = 0.5         # minimum seconds between published snapshots
+PUBLISH_SHARE = 0.2            # largest share of the time spent publishing big tables
+
+READING_COLUMNS = ['line_id', 'load_kw', 'power_factor', 'timestamp']
+
+def parse_readings(data):
+    """DataFrame of the readings in a block of text lines (lines with too many fields dropped)"""
+    readings = pd.read_csv(io.BytesIO(data), names=READING_COLUMNS, header=None,
+                           dtype={'line_id': str}, on_bad_lines='skip')
+    for column in ('load_kw', 'power_factor', 'timestamp'):
+        if not pd.api.types.is_float_dtype(readings[column].dtype):
+            readings[column] = pd.to_numeric(readings[column], errors='coerce')
+    return readings
+
+class DatagramHandler(asyncio.DatagramProtocol):
+    """Hands every UDP datagram to the service"""
+
+    def __init__(self, service):
+        self.service = service
+
+    def datagram_received(self, data, addr):
+        self.service.handle_datagram(data)
+
+class IngestService:
+    """Socket listeners, a bounded chunk queue and the micro-batch loss updates"""
+
+    def __init__(self, system_df, live_dir=LIVE_DIR, history_dir=None, publish=True,
+                 columnar=None, batch_readings=BATCH_READINGS, batch_delay=BATCH_DELAY,
+                 max_queued=MAX_QUEUED_CHUNKS, publish_interval=PUBLISH_INTERVAL,
+                 alert_log=ALERT_LOG, channel_name=CHANNEL_NAME):
+        self.model = IncrementalLossModel(system_df)
+        self.rows = pd.Index(self.model.system_df['line_id'].astype(str))
+        self.snapshots = SnapshotWriter(live_dir, columnar) if live_dir else None
+        self.history = HistoryWriter(history_dir) if history_dir else None
+        self.channel = LivePublisher(channel_name) if publish else None
+        self.detector = (AnomalyDetector(self.model.system_df['line_id'], alert_log=alert_log)
+                         if alert_log else None)
+        self.batch_readings = batch_readings
+        self.batch_delay = batch_delay
+        self.max_queued = max_queued
+        self.publish_interval = publish_interval
+
+        self.queue = None
+        self.batch_timestamp = None
+        self.last_published = 0.0
+        self.publish_seconds = 0.0
+        self.unpublished = np.array([], dtype=np.intp)
+        self.stats = dict.fromkeys(['received', 'applied', 'unknown', 'malformed',
+                                    'dropped', 'batches', 'blocked', 'alerts'], 0)
+
+    # Socket side: split on line boundaries and queue raw chunks
+
+    async def enqueue(self, chunk):
+        """Queue a chunk of complete lines, waiting while the queue is full"""
+        if self.queue.full():
+            self.stats['blocked'] += 1
+        await self.queue.put(chunk)
+
+    async def handle_tcp(self, reader, writer):
+        tail = b''
+        try:
+            while True:
+                data = await reader.read(READ_SIZE)
+                if not data:
+                    break
+                data = tail + data
+                cut = data.rfind(b'\n') + 1
+                tail = data[cut:]
+                if cut:
+                    await self.enqueue(data[:cut])
+            if tail.strip():
+                await self.enqueue(tail + b'\n')
+        except (ConnectionError, asyncio.CancelledError):
+            # Sender went away, or the service is shutting down
+            pass
+        finally:
+            writer.close()
+
+    def handle_datagram(self, data):
+        """Queue one UDP datagram, dropping it when the queue is full"""
+        if not data.endswith(b'\n'):
+            data += b'\n'
+        try:
+            self.queue.put_nowait(data)
+        except asyncio.QueueFull:
+            self.stats['dropped'] += data.count(b'\n')
+
+    # Batch side: parse, update the loss model, publish
+
+    def process(self, data):
+        """Apply one batch of raw lines to the loss model and return the changed rows"""
+        with metrics.timed('ingest_service', 'parse'):
+            readings = parse_readings(data)
+        valid = readings['load_kw'].notna() & readings['power_factor'].notna()
+        lines = data.count(b'\n') - data.count(b'\n\n')
+        self.stats['received'] += lines
+        self.stats['malformed'] += lines - int(valid.sum())
+
+        rows = self.rows.get_indexer(readings['line_id'])
+        known = valid.to_numpy() & (rows >= 0)
+        self.stats['unknown'] += int((valid.to_numpy() & (rows < 0)).sum())
+        if not known.any():
+            return np.array([], dtype=np.intp)
+
+        # A line reported twice in one batch keeps its newest values (see apply)
+        with metrics.timed('ingest_service', 'recalculate'):
+            changed = self.model.apply(rows[known],
+                                       readings['load_kw'].to_numpy(dtype=float)[known],
+                                       readings['power_factor'].to_numpy(dtype=float)[known])
+        metrics.count_rows('ingest_service', 'recalculate', len(changed))
+        self.stats['applied'] += len(changed)
+        self.stats['batches'] += 1
+
+        timestamps = readings['timestamp'].to_numpy(dtype=float)[known]
+        self.batch_timestamp = float(np.nanmax(timestamps)) if np.isfinite(timestamps).any() else None
+
+        # Check every batch, not only the published ones, so short spikes are seen
+        if self.detector:
+            with metrics.timed('ingest_service', 'detect', rows=len(changed)):
+                alerts = self.detector.observe(self.batch_timestamp or time.time(), changed,
+                                               self.model.results)
+            self.stats['alerts'] += len(alerts)
+        return changed
+
+    def publish(self, changed, force=False):
+        """Publish the model unless the last snapshot is too recent"""
+        self.unpublished = np.union1d(self.unpublished, changed)
+        started = time.monotonic()
+        interval = max(self.publish_interval, self.publish_seconds / PUBLISH_SHARE)
+        if not len(self.unpublished) or (not force and started - self.last_published < interval):
+            return
+        publish_tick(self.model.system_table(), self.model, self.unpublished, self.snapshots,
+                     self.history, self.channel, timestamp=self.batch_timestamp,
+                     component='ingest_service')
+        metrics.publish('ingest_service')
+        self.last_published = time.monotonic()
+        self.publish_seconds = self.last_published - started
+        self.unpublished = np.array([], dtype=np.intp)
+
+    def run_batch(self, chunks, force_publish=False):
+        try:
+            self.publish(self.process(b''.join(chunks)) if chunks else np.array([], dtype=np.intp),
+                         force_publish)
+        except Exception as e:
+            print(f"❌ Error: {str(e)}")
+
+    async def batcher(self):
+        """Close a batch on size or deadline and process it off the event loop
+
+        Returns after a None chunk, once everything queued before it is applied
+        and published.
+        """
+        loop = asyncio.get_running_loop()
+        chunks, count, deadline = [], 0, None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - loop.time())
+            try:
+                chunk = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                chunk = b''
+            if chunk is None:
+                await asyncio.to_thread(self.run_batch, chunks, True)
+                return
+            if chunk:
+                if deadline is None:
+                    deadline = loop.time() + self.batch_delay
+                chunks.append(chunk)
+                count += chunk.count(b'\n')
+                if count < self.batch_readings:
+                    continue
+
+            # Sockets keep filling the bounded queue while the batch is calculated
+            await asyncio.to_thread(self.run_batch, chunks)
+            chunks, count, deadline = [], 0, None
+
+    async def serve(self, host=HOST, tcp_port=TCP_PORT, udp_port=UDP_PORT, duration=None):
+        """Listen until duration seconds passed (or forever) and return the stats"""
+        self.queue = asyncio.Queue(self.max_queued)
+        loop = asyncio.get_running_loop()
+
+        servers, transports = [], []
+        if tcp_port is not None:
+            servers.append(await asyncio.start_server(self.handle_tcp, host, tcp_port))
+            print(f"📡 TCP listening on {host}:{tcp_port}")
+        if udp_port is not None:
+            transport, _ = await loop.create_datagram_endpoint(lambda: DatagramHandler(self),
+                                                                local_addr=(host, udp_port))
+            transports.append(transport)
+            print(f"📡 UDP listening on {host}:{udp_port}")
+
+        batcher = asyncio.create_task(self.batcher())
+        reporter = asyncio.create_task(self.report_loop())
+        try:
+            if duration is None:
+                await asyncio.Event().wait()
+            else:
+                await asyncio.sleep(duration)
+        finally:
+            for server in servers:
+                server.close()
+            for transport in transports:
+                transport.close()
+            reporter.cancel()
+
+            # Whatever is still queued is applied and published before shutting down
+            await self.queue.put(None)
+            await batcher
+        return self.stats
+
+    async def report_loop(self, every=1.0):
+        """Print throughput about once per second"""
+        last, last_time = 0, time.monotonic()
+        while True:
+            await asyncio.sleep(every)
+            now = time.monotonic()
+            rate = (self.stats['received'] - last) / (now - last_time)
+            last, last_time = self.stats['received'], now
+            if rate:
+                print(f"[{datetime.now().strftime('%H:%M:%S')}] {rate:,.0f} readings/s | "
+                      f"{self.stats['batches']:,} batches | queued {self.queue.qsize()} | "
+                      f"System Losses: {self.model.total_losses_kw:,.1f} kW")
+
+    def close(self):
+        if self.snapshots:
+            self.snapshots.close()
+        if self.history:
+            self.history.close()
+        if self.channel:
+            self.channel.close()
+
+def print_stats(stats, seconds):
+    print("\n" + "=" * 60)
+    print("📊 INGESTION SUMMARY:")
+    print("=" * 60)
+    print(f"Readings received: {stats['received']:,} ({stats['received'] / max(seconds, 1e-9):,.0f}/s)")
+    print(f"Lines recalculated: {stats['applied']:,} in {stats['batches']:,} batches")
+    print(f"Unknown lines: {stats['unknown']:,} | Malformed: {stats['malformed']:,} | "
+          f"UDP dropped: {stats['dropped']:,} | Queue full: {stats['blocked']:,} times")
+    print(f"🚨 Alerts raised: {stats['alerts']:,}")
+
+def run_service(host=HOST, tcp_port=TCP_PORT, udp_port=UDP_PORT, duration=None, **options):
+    """Load the system table and serve until Ctrl+C (or duration seconds)"""
+    print("=" * 60)
+    print("📥 TELEMETRY INGESTION SERVICE")
+    print("=" * 60)
+
+    try:
+        service = IngestService(read_table('data/power_system.csv'), **options)
+    except RuntimeError as e:
+        # A live channel, snapshot directory or history store owned by another process
+        print(f"❌ Error: {str(e)}")
+        return None
+    print(f"Tracking {len(service.model):,} lines | batches of up to {service.batch_readings:,} "
+          f"readings or {service.batch_delay * 1000:.0f} ms")
+    started = time.monotonic()
+    try:
+        asyncio.run(service.serve(host, tcp_port, udp_port, duration))
+    except KeyboardInterrupt:
+        print("\n\n⏹️ Ingestion stopped by user")
+    finally:
+        service.close()
+    print_stats(service.stats, time.monotonic() - started)
+    return service
+
+# Replay client: a local stand-in for the field meters
+
+def telemetry_lines(telemetry_file=None, readings=100_000, seed=None, block=5_000):
+    """Yield blocks of wire-format lines from a telemetry file or the random walk
+
+    A telemetry file (timestamp, line_id, load_kw, power_factor) is sent in
+    its recorded order. With no file, readings synthetic readings are sent
+    for randomly chosen lines of power_system.csv: load within ±10% and power
+    factor within ±0.02 of the line's base values.
+    """
+    if telemetry_file:
+        telemetry = read_table(telemetry_file, dtype={'line_id': str})
+        timestamps = epoch_seconds(telemetry['timestamp'])
+        wire = pd.DataFrame({'line_id': telemetry['line_id'], 'load_kw': telemetry['load_kw'],
+                             'power_factor': telemetry['power_factor'], 'timestamp': timestamps})
+        for start in range(0, len(wire), block):
+            yield wire.iloc[start:start + block].to_csv(header=False, index=False).encode()
+        return
+
+    system_df = read_table('data/power_system.csv')
+    rng = np.random.default_rng(seed)
+    line_ids = system_df['line_id'].astype(str).to_numpy()
+    base_load = system_df['load_kw'].to_numpy(dtype=float)
+    base_pf = system_df['power_factor'].to_numpy(dtype=float)
+    for start in range(0, readings, block):
+        count = min(block, readings - start)
+        rows = rng.integers(len(line_ids), size=count)
+        yield pd.DataFrame({
+            'line_id': line_ids[rows],
+            'load_kw': np.round(base_load[rows] * rng.uniform(0.9, 1.1, count), 1),
+            'power_factor': np.round(np.clip(base_pf[rows] + rng.uniform(-0.02, 0.02, count), 0.75, 0.95), 3),
+            'timestamp': round(time.time(), 3)
+        }).to_csv(header=False, index=False).encode()
+
+def send_telemetry(telemetry_file=None, host=HOST, port=TCP_PORT, udp=False, readings=100_000,
+                   rate=None, seed=None):
+    """Send telemetry to the service, at most rate readings/s (None = as fast as possible)"""
+    print("=" * 60)
+    print("📤 TELEMETRY REPLAY CLIENT")
+    print("=" * 60)
+
+    sent = 0
+    started = time.monotonic()
+    try:
+        if udp:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        else:
+            sock = socket.create_connection((host, port))
+        with sock:
+            # UDP lines are regrouped into datagrams that fit one packet
+            for data in telemetry_lines(telemetry_file, readings, seed, block=200 if udp else 5_000):
+                if udp:
+                    sock.sendto(data, (host, port))
+                else:
+                    sock.sendall(data)
+                sent += data.count(b'\n')
+                if rate:
+                    delay = started + sent / rate - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+
+    except KeyboardInterrupt:
+        print("\n\n⏹️ Replay stopped by user")
+    except OSError as e:
+        print(f"❌ Error: {str(e)}")
+
+    seconds = time.monotonic() - started
+    print(f"✅ Sent {sent:,} readings in {seconds:.2f}s ({sent / max(seconds, 1e-9):,.0f}/s) "
+          f"over {'UDP' if udp else 'TCP'} to {host}:{port}")
+    return sent
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Telemetry ingestion service and replay client")
+    parser.add_argument('--host', default=HOST, help="address to listen on / send to")
+    parser.add_argument('--tcp-port', type=int, default=TCP_PORT, help="TCP port (0 disables TCP)")
+    parser.add_argument('--udp-port', type=int, default=UDP_PORT, help="UDP port (0 disables UDP)")
+    parser.add_argument('--batch-readings', type=int, default=BATCH_READINGS,
+                        help="readings that close a micro-batch")
+    parser.add_argument('--batch-delay', type=float, default=BATCH_DELAY,
+                        help="seconds the oldest reading may wait for its batch")
+    parser.add_argument('--duration', type=float, default=None, help="stop serving after this many seconds")
+    parser.add_argument('--no-files', action='store_true', help="don't write live snapshots to disk")
+    parser.add_argument('--live-dir', default=LIVE_DIR,
+                        help="directory for live snapshots and the alert log (one writer per directory)")
+    parser.add_argument('--columnar', action='store_const', const=True, default=None,
+                        help="always write live snapshots in columnar format "
+                             f"(default: from {COLUMNAR_MIN_ROWS:,} lines)")
+    parser.add_argument('--csv', dest='columnar', action='store_const', const=False,
+                        help="always write live snapshots as CSV")
+    parser.add_argument('--history', action='store_true', help="record published ticks in the history store")
+    parser.add_argument('--history-dir', default=None,
+                        help=f"history store directory (implies --history; default {HISTORY_DIR})")
+    parser.add_argument('--no-publish', action='store_true', help="don't publish on the live channel")
+    parser.add_argument('--channel', default=CHANNEL_NAME,
+                        help="shared-memory live channel name (one publisher per name)")
+    parser.add_argument('--no-alerts', action='store_true', help="don't run the anomaly detector")
+
+    client = parser.add_argument_group('replay client')
+    client.add_argument('--send', default=None, metavar='FILE',
+                        help="send this telemetry file ('synthetic' for the random walk) instead of serving")
+    client.add_argument('--port', type=int, default=None, help="port to send to (default: --tcp-port / --udp-port)")
+    client.add_argument('--udp', action='store_true', help="send over UDP instead of TCP")
+    client.add_argument('--readings', type=int, default=100_000, help="synthetic readings to send")
+    client.add_argument('--rate', type=float, default=None, help="readings per second (default: unthrottled)")
+    client.add_argument('--seed', type=int, default=None, help="make synthetic readings reproducible")
+    args = parser.parse_args()
+
+    if args.send:
+        port = args.port or (args.udp_port if args.udp else args.tcp_port)
+        send_telemetry(None if args.send == 'synthetic' else args.send, args.host, port, args.udp,
+                       args.readings, args.rate, args.seed)
+    else:
+        service = run_service(args.host, args.tcp_port or None, args.udp_port or None, args.duration,
+                              live_dir=None if args.no_files else args.live_dir,
+                              history_dir=args.history_dir or (HISTORY_DIR if args.history else None),
+                              publish=not args.no_publish, columnar=args.columnar,
+                              batch_readings=args.batch_readings, batch_delay=args.batch_delay,
+                              alert_log=None if args.no_alerts else os.path.join(args.live_dir, ALERT_FILE),
+                              channel_name=args.channel)
+        if service is None:
+            sys.exit(1)
@@ -0,0 +1,185 @@
+"""
+LIVE SNAPSHOT CHANNEL
+Shared-memory publish/subscribe transport between the simulator and dashboard
+
+The publisher owns one shared-memory block holding a small header and the
+latest snapshot (system table + loss table). Every publish bumps a generation
+counter; subscribers read the counter cheaply and only unpickle the payload
+when it changed. The header works as a seqlock: the generation is odd while
+a write is in progress, so readers retry instead of seeing a torn snapshot.
+
+The block starts at INITIAL_CAPACITY and is replaced by a larger one (twice
+the snapshot size) when a snapshot doesn't fit: the old block is marked
+closed, so subscribers attach again. Only one live publisher may own a
+channel name; give concurrent publishers (e.g. the simulator and the ingest
+service) different names with --channel. The dashboard subscribes to
+GRIDWATCH_LIVE_CHANNEL (default gridwatch_live).
+"""
+import os
+import pickle
+import struct
+import time
+from multiprocessing import shared_memory
+
+CHANNEL_NAME = os.environ.get('GRIDWATCH_LIVE_CHANNEL', 'gridwatch_live')
+INITIAL_CAPACITY = 1024 * 1024  # bytes available for one snapshot until a larger one arrives
+
+# generation, payload length, closed flag, publisher process id
+HEADER = struct.Struct('<QQQQ')
+
+def process_alive(pid):
+    """True if process pid is running (or can't be checked)"""
+    if os.name == 'nt':
+        # os.kill(pid, 0) sends CTRL_C_EVENT on Windows, so ask the kernel instead
+        import ctypes
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return ctypes.get_last_error() == 5  # ERROR_ACCESS_DENIED: exists, owned by another user
+        try:
+            exit_code = ctypes.c_ulong()
+            if not kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code)):
+                return True
+            return exit_code.value == 259  # STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+    return True
+
+def _attach(name):
+    """Attach to an existing block without letting this process unlink it on exit"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 registers attached blocks with the resource tracker,
+        # which would destroy the publisher's block when the reader exits
+        block = shared_memory.SharedMemory(name=name)
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(block._name, 'shared_memory')
+        except Exception:
+            pass
+        return block
+
+class LivePublisher:
+    """Writes snapshots into the shared-memory channel
+
+    Raises RuntimeError when another running process publishes on name.
+    """
+
+    def __init__(self, name=CHANNEL_NAME, capacity=INITIAL_CAPACITY):
+        self.name = name
+        self.pid = os.getpid()
+        self.generation = 0
+        try:
+            self.block = shared_memory.SharedMemory(name=name, create=True, size=HEADER.size + capacity)
+        except FileExistsError:
+            self.block = _attach(name)
+            generation, _, closed, pid = HEADER.unpack_from(self.block.buf, 0)
+            if not closed and pid != self.pid and process_alive(pid):
+                self.block.close()
+                raise RuntimeError(f"Live channel '{name}' is already published by process {pid}; "
+                                   f"choose another channel name")
+            # Left over from an earlier run: continue its generation sequence
+            self.generation = generation + generation % 2
+        self.capacity = self.block.size - HEADER.size
+        # Generation 0 (nothing published) until the first snapshot is written
+        HEADER.pack_into(self.block.buf, 0, 0, 0, 0, self.pid)
+
+    def _grow(self, size):
+        """Replace the block by one with room for twice size bytes"""
+        self._release()
+        capacity = max(2 * size, self.capacity)
+        try:
+            self.block = shared_memory.SharedMemory(name=self.name, create=True,
+                                                    size=HEADER.size + capacity)
+        except FileExistsError:
+            # Another publisher created the name between unlink and create
+            raise RuntimeError(f"Live channel '{self.name}' was taken over while growing it")
+        self.capacity = self.block.size - HEADER.size
+        HEADER.pack_into(self.block.buf, 0, 0, 0, 0, self.pid)
+
+    def publish(self, system_df, loss_df):
+        """Publish a new snapshot and return its generation number"""
+        payload = pickle.dumps({'system': system_df, 'losses': loss_df,
+                                'published_at': time.time()},
+                               protocol=pickle.HIGHEST_PROTOCOL)
+        if len(payload) > self.capacity:
+            self._grow(len(payload))
+
+        buf = self.block.buf
+        HEADER.pack_into(buf, 0, self.generation + 1, 0, 0, self.pid)
+        buf[HEADER.size:HEADER.size + len(payload)] = payload
+        self.generation += 2
+        HEADER.pack_into(buf, 0, self.generation, len(payload), 0, self.pid)
+        return self.generation // 2
+
+    def _release(self):
+        """Mark the block closed (subscribers detach) and remove it"""
+        generation, length, _, _ = HEADER.unpack_from(self.block.buf, 0)
+        HEADER.pack_into(self.block.buf, 0, generation, length, 1, self.pid)
+        self.block.close()
+        try:
+            self.block.unlink()
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        """Mark the channel closed and release it"""
+        self._release()
+
+class LiveSubscriber:
+    """Reads snapshots from the shared-memory channel
+
+    Raises FileNotFoundError when no publisher has created the channel.
+    """
+
+    def __init__(self, name=CHANNEL_NAME):
+        self.block = _attach(name)
+
+    def generation(self):
+        """Generation of the latest complete snapshot (0 = nothing published yet)"""
+        generation = HEADER.unpack_from(self.block.buf, 0)[0]
+        return generation // 2
+
+    def closed(self):
+        """True once the publisher shut the channel down"""
+        return bool(HEADER.unpack_from(self.block.buf, 0)[2])
+
+    def read(self, retries=100):
+        """Return (generation, snapshot dict) of the latest consistent snapshot"""
+        buf = self.block.buf
+        for _ in range(retries):
+            before, length, _, _ = HEADER.unpack_from(buf, 0)
+            if before % 2 == 0:
+                payload = bytes(buf[HEADER.size:HEADER.size + length])
+                after = HEADER.unpack_from(buf, 0)[0]
+                if before == after:
+                    if length == 0:
+                        return before // 2, None
+                    return before // 2, pickle.loads(payload)
+            time.sleep(0.001)
+        raise TimeoutError("Live channel kept changing while reading")
+
+    def wait_for_new(self, last_generation, timeout, poll_interval=0.05):
+        """Block until a generation newer than last_generation appears
+
+        Returns the new generation, or None after timeout seconds.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            generation = self.generation()
+            if generation > last_generation:
+                return generation
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            time.sleep(min(poll_interval, remaining))
+
+    def close(self):
+        self.block.close()
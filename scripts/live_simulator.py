@@ -1,80 +1,345 @@
 """
 LIVE DATA SIMULATOR
 Simulates real-time changes in power system
+
+Runs a seeded random walk at any tick rate (5 s by default, hundreds of ticks
+per second for load testing) or replays recorded telemetry at a speed-up:
+
+    python scripts/live_simulator.py --seed 42 --interval 0.005 --ticks 10000 --no-files
+    python scripts/live_simulator.py --seed 42 --record data/telemetry.csv
+    python scripts/live_simulator.py --replay data/telemetry.csv --speed 100
 """
 import pandas as pd
 import numpy as np
+import argparse
+import os
 import time
+import sys
 from datetime import datetime
 
-print("=" * 60)
-print("🔄 LIVE DATA SIMULATOR FOR POWER SYSTEM")
-print("=" * 60)
+sys.path.append('.')
+from scripts import metrics
+from scripts.anomaly_detector import ALERT_LOG, AnomalyDetector
+from scripts.columnar_store import read_table
+from scripts.incremental_losses import IncrementalLossModel
+from scripts.history_store import HISTORY_DIR, HistoryWriter
+from scripts.live_channel import CHANNEL_NAME, LivePublisher
+from scripts.live_snapshots import COLUMNAR_MIN_ROWS, LIVE_DIR, SnapshotWriter, snapshot_paths
+
+TELEMETRY_COLUMNS = ['timestamp', 'line_id', 'load_kw', 'power_factor']
+
+class LoadGenerator:
+    """Seeded, vectorized random walk of every line's load and power factor
+
+    The walk runs on unrounded state and only the values handed out are
+    rounded (load to 0.1 kW, power factor to 0.001), so rounding never feeds
+    back into the walk and the same seed always gives the same sequence.
+    """
+
+    def __init__(self, system_df, seed=None, load_step=0.05, pf_step=0.02,
+                 update_fraction=1.0, round_output=True):
+        self.rng = np.random.default_rng(seed)
+        self.load_kw = system_df['load_kw'].to_numpy(dtype=float).copy()
+        self.power_factor = system_df['power_factor'].to_numpy(dtype=float).copy()
+        self.load_step = load_step
+        self.pf_step = pf_step
+        self.update_fraction = update_fraction
+        self.round_output = round_output
+
+    def step(self):
+        """Advance one tick and return the (load_kw, power_factor) arrays to publish"""
+        n = len(self.load_kw)
+
+        # Lines without new telemetry this tick keep their values
+        if self.update_fraction < 1.0:
+            rows = np.flatnonzero(self.rng.random(n) < self.update_fraction)
+        else:
+            rows = slice(None)
+        count = n if isinstance(rows, slice) else len(rows)
+
+        # Small random variations, power factor kept between 0.75 and 0.95
+        self.load_kw[rows] *= 1 + self.rng.uniform(-self.load_step, self.load_step, count)
+        self.power_factor[rows] = np.clip(
+            self.power_factor[rows] + self.rng.uniform(-self.pf_step, self.pf_step, count), 0.75, 0.95)
+        return self.values()
+
+    def values(self):
+        """Current (load_kw, power_factor), rounded for readability unless disabled"""
+        if not self.round_output:
+            return self.load_kw.copy(), self.power_factor.copy()
+        return np.round(self.load_kw, 1), np.round(self.power_factor, 3)
+
+def publish_tick(df, model, changed, snapshots=None, history=None, channel=None,
+                 timestamp=None, record_file=None, detector=None, component='live_simulator'):
+    """Send the current state to every configured sink
+
+    Sinks set to None are skipped: the shared-memory channel, the on-disk
+    live snapshots (a SnapshotWriter), the history store, a telemetry
+    recording of the changed lines and the anomaly detector (which checks
+    the changed lines and logs new alerts). Stage timings are recorded
+    under the metrics component.
+    """
+    timestamp = time.time() if timestamp is None else timestamp
+    loss_df = model.loss_table() if channel or snapshots else None
+
+    # Push the snapshot to subscribers, then commit the file fallback
+    if channel:
+        with metrics.timed(component, 'publish'):
+            channel.publish(df, loss_df)
+    if snapshots:
+        with metrics.timed(component, 'write_files', rows=len(df)):
+            generation = snapshots.write(df, loss_df, timestamp)
+        for path in snapshot_paths(generation, snapshots.root):
+            metrics.count_bytes(component, 'written', path)
+
+    # Record the tick in the history store
+    if history:
+        with metrics.timed(component, 'history', rows=len(df)):
+            history.append(timestamp, df['line_id'], model.results['total_losses_kw'],
+                           model.results['current_amps'], model.results['voltage_drop_v'])
 
-def simulate_live_data():
+    if detector:
+        with metrics.timed(component, 'detect', rows=len(changed)):
+            detector.observe(timestamp, changed, model.results)
+
+    if record_file and len(changed):
+        pd.DataFrame({
+            'timestamp': timestamp,
+            'line_id': df['line_id'].to_numpy()[changed],
+            'load_kw': df['load_kw'].to_numpy()[changed],
+            'power_factor': df['power_factor'].to_numpy()[changed]
+        }, columns=TELEMETRY_COLUMNS).to_csv(record_file, mode='a', index=False,
+                                             header=not os.path.exists(record_file))
+
+def simulation_tick(df, model, generator, snapshots=None, history=None, channel=None,
+                    record_file=None, detector=None, component='live_simulator'):
+    """Advance the generator one tick, recalculate the changed lines and publish them
+
+    df is updated in place and stage timings are recorded under the metrics
+    component. Returns the row positions whose losses were recalculated.
+    """
+    with metrics.timed(component, 'perturb', rows=len(df)):
+        load_kw, power_factor = generator.step()
+        df['load_kw'] = load_kw
+        df['power_factor'] = power_factor
+
+    # Recalculate only the lines that changed
+    with metrics.timed(component, 'recalculate'):
+        changed = model.update(load_kw, power_factor)
+    metrics.count_rows(component, 'recalculate', len(changed))
+
+    publish_tick(df, model, changed, snapshots, history, channel, record_file=record_file,
+                 detector=detector, component=component)
+    return changed
+
+def simulate_live_data(live_dir=LIVE_DIR, update_fraction=1.0, history_dir=HISTORY_DIR,
+                       publish=True, seed=None, interval=5.0, max_ticks=None,
+                       record_file=None, columnar=None, alert_log=ALERT_LOG,
+                       channel_name=CHANNEL_NAME):
+    """Perturb the system every interval seconds and recalculate live losses
+
+    Losses are kept in memory and only lines whose load or power factor
+    changed are recalculated. update_fraction is the share of lines that
+    report new values each tick. Each tick is committed as one atomic
+    snapshot of both tables under live_dir (None skips the files; columnar
+    picks their format, see SnapshotWriter). Every tick is also
+    recorded in the history store at history_dir (None disables it) and,
+    with publish=True, pushed to the dashboard over the shared-memory live
+    channel channel_name. A seed makes the run reproducible; ticks follow a fixed
+    schedule, so short intervals give a steady high tick rate. record_file
+    appends each tick's changed inputs as telemetry that replay_telemetry
+    can play back. Changed lines are checked for anomalies, which are
+    appended to alert_log (None disables the detector).
+    """
     # Load original data
-    df = pd.read_csv('data/power_system.csv')
-    
+    df = read_table('data/power_system.csv')
+
     print("Original data loaded:")
     print(df[['line_id', 'area_name', 'load_kw', 'power_factor']])
     print()
-    
+
+    # Loss results stay in memory between ticks
+    model = IncrementalLossModel(df)
+    generator = LoadGenerator(df, seed, update_fraction=update_fraction)
+    snapshots = SnapshotWriter(live_dir, columnar) if live_dir else None
+    history = HistoryWriter(history_dir) if history_dir else None
+    channel = LivePublisher(channel_name) if publish else None
+    detector = AnomalyDetector(df['line_id'], alert_log=alert_log) if alert_log else None
+
+    # At high tick rates only print about once per second
+    report_every = max(1, int(1 / interval)) if interval > 0 else 1000
+
     # Create variations
     variation_count = 0
-    
+    started = time.monotonic()
+
     try:
-        while True:
+        while max_ticks is None or variation_count < max_ticks:
             # Get current time
             current_time = datetime.now().strftime("%H:%M:%S")
-            
-            # Create small random variations (±5%)
-            load_variation = 1 + np.random.uniform(-0.05, 0.05, len(df))
-            pf_variation = np.random.uniform(-0.02, 0.02, len(df))
-            
-            # Apply variations
-            df['load_kw'] = df['load_kw'] * load_variation
-            df['power_factor'] = df['power_factor'] + pf_variation
-            
-            # Keep power factor between 0.75 and 0.95
-            df['power_factor'] = df['power_factor'].clip(0.75, 0.95)
-            
-            # Round values for readability
-            df['load_kw'] = df['load_kw'].round(1)
-            df['power_factor'] = df['power_factor'].round(3)
-            
-            # Save to new file
-            df.to_csv('data/power_system_live.csv', index=False)
-            
-            # Run calculations
-            import sys
-            import os
-            sys.path.append('.')
-            
-            # Import and run calculation function
-            from scripts.calculate_losses import calculate_and_save
-            
-            # Call calculation (we'll modify calculate_losses.py)
-            calculate_and_save('data/power_system_live.csv', 'data/loss_calculations_live.csv')
-            
-            print(f"[{current_time}] Variation {variation_count+1}:")
-            print(f"   Line 1 Load: {df.iloc[0]['load_kw']:.1f} kW (was 850 kW)")
-            print(f"   Line 1 PF: {df.iloc[0]['power_factor']:.3f} (was 0.850)")
-            print()
-            
+            metrics.tick('live_simulator', interval)
+
+            changed = simulation_tick(df, model, generator, snapshots, history, channel,
+                                      record_file, detector)
+            metrics.publish('live_simulator')
+
+            if variation_count % report_every == 0:
+                rate = (variation_count + 1) / max(time.monotonic() - started, 1e-9)
+                print(f"[{current_time}] Variation {variation_count+1}:")
+                print(f"   Line 1 Load: {df.iloc[0]['load_kw']:.1f} kW (was 850 kW)")
+                print(f"   Line 1 PF: {df.iloc[0]['power_factor']:.3f} (was 0.850)")
+                print(f"   Recalculated {len(changed)} of {len(df)} lines | "
+                      f"System Losses: {model.total_losses_kw:,.1f} kW | {rate:,.1f} ticks/s")
+                if detector:
+                    print(f"   🚨 Alerts raised: {detector.alerts_raised:,} | "
+                          f"Active: {detector.active_counts()}")
+                print()
+
             variation_count += 1
-            time.sleep(5)  # Update every 5 seconds
-            
+
+            # Fixed schedule: a slow tick shortens the next wait instead of drifting
+            delay = started + variation_count * interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+        print(f"Total variations simulated: {variation_count}")
+
     except KeyboardInterrupt:
         print("\n\n⏹️ Simulation stopped by user")
         print(f"Total variations simulated: {variation_count}")
+    finally:
+        if snapshots:
+            snapshots.close()
+        if history:
+            history.close()
+        if channel:
+            channel.close()
+    return df
+
+def epoch_seconds(timestamps):
+    """Telemetry timestamps (epoch seconds or date strings, naive ones taken as UTC) as epoch seconds
+
+    Works at any datetime resolution (pandas 2 parses to ns, pandas 3 to us).
+    """
+    if pd.api.types.is_numeric_dtype(timestamps):
+        return timestamps.astype(float)
+    return (pd.to_datetime(timestamps, utc=True) - pd.Timestamp(0, tz='UTC')) / pd.Timedelta(seconds=1)
+
+def replay_telemetry(telemetry_file, speed=100.0, live_dir=LIVE_DIR, history_dir=None,
+                     publish=True, columnar=None, alert_log=ALERT_LOG, channel_name=CHANNEL_NAME):
+    """Play recorded telemetry back through the live pipeline, speed times faster
+
+    The telemetry table has timestamp (epoch seconds or date strings),
+    line_id, load_kw and power_factor columns; rows sharing a timestamp form
+    one tick. Recorded gaps are kept, divided by speed. Replayed ticks go to
+    the history store only when history_dir is given; anomalies are checked
+    on the recorded clock and logged to alert_log (None disables them).
+    """
+    df = read_table('data/power_system.csv')
+    telemetry = read_table(telemetry_file, dtype={'line_id': str})
+
+    timestamps = epoch_seconds(telemetry['timestamp']).to_numpy(dtype=float)
+    rows = pd.Index(df['line_id'].astype(str)).get_indexer(telemetry['line_id'])
+
+    known = rows >= 0
+    if not known.all():
+        print(f"⚠️  Skipping {int((~known).sum()):,} telemetry rows for unknown lines")
+    order = np.argsort(timestamps[known], kind='stable')
+    timestamps = timestamps[known][order]
+    rows = rows[known][order]
+    load_kw = telemetry['load_kw'].to_numpy(dtype=float)[known][order]
+    power_factor = telemetry['power_factor'].to_numpy(dtype=float)[known][order]
+
+    bounds = np.concatenate([[0], np.flatnonzero(np.diff(timestamps)) + 1, [len(timestamps)]])
+    ticks = len(bounds) - 1
+    if ticks <= 0:
+        print("No telemetry to replay")
         return df
+    print(f"▶️  Replaying {ticks:,} ticks ({timestamps[-1] - timestamps[0]:,.0f} s recorded) at {speed:g}×")
+
+    model = IncrementalLossModel(df)
+    snapshots = SnapshotWriter(live_dir, columnar) if live_dir else None
+    history = HistoryWriter(history_dir) if history_dir else None
+    channel = LivePublisher(channel_name) if publish else None
+    detector = AnomalyDetector(df['line_id'], alert_log=alert_log) if alert_log else None
+    started = time.monotonic()
+
+    try:
+        for tick in range(ticks):
+            start, end = bounds[tick], bounds[tick + 1]
+
+            # Wait until this tick is due on the accelerated clock
+            delay = started + (timestamps[start] - timestamps[0]) / speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+
+            with metrics.timed('live_simulator', 'recalculate', rows=end - start):
+                changed = model.apply(rows[start:end], load_kw[start:end], power_factor[start:end])
+                df = model.system_table()
+            publish_tick(df, model, changed, snapshots, history, channel,
+                         timestamp=timestamps[start], detector=detector)
+            metrics.publish('live_simulator')
+
+            if tick % 100 == 0 or tick == ticks - 1:
+                recorded = datetime.fromtimestamp(timestamps[start]).strftime('%Y-%m-%d %H:%M:%S')
+                alerts = f" | 🚨 Alerts: {detector.alerts_raised:,}" if detector else ""
+                print(f"[{recorded}] Tick {tick + 1:,}/{ticks:,} | "
+                      f"System Losses: {model.total_losses_kw:,.1f} kW{alerts}")
+
+    except KeyboardInterrupt:
+        print("\n\n⏹️ Replay stopped by user")
+    finally:
+        if snapshots:
+            snapshots.close()
+        if history:
+            history.close()
+        if channel:
+            channel.close()
+    return df
 
 if __name__ == "__main__":
-    print("Starting simulation... Press Ctrl+C to stop")
-    print()
-    final_data = simulate_live_data()
-    
+    parser = argparse.ArgumentParser(description="Live power system simulator")
+    parser.add_argument('--seed', type=int, default=None, help="make the random walk reproducible")
+    parser.add_argument('--interval', type=float, default=5.0, help="seconds between ticks")
+    parser.add_argument('--ticks', type=int, default=None, help="stop after this many ticks")
+    parser.add_argument('--update-fraction', type=float, default=1.0,
+                        help="share of lines that change each tick")
+    parser.add_argument('--record', default=None, help="append each tick's inputs to this telemetry CSV")
+    parser.add_argument('--replay', default=None, help="replay this telemetry file instead of simulating")
+    parser.add_argument('--speed', type=float, default=100.0, help="replay speed-up factor")
+    parser.add_argument('--no-files', action='store_true', help="don't write live snapshots to disk")
+    parser.add_argument('--columnar', action='store_const', const=True, default=None,
+                        help="always write live snapshots in columnar format "
+                             f"(default: from {COLUMNAR_MIN_ROWS:,} lines)")
+    parser.add_argument('--csv', dest='columnar', action='store_const', const=False,
+                        help="always write live snapshots as CSV")
+    parser.add_argument('--no-history', action='store_true', help="don't record to the history store")
+    parser.add_argument('--no-publish', action='store_true', help="don't publish on the live channel")
+    parser.add_argument('--channel', default=CHANNEL_NAME, help="shared-memory live channel name")
+    parser.add_argument('--no-alerts', action='store_true', help="don't run the anomaly detector")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🔄 LIVE DATA SIMULATOR FOR POWER SYSTEM")
+    print("=" * 60)
+
+    live_dir = None if args.no_files else LIVE_DIR
+    alert_log = None if args.no_alerts else ALERT_LOG
+    if args.replay:
+        final_data = replay_telemetry(args.replay, args.speed, live_dir, publish=not args.no_publish,
+                                      columnar=args.columnar, alert_log=alert_log,
+                                      channel_name=args.channel)
+    else:
+        print("Starting simulation... Press Ctrl+C to stop")
+        print()
+        final_data = simulate_live_data(live_dir, update_fraction=args.update_fraction,
+                                        history_dir=None if args.no_history else HISTORY_DIR,
+                                        publish=not args.no_publish, seed=args.seed,
+                                        interval=args.interval, max_ticks=args.ticks,
+                                        record_file=args.record, columnar=args.columnar,
+                                        alert_log=alert_log, channel_name=args.channel)
+
     print("\n" + "=" * 60)
     print("📊 FINAL SIMULATED DATA:")
     print("=" * 60)
-    print(final_data[['line_id', 'area_name', 'load_kw', 'power_factor']])
\ No newline at end of file
+    print(final_data[['line_id', 'area_name', 'load_kw', 'power_factor']])
@@ -0,0 +1,185 @@
+"""
+LIVE SNAPSHOTS
+Atomic, generation-numbered snapshots of the live system and loss tables
+
+Layout under the snapshot root (data/live by default):
+
+    CURRENT                 generation number of the latest complete snapshot
+    000000000042/           one directory per generation
+        manifest.json       generation, timestamp, rows, table file names
+        power_system.csv    (.cols for tables of COLUMNAR_MIN_ROWS lines or more)
+        loss_calculations.csv
+
+A writer builds the next generation in a temporary directory, renames it into
+place and only then replaces CURRENT (os.replace is atomic), so a reader that
+follows CURRENT always gets both tables of the same tick, fully written.
+Readers compare the CURRENT number with the one they loaded last and skip
+parsing when it hasn't moved. The newest KEEP_GENERATIONS directories are
+kept so a slow reader can finish the one it started on.
+
+Only one writer may publish into a snapshot root: the OWNER file holds the
+writer's process id, and a second writer refuses to start while that process
+is running. Give concurrent writers (e.g. the simulator and the ingest
+service) different roots.
+"""
+import json
+import os
+import shutil
+import sys
+import time
+
+sys.path.append('.')
+from scripts.columnar_store import read_table, write_table
+from scripts.live_channel import process_alive
+
+LIVE_DIR = 'data/live'
+KEEP_GENERATIONS = 3
+CURRENT_FILE = 'CURRENT'
+MANIFEST_FILE = 'manifest.json'
+OWNER_FILE = 'OWNER'
+
+# Larger tables are written in columnar format: re-serializing CSV every tick
+# takes seconds at 100k+ lines, longer than the tick itself
+COLUMNAR_MIN_ROWS = 10_000
+
+def _generation_dir(root, generation):
+    return os.path.join(root, f"{generation:012d}")
+
+def claim_directory(root, description):
+    """Make this process the only writer of root (its OWNER file holds the process id)
+
+    The OWNER file of a process that has exited is replaced. Raises
+    RuntimeError when another running process owns root.
+    """
+    owner_file = os.path.join(root, OWNER_FILE)
+    while True:
+        try:
+            fd = os.open(owner_file, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                with open(owner_file) as f:
+                    pid = int(f.read().strip() or 0)
+            except (FileNotFoundError, ValueError):
+                pid = 0
+            if pid and pid != os.getpid() and process_alive(pid):
+                raise RuntimeError(f"{description} directory '{root}' is already written by process "
+                                   f"{pid}; choose another directory")
+            # Left over from an earlier run
+            try:
+                os.remove(owner_file)
+            except FileNotFoundError:
+                pass
+            continue
+        with os.fdopen(fd, 'w') as f:
+            f.write(str(os.getpid()))
+        return
+
+def release_directory(root):
+    """Give up ownership of root if this process holds it"""
+    owner_file = os.path.join(root, OWNER_FILE)
+    try:
+        with open(owner_file) as f:
+            owner = f.read().strip()
+        if owner == str(os.getpid()):
+            os.remove(owner_file)
+    except FileNotFoundError:
+        pass
+
+def current_generation(root=LIVE_DIR):
+    """Generation of the latest complete snapshot (0 = none published yet)"""
+    try:
+        with open(os.path.join(root, CURRENT_FILE)) as f:
+            return int(f.read().strip() or 0)
+    except FileNotFoundError:
+        return 0
+
+class SnapshotWriter:
+    """Publishes system + loss tables as one atomic snapshot per tick
+
+    columnar=None picks the format per snapshot (columnar from
+    COLUMNAR_MIN_ROWS lines); True or False always uses columnar or CSV.
+    Raises RuntimeError when another running process writes into root.
+    """
+
+    def __init__(self, root=LIVE_DIR, columnar=None, keep=KEEP_GENERATIONS):
+        self.root = root
+        self.columnar = columnar
+        self.keep = max(1, keep)
+        os.makedirs(root, exist_ok=True)
+        claim_directory(root, 'Live snapshot')
+
+        # Continue the sequence of an earlier run so readers never see it go back
+        self.generation = current_generation(root)
+        for name in os.listdir(root):
+            if name.isdigit():
+                self.generation = max(self.generation, int(name))
+            elif name.startswith('.tmp-'):
+                shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+    def write(self, system_df, loss_df, timestamp=None):
+        """Commit both tables as the next generation and return its number"""
+        generation = self.generation + 1
+        columnar = len(system_df) >= COLUMNAR_MIN_ROWS if self.columnar is None else self.columnar
+        extension = '.cols' if columnar else '.csv'
+        files = {'system': 'power_system' + extension,
+                 'losses': 'loss_calculations' + extension}
+
+        tmp_dir = os.path.join(self.root, f".tmp-{generation:012d}-{os.getpid()}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        write_table(system_df, os.path.join(tmp_dir, files['system']))
+        write_table(loss_df, os.path.join(tmp_dir, files['losses']))
+        with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w') as f:
+            json.dump({'generation': generation,
+                       'published_at': time.time() if timestamp is None else timestamp,
+                       'rows': len(system_df), 'files': files}, f)
+        os.rename(tmp_dir, _generation_dir(self.root, generation))
+
+        # The snapshot becomes visible only here
+        tmp_current = os.path.join(self.root, f"{CURRENT_FILE}.{os.getpid()}.tmp")
+        with open(tmp_current, 'w') as f:
+            f.write(str(generation))
+        os.replace(tmp_current, os.path.join(self.root, CURRENT_FILE))
+
+        self.generation = generation
+        self._prune()
+        return generation
+
+    def close(self):
+        """Give up ownership of root (the published snapshots stay)"""
+        release_directory(self.root)
+
+    def _prune(self):
+        """Delete generations older than the newest keep ones"""
+        oldest_kept = self.generation - self.keep + 1
+        for name in os.listdir(self.root):
+            if name.isdigit() and int(name) < oldest_kept:
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+
+def snapshot_paths(generation, root=LIVE_DIR):
+    """(system, losses) table paths of a generation, from its manifest"""
+    directory = _generation_dir(root, generation)
+    with open(os.path.join(directory, MANIFEST_FILE)) as f:
+        files = json.load(f)['files']
+    return os.path.join(directory, files['system']), os.path.join(directory, files['losses'])
+
+def read_snapshot(root=LIVE_DIR, generation=None, retries=5, reader=None, **csv_kwargs):
+    """Return (generation, system_df, loss_df) of one complete snapshot
+
+    Reads the latest generation unless one is given. If the generation is
+    pruned while being read, the latest one is tried instead. reader, if
+    given, loads (system_df, loss_df) from the two table paths. Raises
+    FileNotFoundError when nothing was published yet.
+    """
+    for _ in range(retries):
+        generation = generation or current_generation(root)
+        if generation == 0:
+            raise FileNotFoundError(os.path.join(root, CURRENT_FILE))
+        try:
+            system_path, loss_path = snapshot_paths(generation, root)
+            if reader is not None:
+                return (generation,) + tuple(reader(system_path, loss_path))
+            return generation, read_table(system_path, **csv_kwargs), read_table(loss_path, **csv_kwargs)
+        except FileNotFoundError:
+            generation = None
+    raise FileNotFoundError(f"No stable snapshot in {root} after {retries} attempts")
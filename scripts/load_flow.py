@@ -0,0 +1,183 @@
+"""
+RADIAL LOAD FLOW
+Backward/forward sweep solver for multi-segment radial feeders
+
+The topology file lists, for every line_id in power_system.csv, the line it
+hangs off (parent_line_id; empty = fed straight from the 11 kV substation
+bus). Each line is a branch ending in a bus that carries its load_kw /
+power_factor. Lines with no parent and no children are solved with the
+per-line formula from calculate_losses.py, exactly as before.
+
+    python scripts/load_flow.py data/power_system.csv data/topology.csv data/loss_calculations_radial.csv
+"""
+import math
+import sys
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.sparse.linalg import splu
+
+sys.path.append('.')
+from scripts.calculate_losses import (ID_DTYPES, RESULT_COLUMNS, SYSTEM_VOLTAGE,
+                                      calculate_losses_vectorized, round_like_python)
+from scripts.columnar_store import read_table, write_table
+
+RADIAL_COLUMNS = RESULT_COLUMNS + ['bus_voltage_kv']
+
+def _parent_positions(system_df, topology_df):
+    """Row position of each line's parent (-1 for lines fed from the substation)"""
+    repeated = topology_df['line_id'][topology_df['line_id'].duplicated()]
+    if len(repeated):
+        listed = repeated.unique()[:5]
+        raise ValueError(f"Line listed more than once in topology: {', '.join(map(str, listed))}")
+    parents = system_df[['line_id']].merge(topology_df[['line_id', 'parent_line_id']],
+                                           on='line_id', how='left')['parent_line_id']
+    has_parent = parents.notna() & (parents.astype(str).str.len() > 0)
+    positions = pd.Index(system_df['line_id']).get_indexer(parents.where(has_parent))
+    unknown = has_parent.to_numpy() & (positions < 0)
+    if unknown.any():
+        missing = parents[unknown].unique()[:5]
+        raise ValueError(f"Unknown parent_line_id in topology: {', '.join(map(str, missing))}")
+    return np.where(has_parent.to_numpy(), positions, -1)
+
+def _triangular_solvers(parent):
+    """Solvers for (I - A) x = b and (I - A)^T x = b, A[parent, child] = 1
+
+    The first accumulates child values into parents (backward sweep), the
+    second pushes parent values down to children (forward sweep).
+    """
+    n = len(parent)
+    children = np.flatnonzero(parent >= 0)
+    incidence = sparse.csc_matrix((np.ones(len(children)), (parent[children], children)),
+                                  shape=(n, n))
+    matrix = (sparse.identity(n, format='csc') - incidence).tocsc()
+    try:
+        backward = splu(matrix)
+        forward = splu(matrix.T.tocsc())
+    except RuntimeError:
+        raise ValueError("Topology is not radial (it contains a loop)")
+
+    def solve(lu, rhs):
+        # Factors are real; solve real and imaginary parts separately
+        if np.iscomplexobj(rhs):
+            return lu.solve(rhs.real) + 1j * lu.solve(rhs.imag)
+        return lu.solve(rhs)
+
+    return (lambda rhs: solve(backward, rhs)), (lambda rhs: solve(forward, rhs))
+
+def solve_radial(system_df, topology_df, max_iterations=50, tolerance_v=1e-3):
+    """Solve bus voltages, branch currents and losses of radial feeders
+
+    Returns a DataFrame with the loss_calculations.csv columns plus
+    bus_voltage_kv (line-to-line). For feeder branches current_amps is the
+    branch current, voltage_drop_v the per-phase drop from the substation and
+    loss_percentage is relative to the load supplied through the branch.
+    results.attrs holds 'iterations' and 'converged'.
+    """
+    system_df = system_df.reset_index(drop=True)
+    parent = _parent_positions(system_df, topology_df)
+    has_children = np.zeros(len(system_df), dtype=bool)
+    has_children[parent[parent >= 0]] = True
+    isolated = (parent < 0) & ~has_children
+
+    # Single-segment lines keep the per-line formula
+    results = calculate_losses_vectorized(system_df)
+    results['bus_voltage_kv'] = round_like_python(
+        SYSTEM_VOLTAGE - math.sqrt(3) * results['voltage_drop_v'].to_numpy() / 1000)
+    results.attrs.update(iterations=0, converged=True)
+
+    feeder = np.flatnonzero(~isolated)
+    if len(feeder) == 0:
+        return results
+
+    lines = system_df.iloc[feeder]
+    remap = np.full(len(system_df), -1)
+    remap[feeder] = np.arange(len(feeder))
+    feeder_parent = np.where(parent[feeder] >= 0, remap[np.maximum(parent[feeder], 0)], -1)
+    backward, forward = _triangular_solvers(feeder_parent)
+
+    load_kw = lines['load_kw'].to_numpy(dtype=float)
+    power_factor = lines['power_factor'].to_numpy(dtype=float)
+    length = lines['line_length_km'].to_numpy(dtype=float)
+    impedance = (lines['resistance_ohm_km'].to_numpy(dtype=float) * length +
+                 1j * lines['reactance_ohm_km'].to_numpy(dtype=float) * length)
+
+    # Per-phase quantities, constant-power loads
+    source_v = SYSTEM_VOLTAGE * 1000 / math.sqrt(3)
+    load_va = (load_kw * 1000 / 3) * (1 + 1j * np.tan(np.arccos(power_factor)))
+    fed_from_source = np.where(feeder_parent < 0, source_v, 0.0)
+
+    voltage = np.full(len(feeder), source_v, dtype=complex)
+    converged = False
+    for iteration in range(1, max_iterations + 1):
+        load_current = np.conj(load_va / voltage)
+        branch_current = backward(load_current)
+        new_voltage = forward(fed_from_source - impedance * branch_current)
+        change = np.max(np.abs(new_voltage - voltage))
+        voltage = new_voltage
+        if change < tolerance_v:
+            converged = True
+            break
+
+    current_amps = np.abs(branch_current)
+    line_losses_kw = 3 * current_amps ** 2 * impedance.real / 1000
+    transformer_losses_kw = load_kw * (1 - lines['transformer_efficiency'].to_numpy(dtype=float))
+    total_losses_kw = line_losses_kw + transformer_losses_kw
+    supplied_kw = backward(load_kw)
+    loss_percentage = total_losses_kw / supplied_kw * 100
+
+    feeder_results = {
+        'current_amps': current_amps,
+        'line_losses_kw': line_losses_kw,
+        'transformer_losses_kw': transformer_losses_kw,
+        'total_losses_kw': total_losses_kw,
+        'loss_percentage': loss_percentage,
+        'voltage_drop_v': source_v - np.abs(voltage),
+        'efficiency': 100 - loss_percentage,
+        'bus_voltage_kv': np.abs(voltage) * math.sqrt(3) / 1000
+    }
+    for column, values in feeder_results.items():
+        results.loc[feeder, column] = round_like_python(values)
+
+    results.attrs.update(iterations=iteration, converged=converged)
+    return results
+
+def solve_and_save(input_file='data/power_system.csv', topology_file='data/topology.csv',
+                   output_file='data/loss_calculations_radial.csv'):
+    """Run the radial load flow on a system file and save the results
+
+    Returns None (and writes nothing) if the sweep doesn't converge.
+    """
+    try:
+        system_df = read_table(input_file, dtype=ID_DTYPES)
+        topology_df = read_table(topology_file, dtype={'line_id': str, 'parent_line_id': str})
+        print(f"📖 Reading data from: {input_file} and {topology_file}")
+        print(f"   Found {len(system_df)} line segments")
+
+        results = solve_radial(system_df, topology_df)
+        if not results.attrs['converged']:
+            # A divergent sweep is no solution: don't leave it for downstream stages
+            print(f"❌ Error: Load flow did NOT converge in {results.attrs['iterations']} iterations; "
+                  f"results not saved")
+            return None
+        print(f"🔁 Load flow converged in {results.attrs['iterations']} iterations")
+
+        write_table(results, output_file)
+        print(f"💾 Results saved to: {output_file}")
+        return results
+
+    except FileNotFoundError as e:
+        print(f"❌ Error: Could not find {e.filename}")
+        return None
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+        return None
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("⚡ RADIAL FEEDER LOAD FLOW")
+    print("=" * 60)
+
+    if solve_and_save(*sys.argv[1:4]) is None:
+        sys.exit(1)
@@ -0,0 +1,203 @@
+"""
+PIPELINE METRICS
+Stage timings, row/byte counters and tick lag in Prometheus text format
+
+Disabled unless one of these environment variables is set:
+
+    GRIDWATCH_METRICS_DIR    write <dir>/<component>.prom after each run/tick
+                             (node_exporter textfile collector layout)
+    GRIDWATCH_METRICS_PORT   serve http://127.0.0.1:<port>/metrics
+
+When disabled every call returns immediately (timed() hands back a shared
+no-op context manager), so instrumented code pays one flag check.
+
+    with metrics.timed('calculate_losses', 'read_input', rows=len(df)):
+        ...
+    metrics.publish('calculate_losses')
+"""
+import contextlib
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_DIR = os.environ.get('GRIDWATCH_METRICS_DIR')
+METRICS_PORT = os.environ.get('GRIDWATCH_METRICS_PORT')
+ENABLED = bool(METRICS_DIR or METRICS_PORT)
+
+# Upper bounds (seconds) of the stage duration histogram buckets
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_NOOP = contextlib.nullcontext()
+_lock = threading.Lock()
+_durations = {}   # (component, stage) -> [bucket counts..., count, sum, max]
+_rows = {}        # (component, stage) -> rows processed
+_bytes = {}       # (component, direction) -> bytes read / written
+_ticks = {}       # component -> {'interval', 'lag', 'max_lag', 'count', 'last'}
+_server = None
+
+def observe(component, stage, seconds, rows=None):
+    """Record one stage duration (and optionally the rows it processed)"""
+    if not ENABLED:
+        return
+    with _lock:
+        series = _durations.setdefault((component, stage), [0] * (len(DURATION_BUCKETS) + 3))
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if seconds <= bound:
+                series[i] += 1
+        series[-3] += 1
+        series[-2] += seconds
+        series[-1] = max(series[-1], seconds)
+    if rows is not None:
+        count_rows(component, stage, rows)
+
+def count_rows(component, stage, rows):
+    """Add rows processed by a stage (when the count is only known afterwards)"""
+    if not ENABLED:
+        return
+    with _lock:
+        _rows[(component, stage)] = _rows.get((component, stage), 0) + int(rows)
+
+@contextlib.contextmanager
+def _timer(component, stage, rows):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(component, stage, time.perf_counter() - start, rows)
+
+def timed(component, stage, rows=None):
+    """Context manager timing one stage"""
+    if not ENABLED:
+        return _NOOP
+    return _timer(component, stage, rows)
+
+def table_bytes(path):
+    """Size on disk of a CSV file or column directory"""
+    from scripts.columnar_store import resolve_table
+    resolved = resolve_table(path)[1]
+    if os.path.isdir(resolved):
+        return sum(entry.stat().st_size for entry in os.scandir(resolved) if entry.is_file())
+    return os.path.getsize(resolved)
+
+def count_bytes(component, direction, path=None, size=None):
+    """Add the bytes of a table read or written ('read' / 'written')"""
+    if not ENABLED:
+        return
+    try:
+        size = table_bytes(path) if size is None else size
+    except OSError:
+        return
+    with _lock:
+        _bytes[(component, direction)] = _bytes.get((component, direction), 0) + size
+
+def tick(component, interval):
+    """Mark the start of a loop iteration configured to run every interval seconds
+
+    Lag is how much later than configured this tick started.
+    """
+    if not ENABLED:
+        return
+    now = time.monotonic()
+    with _lock:
+        state = _ticks.setdefault(component, {'interval': interval, 'lag': 0.0, 'max_lag': 0.0,
+                                              'count': 0, 'last': None})
+        if state['last'] is not None:
+            state['lag'] = max(0.0, now - state['last'] - interval)
+            state['max_lag'] = max(state['max_lag'], state['lag'])
+        state['interval'] = interval
+        state['count'] += 1
+        state['last'] = now
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{value}"' for name, value in labels.items()) + '}'
+
+def render():
+    """All metrics of this process in Prometheus text exposition format"""
+    lines = []
+    with _lock:
+        lines += ['# HELP gridwatch_stage_duration_seconds Duration of pipeline stages',
+                  '# TYPE gridwatch_stage_duration_seconds histogram']
+        for (component, stage), series in sorted(_durations.items()):
+            for bound, count in zip(DURATION_BUCKETS, series):
+                lines.append(f"gridwatch_stage_duration_seconds_bucket"
+                             f"{_labels(component=component, stage=stage, le=bound)} {count}")
+            lines.append(f"gridwatch_stage_duration_seconds_bucket"
+                         f"{_labels(component=component, stage=stage, le='+Inf')} {series[-3]}")
+            lines.append(f"gridwatch_stage_duration_seconds_count"
+                         f"{_labels(component=component, stage=stage)} {series[-3]}")
+            lines.append(f"gridwatch_stage_duration_seconds_sum"
+                         f"{_labels(component=component, stage=stage)} {series[-2]:.6f}")
+
+        lines += ['# HELP gridwatch_stage_duration_max_seconds Slowest run of each stage',
+                  '# TYPE gridwatch_stage_duration_max_seconds gauge']
+        for (component, stage), series in sorted(_durations.items()):
+            lines.append(f"gridwatch_stage_duration_max_seconds"
+                         f"{_labels(component=component, stage=stage)} {series[-1]:.6f}")
+
+        lines += ['# HELP gridwatch_stage_rows_total Rows processed by pipeline stages',
+                  '# TYPE gridwatch_stage_rows_total counter']
+        for (component, stage), rows in sorted(_rows.items()):
+            lines.append(f"gridwatch_stage_rows_total{_labels(component=component, stage=stage)} {rows}")
+
+        lines += ['# HELP gridwatch_bytes_total Bytes of data tables read or written',
+                  '# TYPE gridwatch_bytes_total counter']
+        for (component, direction), size in sorted(_bytes.items()):
+            lines.append(f"gridwatch_bytes_total{_labels(component=component, direction=direction)} {size}")
+
+        lines += ['# HELP gridwatch_tick_lag_seconds Delay of the latest tick past its configured interval',
+                  '# TYPE gridwatch_tick_lag_seconds gauge']
+        for component, state in sorted(_ticks.items()):
+            lines.append(f"gridwatch_tick_lag_seconds{_labels(component=component)} {state['lag']:.6f}")
+        lines += ['# TYPE gridwatch_tick_lag_max_seconds gauge']
+        for component, state in sorted(_ticks.items()):
+            lines.append(f"gridwatch_tick_lag_max_seconds{_labels(component=component)} {state['max_lag']:.6f}")
+        lines += ['# TYPE gridwatch_tick_interval_seconds gauge']
+        for component, state in sorted(_ticks.items()):
+            lines.append(f"gridwatch_tick_interval_seconds{_labels(component=component)} {state['interval']}")
+        lines += ['# TYPE gridwatch_ticks_total counter']
+        for component, state in sorted(_ticks.items()):
+            lines.append(f"gridwatch_ticks_total{_labels(component=component)} {state['count']}")
+    return '\n'.join(lines) + '\n'
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def _start_server():
+    """Serve /metrics on localhost from a daemon thread (once per process)"""
+    global _server
+    if _server is not None:
+        return
+    try:
+        _server = ThreadingHTTPServer(('127.0.0.1', int(METRICS_PORT)), _MetricsHandler)
+    except OSError as e:
+        print(f"⚠️  Metrics endpoint not started on port {METRICS_PORT}: {e}")
+        _server = False
+        return
+    threading.Thread(target=_server.serve_forever, daemon=True).start()
+
+def publish(component):
+    """Export the current metrics (textfile and/or HTTP endpoint)"""
+    if not ENABLED:
+        return
+    if METRICS_PORT:
+        _start_server()
+    if METRICS_DIR:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        path = os.path.join(METRICS_DIR, f"{component}.prom")
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(render())
+        os.replace(tmp_path, path)
@@ -0,0 +1,164 @@
+"""
+MONTE CARLO LOSS SCENARIOS
+Loss distributions from many randomized load / power factor scenarios
+
+Scenarios are evaluated as (scenarios x lines) matrices with the same
+formulas as calculate_losses_for_line, a block of lines at a time so memory
+stays bounded. Results are reproducible for a given seed, block size and
+precision; --precision float32 halves the memory of a block (so twice the
+lines fit per block) at a relative error of about 1e-6.
+
+    python scripts/monte_carlo.py --scenarios 20000 --seed 42
+    python scripts/monte_carlo.py --scenarios 100000 --precision float32
+"""
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+from scripts.calculate_losses import ID_DTYPES, PRECISIONS, loss_arrays
+from scripts.columnar_store import read_table, write_table
+
+# Same high-loss threshold simple_analytics uses
+LOSS_THRESHOLD_PCT = 3.5
+
+# Power factor bounds of the live simulators
+PF_MIN, PF_MAX = 0.75, 0.95
+
+# Upper bound on scenario x line values held in memory per block (float64)
+MAX_BLOCK_VALUES = 4_000_000
+
+def uniform(rng, low, high, size, dtype=np.float64):
+    """rng.uniform(low, high, size) drawn and scaled in place in dtype
+
+    Gives exactly rng.uniform's values in float64.
+    """
+    values = rng.random(size, dtype=dtype)
+    values *= high - low
+    values += low
+    return values
+
+def run_scenarios(system_df, n_scenarios=10_000, seed=None, load_spread=0.05,
+                  pf_spread=0.02, common_spread=0.0, threshold_pct=LOSS_THRESHOLD_PCT,
+                  max_block_values=MAX_BLOCK_VALUES, dtype=np.float64):
+    """Evaluate n_scenarios random variations of the system in vectorized blocks
+
+    Like the live simulator, every line's load is scaled by a uniform
+    ±load_spread factor and its power factor moves by ±pf_spread within
+    [PF_MIN, PF_MAX]. With common_spread > 0 all lines of a scenario are also
+    scaled by one shared factor (system-wide demand swings). seed=None draws
+    a fresh seed, reported in system_stats['seed']. Blocks are computed in
+    dtype, so float32 evaluates twice the lines per block in the same memory;
+    system totals are always accumulated in float64.
+
+    Returns (line_stats, system_stats): a DataFrame with per-line mean/P50/P95
+    losses and the probability of exceeding threshold_pct, and a dict of the
+    same statistics for the whole system.
+    """
+    system_df = system_df.reset_index(drop=True)
+    n_lines = len(system_df)
+    dtype = np.dtype(dtype)
+    block = max(1, max_block_values * 8 // dtype.itemsize // n_scenarios)
+    if seed is None:
+        seed = int(np.random.SeedSequence().entropy % 2**32)
+
+    common = 1 + np.random.default_rng([seed, 0]).uniform(-common_spread, common_spread, n_scenarios)
+    system_losses = np.zeros(n_scenarios)
+    system_load = np.zeros(n_scenarios)
+    stats = {name: np.empty(n_lines) for name in
+             ('mean_losses_kw', 'p50_losses_kw', 'p95_losses_kw',
+              'mean_loss_percentage', 'p95_loss_percentage', 'prob_exceed_threshold')}
+
+    for block_index, start in enumerate(range(0, n_lines, block)):
+        lines = system_df.iloc[start:start + block]
+        width = len(lines)
+        rng = np.random.default_rng([seed, block_index + 1])
+
+        # Same operation order as the vectorized expressions, but in place
+        load_kw = np.multiply(lines['load_kw'].to_numpy(dtype=dtype), common[:, None].astype(dtype))
+        scale = uniform(rng, -load_spread, load_spread, (n_scenarios, width), dtype)
+        scale += 1
+        load_kw *= scale
+        power_factor = uniform(rng, -pf_spread, pf_spread, (n_scenarios, width), dtype)
+        power_factor += lines['power_factor'].to_numpy(dtype=dtype)
+        np.clip(power_factor, PF_MIN, PF_MAX, out=power_factor)
+        del scale
+
+        losses = loss_arrays(load_kw, power_factor, lines['resistance_ohm_km'].to_numpy(),
+                             lines['reactance_ohm_km'].to_numpy(), lines['line_length_km'].to_numpy(),
+                             lines['transformer_efficiency'].to_numpy(), dtype=dtype)
+        total_losses = losses['total_losses_kw']
+        loss_percentage = losses['loss_percentage']
+
+        system_losses += total_losses.sum(axis=1, dtype=np.float64)
+        system_load += load_kw.sum(axis=1, dtype=np.float64)
+
+        p50, p95 = np.percentile(total_losses, [50, 95], axis=0)
+        rows = slice(start, start + width)
+        stats['mean_losses_kw'][rows] = total_losses.mean(axis=0, dtype=np.float64)
+        stats['p50_losses_kw'][rows] = p50
+        stats['p95_losses_kw'][rows] = p95
+        stats['mean_loss_percentage'][rows] = loss_percentage.mean(axis=0, dtype=np.float64)
+        stats['p95_loss_percentage'][rows] = np.percentile(loss_percentage, 95, axis=0)
+        stats['prob_exceed_threshold'][rows] = (loss_percentage > threshold_pct).mean(axis=0)
+
+    line_stats = pd.DataFrame({'line_id': system_df['line_id'].to_numpy(),
+                               'area_name': system_df['area_name'].to_numpy()})
+    for name, values in stats.items():
+        line_stats[name] = np.round(values, 4)
+
+    system_loss_percentage = system_losses / system_load * 100
+    p50, p95 = np.percentile(system_losses, [50, 95])
+    system_stats = {
+        'scenarios': n_scenarios,
+        'lines': n_lines,
+        'seed': seed,
+        'mean_losses_kw': float(system_losses.mean()),
+        'p50_losses_kw': float(p50),
+        'p95_losses_kw': float(p95),
+        'mean_loss_percentage': float(system_loss_percentage.mean()),
+        'p95_loss_percentage': float(np.percentile(system_loss_percentage, 95)),
+        'prob_exceed_threshold': float((system_loss_percentage > threshold_pct).mean()),
+        'threshold_pct': threshold_pct
+    }
+    return line_stats, system_stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo loss scenario engine")
+    parser.add_argument('--input', default='data/power_system.csv')
+    parser.add_argument('--output', default='data/loss_scenarios.csv')
+    parser.add_argument('--scenarios', type=int, default=10_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--load-spread', type=float, default=0.05)
+    parser.add_argument('--pf-spread', type=float, default=0.02)
+    parser.add_argument('--common-spread', type=float, default=0.0,
+                        help="spread of a system-wide load factor shared by all lines")
+    parser.add_argument('--precision', choices=PRECISIONS, default='float64',
+                        help="compute precision (float32 halves the memory per block)")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🎲 MONTE CARLO LOSS SCENARIOS")
+    print("=" * 60)
+
+    system_df = read_table(args.input, dtype=ID_DTYPES)
+    line_stats, system_stats = run_scenarios(system_df, args.scenarios, args.seed,
+                                             args.load_spread, args.pf_spread, args.common_spread,
+                                             dtype=PRECISIONS[args.precision])
+    write_table(line_stats, args.output)
+
+    print(f"Scenarios: {system_stats['scenarios']:,} × {system_stats['lines']:,} lines (seed {args.seed})")
+    print(f"System Losses P50: {system_stats['p50_losses_kw']:,.1f} kW | "
+          f"P95: {system_stats['p95_losses_kw']:,.1f} kW")
+    print(f"System Loss % mean: {system_stats['mean_loss_percentage']:.2f}% | "
+          f"P95: {system_stats['p95_loss_percentage']:.2f}%")
+    print(f"P(system loss > {LOSS_THRESHOLD_PCT}%): {system_stats['prob_exceed_threshold']:.1%}")
+
+    print(f"\n⚠️  Lines most likely to exceed {LOSS_THRESHOLD_PCT}% loss:")
+    riskiest = line_stats.nlargest(min(5, len(line_stats)), 'prob_exceed_threshold')
+    for line_id, probability, p95 in zip(riskiest['line_id'], riskiest['prob_exceed_threshold'],
+                                         riskiest['p95_losses_kw']):
+        print(f"   {line_id}: {probability:.1%} (P95 losses {p95:,.1f} kW)")
+    print(f"\n💾 Per-line statistics saved to: {args.output}")
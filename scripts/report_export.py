@@ -0,0 +1,181 @@
+"""
+REPORT EXPORT
+Loss report exports (CSV and Excel) written to disk a block of rows at a time
+
+The export has the column layout of the original tables (see
+compact_tables.export_layout); only CHUNK_ROWS rows are converted at once,
+so a large fleet is never serialized into one in-memory string. Excel
+exports use openpyxl's write-only mode, which streams rows to the file, and
+add the area and conductor summaries as extra sheets. Lines beyond the
+worksheet limit continue on further "Lines" sheets.
+
+Files are named after the data version they were built from and written
+atomically, so an existing export of the same version is reused as is.
+
+    python scripts/report_export.py --format xlsx
+    python scripts/report_export.py --format csv --output data/loss_report.csv
+"""
+import argparse
+import hashlib
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append('.')
+from scripts.compact_tables import (export_layout, join_compact, load_catalog, read_compact_losses,
+                                    read_compact_system, restore_float)
+from scripts.simple_analytics import group_summary
+
+EXPORT_DIR = 'data/cache/exports'
+EXPORT_FORMATS = {'csv': 'text/csv',
+                  'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'}
+CHUNK_ROWS = 50_000
+KEEP_EXPORTS = 8
+
+# Data rows per worksheet (Excel's limit minus the header row)
+EXCEL_MAX_ROWS = 1_048_575
+
+def export_chunks(combined_df, catalog=None, chunk_rows=CHUNK_ROWS):
+    """The export layout of combined_df, CHUNK_ROWS rows at a time"""
+    for start in range(0, max(len(combined_df), 1), chunk_rows):
+        yield export_layout(combined_df.iloc[start:start + chunk_rows], catalog)
+
+def write_csv(combined_df, output_file, catalog=None, chunk_rows=CHUNK_ROWS):
+    """Write the loss report as CSV, appending one chunk of rows at a time"""
+    with open(output_file, 'w', newline='', encoding='utf-8') as f:
+        for i, chunk in enumerate(export_chunks(combined_df, catalog, chunk_rows)):
+            chunk.to_csv(f, header=i == 0, index=False)
+
+def write_excel(combined_df, output_file, catalog=None, summaries=None, chunk_rows=CHUNK_ROWS,
+                max_sheet_rows=EXCEL_MAX_ROWS):
+    """Write the loss report as an Excel workbook in write-only (streaming) mode
+
+    summaries maps sheet names to small DataFrames (e.g. area totals) added
+    after the line sheets.
+    """
+    # openpyxl is only needed for Excel exports
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet, sheet_rows, sheets = None, max_sheet_rows, 0
+    for chunk in export_chunks(combined_df, catalog, chunk_rows):
+        # Plain Python values openpyxl can write (float32 as its decimal value, not 0.8500000238)
+        columns = [chunk[name].astype(object) if chunk[name].dtype == 'category'
+                   else restore_float(chunk[name]) if chunk[name].dtype == np.float32
+                   else chunk[name] for name in chunk.columns]
+        for row in zip(*(column.tolist() for column in columns)):
+            if sheet_rows >= max_sheet_rows:
+                sheets += 1
+                sheet = workbook.create_sheet('Lines' if sheets == 1 else f"Lines {sheets}")
+                sheet.append(list(chunk.columns))
+                sheet_rows = 0
+            sheet.append(row)
+            sheet_rows += 1
+        if sheet is None:
+            sheet = workbook.create_sheet('Lines')
+            sheet.append(list(chunk.columns))
+
+    for name, summary in (summaries or {}).items():
+        sheet = workbook.create_sheet(name)
+        sheet.append(list(summary.columns))
+        for row in summary.astype(object).itertuples(index=False):
+            sheet.append(list(row))
+    workbook.save(output_file)
+
+def export_path(version, export_format, export_dir=EXPORT_DIR):
+    """File of the export of one data version (any hashable description of it)"""
+    digest = hashlib.sha256(repr(version).encode()).hexdigest()[:16]
+    return os.path.join(export_dir, f"loss_report-{digest}.{export_format}")
+
+def export_report(combined_df, version, export_format='csv', catalog=None, summaries=None,
+                  export_dir=EXPORT_DIR):
+    """Path of the report export of one data version, written only if it doesn't exist yet
+
+    The newest KEEP_EXPORTS exports are kept.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{export_format}' (expected one of {list(EXPORT_FORMATS)})")
+    output_file = export_path(version, export_format, export_dir)
+    if os.path.exists(output_file):
+        os.utime(output_file)
+        return output_file
+
+    os.makedirs(export_dir, exist_ok=True)
+    tmp_file = f"{output_file}.{os.getpid()}.tmp"
+    try:
+        if export_format == 'csv':
+            write_csv(combined_df, tmp_file, catalog)
+        else:
+            write_excel(combined_df, tmp_file, catalog, summaries)
+        os.replace(tmp_file, output_file)
+    finally:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+    exports = sorted((entry for entry in os.scandir(export_dir) if entry.name.startswith('loss_report-')),
+                     key=lambda entry: entry.stat().st_mtime, reverse=True)
+    for entry in exports[KEEP_EXPORTS:]:
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+    return output_file
+
+def summary_report(totals):
+    """Plain-text summary report from precomputed system totals (see the dashboard's system_totals)"""
+    total_load = totals['total_load_kw']
+    efficiency = (f"{100 - (totals['total_losses_kw'] / total_load * 100):.2f}%" if total_load
+                  else "N/A (no load)")
+    return f"""
+    POWER SYSTEM LOSS REPORT
+    ========================
+
+    System Configuration:
+    - Generation Voltage: 410V
+    - Transmission Voltage: 11kV
+    - Number of Lines: {totals['lines']:,}
+
+    Summary Statistics:
+    - Total Load: {totals['total_load_kw']:,.0f} kW
+    - Total Losses: {totals['total_losses_kw']:,.1f} kW
+    - Overall Efficiency: {efficiency}
+    - Average Loss Percentage: {totals['avg_loss_percentage']:.2f}%
+
+    Highest Loss Line: {totals['highest_loss_line']}
+    Most Efficient Line: {totals['most_efficient_line']}
+
+    Generated on: {time.strftime('%Y-%m-%d %H:%M:%S')}
+    """
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Loss report export")
+    parser.add_argument('--system', default='data/power_system.csv')
+    parser.add_argument('--losses', default='data/loss_calculations.csv')
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv')
+    parser.add_argument('--output', default=None, help="output file (default: data/loss_report.<format>)")
+    args = parser.parse_args()
+    output_file = args.output or f"data/loss_report.{args.format}"
+
+    print("=" * 60)
+    print("📥 LOSS REPORT EXPORT")
+    print("=" * 60)
+
+    try:
+        catalog = load_catalog()
+        system_df = read_compact_system(args.system, catalog)
+        combined_df = join_compact(system_df, read_compact_losses(args.losses, system_df))
+        started = time.perf_counter()
+        if args.format == 'csv':
+            write_csv(combined_df, output_file, catalog)
+        else:
+            write_excel(combined_df, output_file, catalog,
+                        {'Areas': group_summary(combined_df, 'area_name'),
+                         'Conductors': group_summary(combined_df, 'conductor_type')})
+        print(f"📖 {len(combined_df):,} lines exported in {time.perf_counter() - started:.1f}s")
+        print(f"💾 Report saved to: {output_file}")
+    except FileNotFoundError as e:
+        print(f"❌ Error: Could not find {e.filename}")
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
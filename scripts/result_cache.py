@@ -0,0 +1,209 @@
+"""
+RESULT CACHE
+Content-addressed, size-bounded on-disk cache shared by every entry point
+
+An entry is keyed by a SHA-256 of everything its result depends on: the
+contents of the input tables (CSV file or column directory, whichever
+read_table would use), in-memory inputs and the calculation parameters
+(SYSTEM_VOLTAGE, thresholds, ...). A changed input or parameter gives a new
+key, so entries never go stale; the least recently used ones are evicted once
+the cache grows past max_bytes.
+
+Layout under data/cache/results:
+
+    <key>.pkl        one pickled result (DataFrame, summary dict, arrays)
+    digests.json     content digest of every input file by (size, mtime, inode),
+                     so an unchanged input is not read again to compute its key
+
+    cache = ResultCache()
+    key = cache.key('losses', files=['data/power_system.csv'], system_voltage_kv=SYSTEM_VOLTAGE)
+    results_df = cache.get(key)
+    if results_df is None:
+        results_df = cache.put(key, calculate_losses_vectorized(df))
+
+    python scripts/result_cache.py stats
+    python scripts/result_cache.py clear
+"""
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+from scripts.columnar_store import resolve_table
+
+RESULT_CACHE_DIR = 'data/cache/results'
+MAX_CACHE_BYTES = 512 * 1024 * 1024
+DIGESTS_FILE = 'digests.json'
+ENTRY_SUFFIX = '.pkl'
+
+# Bump when the format of cached results changes
+CACHE_VERSION = 1
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class ResultCache:
+    """Pickled results by content key, least recently used evicted first"""
+
+    def __init__(self, root=RESULT_CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._digests = None
+        os.makedirs(root, exist_ok=True)
+
+    # Keys
+
+    def _load_digests(self):
+        if self._digests is None:
+            try:
+                with open(os.path.join(self.root, DIGESTS_FILE)) as f:
+                    self._digests = json.load(f)
+            except (FileNotFoundError, ValueError):
+                self._digests = {}
+        return self._digests
+
+    def _save_digests(self):
+        # Forget files that were deleted (scratch and benchmark inputs)
+        self._digests = {path: known for path, known in self._digests.items() if os.path.exists(path)}
+        tmp_file = os.path.join(self.root, f"{DIGESTS_FILE}.{os.getpid()}.tmp")
+        with open(tmp_file, 'w') as f:
+            json.dump(self._digests, f)
+        os.replace(tmp_file, os.path.join(self.root, DIGESTS_FILE))
+
+    def file_digest(self, path, resolve=True):
+        """SHA-256 of a table's contents (CSV or column directory)
+
+        With resolve, path is first resolved like read_table does (see
+        resolve_table). Digests are remembered by size, modification time and
+        inode, so a file is only read again after it changed.
+        """
+        resolved = os.path.abspath(resolve_table(path)[1] if resolve else path)
+        files = ([os.path.join(resolved, name) for name in sorted(os.listdir(resolved))]
+                 if os.path.isdir(resolved) else [resolved])
+
+        digests = self._load_digests()
+        changed = False
+        parts = []
+        for file_path in files:
+            stat = os.stat(file_path)
+            signature = [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+            known = digests.get(file_path)
+            if known is None or known[:3] != signature:
+                known = signature + [_hash_file(file_path)]
+                digests[file_path] = known
+                changed = True
+            parts.append(os.path.basename(file_path) + ':' + known[3] if len(files) > 1 else known[3])
+        if changed:
+            self._save_digests()
+        return parts[0] if len(parts) == 1 else hashlib.sha256('\n'.join(parts).encode()).hexdigest()
+
+    def key(self, kind, files=(), data=(), **params):
+        """Content key of a result
+
+        files are table paths hashed by content, data are in-memory inputs
+        (bytes, str or NumPy arrays) and params any JSON-serializable settings.
+        Raises FileNotFoundError if an input file is missing.
+        """
+        # Pickles are only read back by the library versions that wrote them
+        digest = hashlib.sha256(f"{kind}:{CACHE_VERSION}:{np.__version__}:{pd.__version__}".encode())
+        for path in files:
+            digest.update(self.file_digest(path).encode())
+        for item in data:
+            if isinstance(item, np.ndarray):
+                item = np.ascontiguousarray(item).tobytes()
+            digest.update(item.encode() if isinstance(item, str) else bytes(item))
+        digest.update(json.dumps(params, sort_keys=True, default=repr).encode())
+        return f"{kind}-{digest.hexdigest()}"
+
+    # Entries
+
+    def _entry_path(self, key):
+        return os.path.join(self.root, key + ENTRY_SUFFIX)
+
+    def get(self, key):
+        """Cached result of key, or None"""
+        path = self._entry_path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except Exception:
+            # Missing or unreadable (e.g. truncated) entry: recompute
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)  # most recently used
+        except FileNotFoundError:
+            pass
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Store a result (atomically) and evict the least recently used entries"""
+        tmp_file = f"{self._entry_path(key)}.{os.getpid()}.tmp"
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, self._entry_path(key))
+        self.evict()
+        return value
+
+    def entries(self):
+        """(path, size, last used) of every entry, least recently used first"""
+        entries = []
+        for entry in os.scandir(self.root):
+            if entry.name.endswith(ENTRY_SUFFIX):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((entry.path, stat.st_size, stat.st_mtime))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits max_bytes"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries[:-1]:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        return total
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+        os.makedirs(self.root, exist_ok=True)
+        self._digests = None
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ('stats', 'clear'):
+        print("Usage: python scripts/result_cache.py stats|clear")
+        sys.exit(1)
+
+    cache = ResultCache()
+    if sys.argv[1] == 'clear':
+        cache.clear()
+        print(f"🗑️  Cleared {RESULT_CACHE_DIR}")
+    else:
+        entries = cache.entries()
+        total = sum(size for _, size, _ in entries)
+        print(f"📦 {len(entries)} entries, {total / 1e6:,.1f} MB of {cache.max_bytes / 1e6:,.0f} MB "
+              f"in {RESULT_CACHE_DIR}")
+        for path, size, used in reversed(entries):
+            print(f"   {os.path.basename(path)[:40]:<40} {size / 1e6:8.2f} MB  "
+                  f"last used {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(used))}")
@@ -1,83 +1,274 @@
 """
 SIMPLE ANALYTICS FOR POWER SYSTEM
 Shows trends and insights
+
+All statistics come from one set of vectorized passes over the columns:
+totals and means, per-area and per-conductor aggregates, threshold
+violations and top/bottom-K rankings (np.argpartition, no full sort). The
+structured result is saved as JSON; the console shows a summary with the K
+best and worst lines instead of every feeder. Reports are kept in the result
+cache, keyed by the contents of the input tables and the settings, so an
+unchanged system is reported without reloading it.
+
+    python scripts/simple_analytics.py --top-k 10 --report data/analytics_report.json
 """
 import pandas as pd
 import numpy as np
+import argparse
+import json
+import os
+import sys
 from datetime import datetime
 
-def analyze_system():
+sys.path.append('.')
+from scripts.annual_energy import DEFAULT_RATE, annual_losses, annual_totals, print_annual_summary
+from scripts.calculate_losses import SYSTEM_VOLTAGE
+from scripts.columnar_store import read_table, resolve_table
+from scripts.compact_tables import (CATALOG_FILE, join_compact, load_catalog, read_compact_losses,
+                                    read_compact_system, with_conductor_parameters)
+from scripts.result_cache import RESULT_CACHE_DIR, ResultCache
+
+# Problem line thresholds
+LOSS_THRESHOLD_PCT = 3.5
+VOLTAGE_DROP_THRESHOLD_V = 150
+
+# Lines listed per ranking and per violation type
+TOP_K = 10
+
+REPORT_FILE = 'data/analytics_report.json'
+SYSTEM_FILE = 'data/power_system.csv'
+LOSS_FILE = 'data/loss_calculations.csv'
+
+LINE_COLUMNS = ['line_id', 'area_name', 'conductor_type', 'load_kw', 'total_losses_kw',
+                'loss_percentage', 'efficiency', 'voltage_drop_v']
+
+def top_k_positions(values, k, largest=True):
+    """Row positions of the k largest (or smallest) values, in order, without a full sort"""
+    keys = -np.asarray(values, dtype=float) if largest else np.asarray(values, dtype=float)
+    k = min(k, len(keys))
+    if k <= 0:
+        return np.array([], dtype=int)
+    candidates = np.argpartition(keys, k - 1)[:k] if k < len(keys) else np.arange(len(keys))
+    return candidates[np.argsort(keys[candidates], kind='stable')]
+
+def group_summary(merged, column):
+    """Per-group line count, load and loss totals, mean efficiency and violations"""
+    codes, labels = pd.factorize(merged[column], sort=True)
+    groups = len(labels)
+
+    def total(values):
+        return np.bincount(codes, weights=np.asarray(values, dtype=float), minlength=groups)
+
+    lines = np.bincount(codes, minlength=groups)
+    load = total(merged['load_kw'])
+    summary = pd.DataFrame({
+        column: np.asarray(labels, dtype=object),
+        'lines': lines,
+        'load_kw': load,
+        'line_losses_kw': total(merged['line_losses_kw']),
+        'transformer_losses_kw': total(merged['transformer_losses_kw']),
+        'total_losses_kw': total(merged['total_losses_kw']),
+        'efficiency': total(merged['efficiency']) / np.maximum(lines, 1),
+        'high_loss_lines': total(merged['loss_percentage'] > LOSS_THRESHOLD_PCT).astype(int),
+        'high_voltage_drop_lines': total(merged['voltage_drop_v'] > VOLTAGE_DROP_THRESHOLD_V).astype(int)
+    })
+    summary.insert(6, 'loss_percentage', summary['total_losses_kw'] / summary['load_kw'] * 100)
+    return summary
+
+def line_records(merged, positions):
+    """Report entries of the lines at the given row positions"""
+    columns = [column for column in LINE_COLUMNS if column in merged.columns]
+    lines = merged.iloc[positions][columns]
+    numeric = lines.select_dtypes('number').columns
+    return lines.astype(dict.fromkeys(numeric, float)).round(3).to_dict('records')
+
+def build_report(merged, top_k=TOP_K, rate=DEFAULT_RATE):
+    """Structured analytics of a merged system + loss table"""
+    load = merged['load_kw'].to_numpy(dtype=float)
+    losses = merged['total_losses_kw'].to_numpy(dtype=float)
+    efficiency = merged['efficiency'].to_numpy(dtype=float)
+    loss_pct = merged['loss_percentage'].to_numpy(dtype=float)
+    voltage_drop = merged['voltage_drop_v'].to_numpy(dtype=float)
+
+    # Threshold violations, worst first
+    violations = {}
+    for name, values, threshold in (('high_loss', loss_pct, LOSS_THRESHOLD_PCT),
+                                    ('high_voltage_drop', voltage_drop, VOLTAGE_DROP_THRESHOLD_V)):
+        positions = np.flatnonzero(values > threshold)
+        violations[name] = {
+            'threshold': threshold,
+            'count': len(positions),
+            'worst': line_records(merged, positions[top_k_positions(values[positions], top_k)])
+        }
+
+    daily_loss_cost = losses.sum() * 24 * rate
+    return {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'lines': len(merged),
+        'totals': {
+            'load_kw': round(float(load.sum()), 3),
+            'line_losses_kw': round(float(merged['line_losses_kw'].to_numpy(dtype=float).sum()), 3),
+            'transformer_losses_kw': round(float(merged['transformer_losses_kw'].to_numpy(dtype=float).sum()), 3),
+            'total_losses_kw': round(float(losses.sum()), 3)
+        },
+        'averages': {
+            'efficiency': round(float(efficiency.mean()), 3) if len(merged) else None,
+            'loss_percentage': round(float(loss_pct.mean()), 3) if len(merged) else None,
+            'voltage_drop_v': round(float(voltage_drop.mean()), 3) if len(merged) else None
+        },
+        'ranking': {
+            'best_efficiency': line_records(merged, top_k_positions(efficiency, top_k)),
+            'worst_efficiency': line_records(merged, top_k_positions(efficiency, top_k, largest=False))
+        },
+        'violations': violations,
+        'priority_action': line_records(merged, top_k_positions(loss_pct, 1))[0] if len(merged) else None,
+        'costs': {
+            'rate_per_kwh': rate,
+            'daily_loss_cost': round(float(daily_loss_cost), 2),
+            'annual_loss_cost': round(float(daily_loss_cost * 365), 2),
+            'potential_annual_savings': round(float(daily_loss_cost * 0.10 * 365), 2)
+        },
+        'by_area': group_summary(merged, 'area_name').round(3).to_dict('records'),
+        'by_conductor': group_summary(merged, 'conductor_type').round(3).to_dict('records')
+    }
+
+def print_report(report, top_k=TOP_K):
+    """Console summary of build_report()"""
+    print(f"System has {report['lines']:,} transmission lines")
+    print()
+    if report['lines'] == 0:
+        print("⚠️  No transmission lines to analyze")
+        return
+
+    # 1. Basic statistics
+    print("1️⃣ BASIC STATISTICS:")
+    print("-" * 40)
+    print(f"Total Load: {report['totals']['load_kw']:,.0f} kW")
+    print(f"Total Losses: {report['totals']['total_losses_kw']:,.1f} kW")
+    print(f"Average Efficiency: {report['averages']['efficiency']:.1f}%")
+    print(f"Average Loss %: {report['averages']['loss_percentage']:.2f}%")
+    print()
+
+    # 2. Performance ranking
+    best, worst = report['ranking']['best_efficiency'], report['ranking']['worst_efficiency']
+    print(f"2️⃣ LINE PERFORMANCE RANKING (top {len(best)} of {report['lines']:,}):")
+    print("-" * 40)
+    for i, row in enumerate(best, 1):
+        medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
+        print(f"{medal} {row['line_id']} - {row['area_name']}: {row['efficiency']:.1f}% efficiency")
+    if report['lines'] > len(best):
+        print(f"   ... least efficient {len(worst)}:")
+        for row in worst:
+            print(f"   {row['line_id']} - {row['area_name']}: {row['efficiency']:.1f}% efficiency")
+    print()
+
+    # 3. Problem identification
+    print("3️⃣ PROBLEM IDENTIFICATION:")
+    print("-" * 40)
+
+    high_loss = report['violations']['high_loss']
+    if high_loss['count']:
+        print(f"⚠️  High Loss Lines (>{high_loss['threshold']}%): {high_loss['count']:,}")
+        for row in high_loss['worst']:
+            print(f"   {row['line_id']}: {row['loss_percentage']:.2f}% loss")
+
+    high_vdrop = report['violations']['high_voltage_drop']
+    if high_vdrop['count']:
+        print(f"\n⚠️  High Voltage Drop (>{high_vdrop['threshold']}V): {high_vdrop['count']:,}")
+        for row in high_vdrop['worst']:
+            print(f"   {row['line_id']}: {row['voltage_drop_v']:.1f} V drop")
+
+    # Areas ordered by loss percentage (few enough to list all)
+    areas = sorted(report['by_area'], key=lambda area: area['loss_percentage'], reverse=True)
+    print(f"\n📍 Areas by loss % (worst {min(top_k, len(areas))} of {len(areas)}):")
+    for area in areas[:top_k]:
+        print(f"   {area['area_name']}: {area['loss_percentage']:.2f}% loss | {area['lines']:,} lines | "
+              f"{area['high_loss_lines']:,} high-loss")
+
+    # 4. Recommendations
+    print("\n4️⃣ RECOMMENDATIONS:")
+    print("-" * 40)
+
+    worst_line = report['priority_action']
+    print(f"🔴 Priority Action: {worst_line['line_id']} ({worst_line['area_name']})")
+    print(f"   Current loss: {worst_line['loss_percentage']:.2f}%")
+    print(f"   Suggested: Check {worst_line['conductor_type']} conductor condition")
+
+    # Cost analysis
+    costs = report['costs']
+    print(f"\n💰 Daily Cost of Losses: ${costs['daily_loss_cost']:,.2f}")
+    print(f"💰 Annual Cost of Losses: ${costs['annual_loss_cost']:,.2f}")
+    print(f"💰 Potential Annual Savings (10% improvement): ${costs['potential_annual_savings']:,.2f}")
+
+def compute_report(profile_file, tariff_file, top_k=TOP_K):
+    """Load, join and analyze the system and loss tables (plus annual energy if profiled)"""
+    # Categorical, downcast tables joined on their integer line key
+    catalog = load_catalog()
+    df = read_compact_system(SYSTEM_FILE, catalog)
+    loss_df = read_compact_losses(LOSS_FILE, df)
+
+    merged = join_compact(df, loss_df)
+    report = build_report(merged, top_k)
+
+    # Profile-based annual energy (losses follow the hourly load, not a flat 24 x 365)
+    if os.path.exists(resolve_table(profile_file)[1]):
+        tariff_df = read_table(tariff_file) if os.path.exists(resolve_table(tariff_file)[1]) else None
+        annual = annual_losses(with_conductor_parameters(df, catalog), profile_file, tariff_df)
+        costliest = top_k_positions(annual['annual_loss_cost'], top_k)
+        report['annual_energy'] = dict(annual_totals(annual), costliest_lines=(
+            annual.iloc[costliest][['line_id', 'area_name', 'annual_loss_kwh', 'loss_factor',
+                                    'annual_loss_cost']].round(3).to_dict('records')))
+    return report
+
+def report_cache_key(cache, profile_file, tariff_file, top_k=TOP_K):
+    """Result cache key of the report: input table contents and every setting it depends on"""
+    # The tariff only matters for the annual section, which needs the profiles
+    annual_inputs = []
+    if os.path.exists(resolve_table(profile_file)[1]):
+        annual_inputs.append(profile_file)
+        if os.path.exists(resolve_table(tariff_file)[1]):
+            annual_inputs.append(tariff_file)
+    return cache.key('analytics_report', files=[SYSTEM_FILE, LOSS_FILE, CATALOG_FILE] + annual_inputs,
+                     annual_inputs=len(annual_inputs), top_k=top_k, rate=DEFAULT_RATE,
+                     loss_threshold_pct=LOSS_THRESHOLD_PCT, voltage_drop_threshold_v=VOLTAGE_DROP_THRESHOLD_V,
+                     system_voltage_kv=SYSTEM_VOLTAGE, line_columns=LINE_COLUMNS)
+
+def analyze_system(profile_file='data/load_profiles.csv', tariff_file='data/tariff.csv',
+                   report_file=REPORT_FILE, top_k=TOP_K, cache_dir=RESULT_CACHE_DIR):
     print("=" * 60)
     print("📊 POWER SYSTEM ANALYTICS")
     print("=" * 60)
-    
+
     # Load data
     try:
-        df = pd.read_csv('data/power_system.csv')
-        loss_df = pd.read_csv('data/loss_calculations.csv')
-        
-        # Merge data
-        merged = pd.merge(df, loss_df, on=['line_id', 'area_name'])
-        
-        print(f"System has {len(merged)} transmission lines")
-        print()
-        
-        # 1. Basic statistics
-        print("1️⃣ BASIC STATISTICS:")
-        print("-" * 40)
-        print(f"Total Load: {merged['load_kw'].sum():,.0f} kW")
-        print(f"Total Losses: {merged['total_losses_kw'].sum():,.1f} kW")
-        print(f"Average Efficiency: {merged['efficiency'].mean():.1f}%")
-        print(f"Average Loss %: {merged['loss_percentage'].mean():.2f}%")
-        print()
-        
-        # 2. Performance ranking
-        print("2️⃣ LINE PERFORMANCE RANKING:")
-        print("-" * 40)
-        ranked = merged.sort_values('efficiency', ascending=False)
-        for i, (_, row) in enumerate(ranked.iterrows(), 1):
-            medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
-            print(f"{medal} {row['line_id']} - {row['area_name']}: {row['efficiency']:.1f}% efficiency")
-        print()
-        
-        # 3. Problem identification
-        print("3️⃣ PROBLEM IDENTIFICATION:")
-        print("-" * 40)
-        
-        # High losses
-        high_loss = merged[merged['loss_percentage'] > 3.5]
-        if not high_loss.empty:
-            print("⚠️  High Loss Lines (>3.5%):")
-            for _, row in high_loss.iterrows():
-                print(f"   {row['line_id']}: {row['loss_percentage']:.2f}% loss")
-        
-        # High voltage drop
-        high_vdrop = merged[merged['voltage_drop_v'] > 150]
-        if not high_vdrop.empty:
-            print("\n⚠️  High Voltage Drop (>150V):")
-            for _, row in high_vdrop.iterrows():
-                print(f"   {row['line_id']}: {row['voltage_drop_v']:.1f} V drop")
-        
-        # 4. Recommendations
-        print("\n4️⃣ RECOMMENDATIONS:")
-        print("-" * 40)
-        
-        # Find line with highest losses
-        worst = merged.loc[merged['loss_percentage'].idxmax()]
-        print(f"🔴 Priority Action: {worst['line_id']} ({worst['area_name']})")
-        print(f"   Current loss: {worst['loss_percentage']:.2f}%")
-        print(f"   Suggested: Check {worst['conductor_type']} conductor condition")
-        
-        # Cost analysis
-        electricity_rate = 0.10  # $ per kWh
-        daily_loss_cost = merged['total_losses_kw'].sum() * 24 * electricity_rate
-        print(f"\n💰 Daily Cost of Losses: ${daily_loss_cost:.2f}")
-        print(f"💰 Annual Cost of Losses: ${daily_loss_cost * 365:,.2f}")
-        
-        # Potential savings (10% reduction)
-        potential_savings = daily_loss_cost * 0.10 * 365
-        print(f"💰 Potential Annual Savings (10% improvement): ${potential_savings:,.2f}")
-        
+        cache = ResultCache(cache_dir) if cache_dir else None
+        report = None
+        if cache:
+            key = report_cache_key(cache, profile_file, tariff_file, top_k)
+            report = cache.get(key)
+        if report is None:
+            report = compute_report(profile_file, tariff_file, top_k)
+            if cache:
+                cache.put(key, report)
+        else:
+            print("⚡ Inputs unchanged since the last analysis: report loaded from cache")
+        print_report(report, top_k)
+
+        # 5. Profile-based annual energy
+        if 'annual_energy' in report and report['lines']:
+            print("\n5️⃣ ANNUAL ENERGY LOSSES (8760 h load profiles):")
+            print("-" * 40)
+            print_annual_summary(report['annual_energy'])
+            for row in report['annual_energy']['costliest_lines']:
+                print(f"   {row['line_id']}: {row['annual_loss_kwh']:,.0f} kWh | "
+                      f"loss factor {row['loss_factor']:.3f} | ${row['annual_loss_cost']:,.2f}")
+
+        if report_file:
+            with open(report_file, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"\n💾 Report saved to: {report_file}")
+        return report
+
     except FileNotFoundError as e:
         print(f"❌ Error: {e}")
         print("Please run calculate_losses.py first")
@@ -85,4 +276,11 @@ def analyze_system():
         print(f"❌ Error: {str(e)}")
 
 if __name__ == "__main__":
-    analyze_system()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Power system analytics report")
+    parser.add_argument('--top-k', type=int, default=TOP_K, help="lines listed per ranking")
+    parser.add_argument('--report', default=REPORT_FILE, help="JSON report file")
+    parser.add_argument('--no-cache', action='store_true', help="always recompute the report")
+    args = parser.parse_args()
+
+    analyze_system(report_file=args.report, top_k=args.top_k,
+                   cache_dir=None if args.no_cache else RESULT_CACHE_DIR)
@@ -1,41 +1,66 @@
 import pandas as pd
 import numpy as np
 import time
+import sys
 from datetime import datetime, timedelta
 
+sys.path.append('.')
+from scripts import metrics
+from scripts.anomaly_detector import ALERT_LOG, AnomalyDetector
+from scripts.columnar_store import read_table
+from scripts.incremental_losses import IncrementalLossModel
+from scripts.history_store import HISTORY_DIR, HistoryWriter
+from scripts.live_channel import LivePublisher
+from scripts.live_simulator import LoadGenerator, simulation_tick
+from scripts.live_snapshots import LIVE_DIR, SnapshotWriter
+
+# True/False to always publish the live tables in columnar/CSV format
+# (None: columnar for large tables, see live_snapshots.COLUMNAR_MIN_ROWS)
+COLUMNAR_SNAPSHOTS = None
+
 print("🔄 Starting Live Data Simulator...")
 print("This will update data files every 10 seconds")
 print("Press Ctrl+C to stop\n")
 
+# Optional seed as the first argument makes the run reproducible
+SEED = int(sys.argv[1]) if len(sys.argv) > 1 else None
+
 # Load original data
-df = pd.read_csv('data/power_system.csv')
+df = read_table('data/power_system.csv')
+generator = LoadGenerator(df, SEED, load_step=0.1, round_output=False)
+
+# Loss results stay in memory; each iteration only recalculates changed lines
+model = IncrementalLossModel(df)
+history = HistoryWriter(HISTORY_DIR)
+channel = LivePublisher()
+snapshots = SnapshotWriter(LIVE_DIR, COLUMNAR_SNAPSHOTS)
+detector = AnomalyDetector(df['line_id'], alert_log=ALERT_LOG)
 
 try:
     counter = 0
     while True:
         # Create timestamp
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        metrics.tick('simulate_live_data', 10)
         
-        # Simulate load variations (±10%)
-        df['load_kw'] = df['load_kw'] * (1 + np.random.uniform(-0.1, 0.1, len(df)))
-        
-        # Simulate power factor variations
-        df['power_factor'] = df['power_factor'] + np.random.uniform(-0.02, 0.02, len(df))
-        df['power_factor'] = df['power_factor'].clip(0.75, 0.95)
-        
-        # Save updated data
-        df.to_csv('data/power_system_live.csv', index=False)
-        
-        # Update calculations
-        import sys
-        sys.path.append('.')
-        from scripts.calculate_losses import calculate_losses
+        # Simulate load (±10%) and power factor variations, recalculate the
+        # changed lines and send them to the live sinks (same tick as live_simulator.py)
+        alerts_before = detector.alerts_raised
+        simulation_tick(df, model, generator, snapshots, history, channel, detector=detector,
+                        component='simulate_live_data')
+        metrics.publish('simulate_live_data')
         
-        print(f"[{timestamp}] Updated live data - Iteration {counter}")
+        print(f"[{timestamp}] Updated live data - Iteration {counter} (generation {snapshots.generation})")
+        if detector.alerts_raised > alerts_before:
+            print(f"   🚨 {detector.alerts_raised - alerts_before:,} new alerts")
         counter += 1
         
         # Wait 10 seconds
         time.sleep(10)
         
 except KeyboardInterrupt:
-    print("\n\n⏹️ Live simulation stopped")
\ No newline at end of file
+    print("\n\n⏹️ Live simulation stopped")
+finally:
+    snapshots.close()
+    history.close()
+    channel.close()
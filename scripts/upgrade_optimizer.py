@@ -0,0 +1,232 @@
+"""
+UPGRADE OPTIMIZER
+Ranks conductor upgrades and power-factor correction by loss saved per dollar
+
+Every line is evaluated against every action in one vectorized batch: each
+conductor in data/conductor_catalog.csv, each capacitor target power factor,
+and each conductor + capacitor combination. The best action of every line
+(most kW saved per dollar) is then funded in ratio order until the budget is
+spent. Evaluations are kept in the result cache per block of lines, keyed by
+a hash of the block's inputs and the action grid, so unchanged blocks are not
+re-evaluated on the next run.
+
+    python scripts/upgrade_optimizer.py --budget 250000
+"""
+import argparse
+import hashlib
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append('.')
+from scripts.calculate_losses import ID_DTYPES, SYSTEM_VOLTAGE, loss_arrays
+from scripts.columnar_store import read_table, write_table
+from scripts.result_cache import RESULT_CACHE_DIR, ResultCache
+
+CATALOG_FILE = 'data/conductor_catalog.csv'
+
+# Capacitor bank targets and pricing
+PF_TARGETS = [0.90, 0.92, 0.95, 0.98]
+CAPACITOR_COST_PER_KVAR = 25.0
+CAPACITOR_INSTALL_COST = 2000.0
+
+# Lines evaluated (and cached) together; lines x actions values per block
+BLOCK_LINES = 32_768
+
+EVALUATION_COLUMNS = ['line_id', 'area_name', 'action', 'conductor_type', 'target_power_factor',
+                      'capacitor_kvar', 'cost', 'losses_before_kw', 'losses_after_kw',
+                      'loss_saved_kw', 'saved_kw_per_1000']
+
+# Inputs that determine an evaluation, hashed into the cache key
+KEY_COLUMNS = ['load_kw', 'power_factor', 'resistance_ohm_km', 'reactance_ohm_km',
+               'line_length_km', 'transformer_efficiency']
+
+def action_grid(catalog, pf_targets=PF_TARGETS):
+    """All candidate actions as parallel arrays (conductor index / target pf, -1 = unchanged)"""
+    conductors = np.arange(-1, len(catalog))
+    targets = np.array([-1.0] + list(pf_targets))
+    conductor, target = np.meshgrid(conductors, targets, indexing='ij')
+    conductor, target = conductor.ravel(), target.ravel()
+    keep = (conductor >= 0) | (target >= 0)
+    return conductor[keep], target[keep]
+
+def evaluate_block(lines, catalog, conductor, target):
+    """Best action of every line in a block
+
+    Builds (lines x actions) matrices of the new resistance and power factor,
+    evaluates them with loss_arrays and returns per-line arrays for the
+    action with the highest kW saved per dollar (-1 when nothing saves).
+    """
+    length = lines['line_length_km'].to_numpy(dtype=float)[:, None]
+    load_kw = lines['load_kw'].to_numpy(dtype=float)[:, None]
+    power_factor = lines['power_factor'].to_numpy(dtype=float)[:, None]
+    resistance = lines['resistance_ohm_km'].to_numpy(dtype=float)[:, None]
+    reactance = lines['reactance_ohm_km'].to_numpy(dtype=float)[:, None]
+    efficiency = lines['transformer_efficiency'].to_numpy(dtype=float)[:, None]
+
+    catalog_r = catalog['resistance_ohm_km'].to_numpy(dtype=float)
+    catalog_x = catalog['reactance_ohm_km'].to_numpy(dtype=float)
+    catalog_cost = catalog['cost_per_km'].to_numpy(dtype=float)
+    reconductor = conductor >= 0
+    new_r = np.where(reconductor, catalog_r[np.maximum(conductor, 0)], resistance)
+    new_x = np.where(reconductor, catalog_x[np.maximum(conductor, 0)], reactance)
+    new_pf = np.where(target >= 0, np.maximum(power_factor, target), power_factor)
+
+    before = loss_arrays(load_kw[:, 0], power_factor[:, 0], resistance[:, 0], reactance[:, 0],
+                         length[:, 0], efficiency[:, 0])['total_losses_kw']
+    after = loss_arrays(load_kw, new_pf, new_r, new_x, length, efficiency)['total_losses_kw']
+    saved = before[:, None] - after
+
+    kvar = load_kw * (np.tan(np.arccos(power_factor)) - np.tan(np.arccos(new_pf)))
+    cost = (np.where(reconductor, catalog_cost[np.maximum(conductor, 0)], 0.0) * length +
+            np.where(kvar > 0, kvar * CAPACITOR_COST_PER_KVAR + CAPACITOR_INSTALL_COST, 0.0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where((saved > 1e-9) & (cost > 0), saved / cost, -np.inf)
+
+    best = ratio.argmax(axis=1)
+    rows = np.arange(len(best))
+    useful = np.isfinite(ratio[rows, best])
+    return {
+        'action': np.where(useful, best, -1),
+        'capacitor_kvar': np.where(useful, kvar[rows, best], 0.0),
+        'cost': np.where(useful, cost[rows, best], 0.0),
+        'losses_before_kw': before,
+        'losses_after_kw': np.where(useful, after[rows, best], before),
+    }
+
+def block_key(lines, catalog, conductor, target):
+    """Content hash of everything an evaluate_block result depends on"""
+    digest = hashlib.sha256()
+    for column in KEY_COLUMNS:
+        digest.update(np.ascontiguousarray(lines[column].to_numpy(dtype=float)).tobytes())
+    digest.update(catalog.to_csv(index=False).encode('utf-8'))
+    digest.update(np.ascontiguousarray(conductor).tobytes())
+    digest.update(np.ascontiguousarray(target).tobytes())
+    digest.update(repr((SYSTEM_VOLTAGE, CAPACITOR_COST_PER_KVAR, CAPACITOR_INSTALL_COST)).encode())
+    return digest.hexdigest()
+
+def evaluate_upgrades(system_df, catalog, pf_targets=PF_TARGETS, cache_dir=RESULT_CACHE_DIR):
+    """Best upgrade action of every line, with per-block caching in the result cache
+
+    Returns a DataFrame with EVALUATION_COLUMNS (action 'none' where no
+    candidate reduces losses). result.attrs holds the number of
+    'evaluations' (line x action pairs) and of 'cached_blocks'.
+    """
+    system_df = system_df.reset_index(drop=True)
+    catalog = catalog.reset_index(drop=True)
+    conductor, target = action_grid(catalog, pf_targets)
+    cache = ResultCache(cache_dir) if cache_dir else None
+
+    parts = []
+    cached_blocks = 0
+    for start in range(0, len(system_df), BLOCK_LINES):
+        lines = system_df.iloc[start:start + BLOCK_LINES]
+        key = cache.key('upgrade_block', data=[block_key(lines, catalog, conductor, target)]) if cache else None
+        part = cache.get(key) if cache else None
+        if part is not None:
+            cached_blocks += 1
+        else:
+            part = evaluate_block(lines, catalog, conductor, target)
+            if cache:
+                cache.put(key, part)
+        parts.append(part)
+
+    merged = {name: (np.concatenate([part[name] for part in parts]) if parts else np.empty(0))
+              for name in ('action', 'capacitor_kvar', 'cost', 'losses_before_kw', 'losses_after_kw')}
+    action = merged['action'].astype(int)
+    useful = action >= 0
+    chosen_conductor = np.where(useful, conductor[np.maximum(action, 0)], -1)
+    chosen_target = np.where(useful, target[np.maximum(action, 0)], -1.0)
+
+    conductor_names = np.append(catalog['conductor_type'].to_numpy(dtype=object), None)
+    labels = np.where(~useful, 'none',
+                      np.where((chosen_conductor >= 0) & (chosen_target >= 0), 'reconductor+capacitor',
+                               np.where(chosen_conductor >= 0, 'reconductor', 'capacitor')))
+    saved = merged['losses_before_kw'] - merged['losses_after_kw']
+
+    result = pd.DataFrame({
+        'line_id': system_df['line_id'].to_numpy(),
+        'area_name': system_df['area_name'].to_numpy(),
+        'action': labels,
+        'conductor_type': conductor_names[chosen_conductor],
+        'target_power_factor': np.where(chosen_target >= 0, chosen_target, np.nan),
+        'capacitor_kvar': np.round(merged['capacitor_kvar'], 1),
+        'cost': np.round(merged['cost'], 2),
+        'losses_before_kw': np.round(merged['losses_before_kw'], 2),
+        'losses_after_kw': np.round(merged['losses_after_kw'], 2),
+        'loss_saved_kw': np.round(saved, 2)
+    })
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result['saved_kw_per_1000'] = np.round(np.where(useful, saved / merged['cost'] * 1000, 0.0), 4)
+    result.attrs.update(evaluations=len(system_df) * len(conductor), cached_blocks=cached_blocks)
+    return result
+
+def plan_upgrades(evaluations, budget):
+    """Fund the best action of each line in order of kW saved per dollar
+
+    Actions that do not fit the remaining budget are skipped, cheaper ones
+    further down the ranking may still be funded. Returns the funded rows
+    with a cumulative_cost column.
+    """
+    ranked = evaluations[evaluations['action'] != 'none'].sort_values(
+        'saved_kw_per_1000', ascending=False, kind='stable')
+    costs = ranked['cost'].to_numpy()
+
+    # Fast path: the whole prefix that fits is funded as one block
+    cumulative = np.cumsum(costs)
+    prefix = int(np.searchsorted(cumulative, budget, side='right'))
+    funded = list(range(prefix))
+    remaining = budget - (cumulative[prefix - 1] if prefix else 0.0)
+    for position in range(prefix, len(costs)):
+        if costs[position] <= remaining:
+            funded.append(position)
+            remaining -= costs[position]
+
+    plan = ranked.iloc[funded].copy()
+    plan['cumulative_cost'] = np.round(plan['cost'].cumsum(), 2)
+    return plan
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Conductor upgrade / PF correction optimizer")
+    parser.add_argument('--input', default='data/power_system.csv')
+    parser.add_argument('--catalog', default=CATALOG_FILE)
+    parser.add_argument('--budget', type=float, default=250_000)
+    parser.add_argument('--output', default='data/upgrade_plan.csv')
+    parser.add_argument('--no-cache', action='store_true', help="always re-evaluate every line")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🛠️  UPGRADE OPTIMIZER")
+    print("=" * 60)
+
+    try:
+        system_df = read_table(args.input, dtype=ID_DTYPES)
+        catalog = read_table(args.catalog)
+        evaluations = evaluate_upgrades(system_df, catalog,
+                                        cache_dir=None if args.no_cache else RESULT_CACHE_DIR)
+        print(f"📖 Evaluated {evaluations.attrs['evaluations']:,} line × action combinations "
+              f"({evaluations.attrs['cached_blocks']} blocks from cache)")
+
+        plan = plan_upgrades(evaluations, args.budget)
+        write_table(plan, args.output)
+
+        print(f"\n💰 Budget: ${args.budget:,.0f} | Funded: {len(plan)} actions "
+              f"for ${plan['cost'].sum():,.0f}")
+        print(f"⚡ Losses saved: {plan['loss_saved_kw'].sum():,.1f} kW")
+        print("\n🏆 TOP ACTIONS:")
+        print("-" * 60)
+        for _, row in plan.head(10).iterrows():
+            detail = []
+            if isinstance(row['conductor_type'], str):
+                detail.append(f"→ {row['conductor_type']}")
+            if row['capacitor_kvar'] > 0:
+                detail.append(f"{row['capacitor_kvar']:,.0f} kvar to PF {row['target_power_factor']:.2f}")
+            print(f"{row['line_id']} ({row['area_name']}): {row['action']} {' + '.join(detail)}")
+            print(f"   Saves {row['loss_saved_kw']:.2f} kW for ${row['cost']:,.0f} "
+                  f"({row['saved_kw_per_1000']:.3f} kW per $1000)")
+        print(f"\n💾 Plan saved to: {args.output}")
+    except FileNotFoundError as e:
+        print(f"❌ Error: Could not find {e.filename}")
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")